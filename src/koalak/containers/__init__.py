@@ -1,3 +1,21 @@
-from .functions import count, first, max, min, search, sum
+from .columnar_container import ColumnarContainer
+from .disk_container import DiskContainer
+from .functions import (
+    count,
+    first,
+    max,
+    mean,
+    median,
+    min,
+    nlargest,
+    nsmallest,
+    quantile,
+    reduce,
+    search,
+    std,
+    sum,
+    unique,
+    var,
+)
 from .generic_container import Container, DictContainer
 from .utils import feed_parser, print_table
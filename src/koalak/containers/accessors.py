@@ -0,0 +1,123 @@
+import functools
+import re
+from operator import attrgetter, getitem, itemgetter
+from typing import Any, Callable, List, Union
+
+# A step of a path: a field name (optionally preceded by a dot) or a list index
+_PATH_STEP = re.compile(r"(\.?)([^.\[\]]+)|\[(-?\d+)\]")
+
+
+def is_path(key: str) -> bool:
+    """True if key is a dotted path or contains a list index"""
+    return "." in key or "[" in key
+
+
+def path_root(key: str) -> str:
+    """Return the top level field of a path ("owner" for "owner.name")"""
+    return re.split(r"[.\[]", key, maxsplit=1)[0]
+
+
+def parse_path(path: str) -> List[Union[str, int]]:
+    """
+    Split a path into field names (str) and list indexes (int).
+
+    Examples:
+        >>> parse_path("owner.name")
+        ['owner', 'name']
+        >>> parse_path("hosts[0].ports[-1]")
+        ['hosts', 0, 'ports', -1]
+    """
+    steps = []
+    position = 0
+    for match in _PATH_STEP.finditer(path):
+        dot, field_name, list_index = match.groups()
+        if (
+            match.start() != position
+            or (dot and not steps)
+            or (steps and field_name and not dot)
+        ):
+            raise ValueError(f"Invalid path {path!r}")
+        if field_name is not None:
+            steps.append(field_name)
+        else:
+            steps.append(int(list_index))
+        position = match.end()
+    if not steps or position != len(path):
+        raise ValueError(f"Invalid path {path!r}")
+    return steps
+
+
+def make_accessor(key: str, get: Callable[[Any, str], Any]) -> Callable[[Any], Any]:
+    """
+    Return a function getting the value of key (a field name or a path) of an item.
+
+    When `get` is operator.getitem or getattr, fields are read with C level
+    itemgetter/attrgetter objects instead of calling `get` from Python.
+    Accessors of these builtin getters are cached, criteria compiled many times
+    share them. Other getters (ex: lambdas built per call) are not cached, the
+    cache would keep them alive and evict the useful accessors.
+
+    A dict containing key itself (ex: "host.ip" in the output of
+    koalak.utils.dict_flat) is read with this key instead of following the path.
+    """
+    if get is getitem or get is getattr:
+        return _make_cached_accessor(key, get)
+    return _make_accessor(key, get)
+
+
+@functools.lru_cache(maxsize=1024)
+def _make_cached_accessor(
+    key: str, get: Callable[[Any, str], Any]
+) -> Callable[[Any], Any]:
+    return _make_accessor(key, get)
+
+
+def _make_accessor(key: str, get: Callable[[Any, str], Any]) -> Callable[[Any], Any]:
+    if not is_path(key):
+        return _make_field_getter(key, get)
+
+    steps = parse_path(key)
+    if get is getattr and all(isinstance(step, str) for step in steps):
+        # attrgetter supports dotted names natively
+        return attrgetter(key)
+
+    step_getters = [
+        itemgetter(step) if isinstance(step, int) else _make_field_getter(step, get)
+        for step in steps
+    ]
+    field_getter = _make_field_getter(key, get)
+
+    def accessor(item: Any) -> Any:
+        if isinstance(item, dict) and key in item:
+            return field_getter(item)
+        for step_getter in step_getters:
+            item = step_getter(item)
+        return item
+
+    return accessor
+
+
+def make_multi_accessor(
+    keys: List[str], get: Callable[[Any, str], Any]
+) -> Callable[[Any], tuple]:
+    """Return a function getting the tuple of the values of keys of an item"""
+    if len(keys) > 1 and not any(is_path(key) for key in keys):
+        if get is getitem:
+            return itemgetter(*keys)
+        if get is getattr:
+            return attrgetter(*keys)
+    accessors = [make_accessor(key, get) for key in keys]
+    if len(accessors) == 1:
+        accessor = accessors[0]
+        return lambda item: (accessor(item),)
+    return lambda item: tuple([accessor(item) for accessor in accessors])
+
+
+def _make_field_getter(
+    field_name: str, get: Callable[[Any, str], Any]
+) -> Callable[[Any], Any]:
+    if get is getitem:
+        return itemgetter(field_name)
+    if get is getattr:
+        return attrgetter(field_name)
+    return lambda item: get(item, field_name)
@@ -0,0 +1,466 @@
+import math
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+
+from .accessors import path_root
+from .sketches import P2Quantile, quantile_from_sorted
+
+# An aggregation is either a function name ("count") or (field, function name)
+AggregationSpec = Union[str, Tuple[Any, str]]
+
+
+class Accumulator:
+    """Running state of one aggregate, fed one value at a time"""
+
+    # True if the aggregate does not need the value of a field (ex: count)
+    needs_value = True
+    # True if partial states can be combined with merge (ex: computed in parallel)
+    mergeable = True
+    # True if a value can be removed from the state with remove
+    invertible = False
+
+    def add(self, value: Any) -> None:
+        raise NotImplementedError
+
+    def merge(self, other: "Accumulator") -> None:
+        """Combine the state of an accumulator fed with the values following ours"""
+        raise NotImplementedError
+
+    def remove(self, value: Any) -> None:
+        """Remove a previously added value, only for invertible accumulators"""
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+
+class CountAccumulator(Accumulator):
+    needs_value = False
+    invertible = True
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, value: Any = None) -> None:
+        self.count += 1
+
+    def merge(self, other: "CountAccumulator") -> None:
+        self.count += other.count
+
+    def remove(self, value: Any = None) -> None:
+        self.count -= 1
+
+    def result(self) -> int:
+        return self.count
+
+
+class SumAccumulator(Accumulator):
+    invertible = True
+
+    def __init__(self):
+        self.total = 0
+
+    def add(self, value: Any) -> None:
+        self.total += value
+
+    def merge(self, other: "SumAccumulator") -> None:
+        self.total += other.total
+
+    def remove(self, value: Any) -> None:
+        self.total -= value
+
+    def result(self) -> Any:
+        return self.total
+
+
+class MinAccumulator(Accumulator):
+    def __init__(self):
+        self.value = None
+        self.empty = True
+
+    def add(self, value: Any) -> None:
+        if self.empty or value < self.value:
+            self.value = value
+            self.empty = False
+
+    def merge(self, other: "MinAccumulator") -> None:
+        if not other.empty:
+            self.add(other.value)
+
+    def result(self) -> Any:
+        return self.value
+
+
+class MaxAccumulator(Accumulator):
+    def __init__(self):
+        self.value = None
+        self.empty = True
+
+    def add(self, value: Any) -> None:
+        if self.empty or value > self.value:
+            self.value = value
+            self.empty = False
+
+    def merge(self, other: "MaxAccumulator") -> None:
+        if not other.empty:
+            self.add(other.value)
+
+    def result(self) -> Any:
+        return self.value
+
+
+class MeanAccumulator(Accumulator):
+    invertible = True
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+
+    def add(self, value: Any) -> None:
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: "MeanAccumulator") -> None:
+        self.count += other.count
+        self.total += other.total
+
+    def remove(self, value: Any) -> None:
+        self.count -= 1
+        self.total -= value
+
+    def result(self) -> Optional[float]:
+        if not self.count:
+            return None
+        return self.total / self.count
+
+
+class VarianceAccumulator(Accumulator):
+    """Variance computed in one pass with Welford's algorithm
+
+    Args:
+        ddof: Delta degrees of freedom, the divisor is `count - ddof`
+            (0 for the population variance, 1 for the sample variance).
+    """
+
+    def __init__(self, ddof: int = 0):
+        self.ddof = ddof
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: Any) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def merge(self, other: "VarianceAccumulator") -> None:
+        # Chan et al. formula to combine the moments of two partitions
+        count = self.count + other.count
+        if not count:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    def result(self) -> Optional[float]:
+        if self.count - self.ddof <= 0:
+            return None
+        return self._m2 / (self.count - self.ddof)
+
+
+class StdAccumulator(VarianceAccumulator):
+    def result(self) -> Optional[float]:
+        variance = super().result()
+        if variance is None:
+            return None
+        return math.sqrt(variance)
+
+
+class QuantileAccumulator(Accumulator):
+    """Quantile of the values, exact (keeps the values) or approximated with P²"""
+
+    def __init__(self, q: float = 0.5, approximate: bool = False):
+        self.q = q
+        self.approximate = approximate
+        # the markers of P² can not be combined
+        self.mergeable = not approximate
+        if approximate:
+            self._sketch = P2Quantile(q)
+        else:
+            self._values: List[Any] = []
+
+    def add(self, value: Any) -> None:
+        if self.approximate:
+            self._sketch.add(value)
+        else:
+            self._values.append(value)
+
+    def merge(self, other: "QuantileAccumulator") -> None:
+        if not (self.mergeable and other.mergeable):
+            raise ValueError("Approximate quantiles can not be merged")
+        self._values.extend(other._values)
+
+    def result(self) -> Optional[float]:
+        if self.approximate:
+            if not self._sketch.count:
+                return None
+            return self._sketch.result()
+        if not self._values:
+            return None
+        return quantile_from_sorted(sorted(self._values), self.q)
+
+
+class FirstAccumulator(Accumulator):
+    def __init__(self):
+        self.value = None
+        self.empty = True
+
+    def add(self, value: Any) -> None:
+        if self.empty:
+            self.value = value
+            self.empty = False
+
+    def merge(self, other: "FirstAccumulator") -> None:
+        if not other.empty:
+            self.add(other.value)
+
+    def result(self) -> Any:
+        return self.value
+
+
+class LastAccumulator(Accumulator):
+    def __init__(self):
+        self.value = None
+        self.empty = True
+
+    def add(self, value: Any) -> None:
+        self.value = value
+        self.empty = False
+
+    def merge(self, other: "LastAccumulator") -> None:
+        if not other.empty:
+            self.add(other.value)
+
+    def result(self) -> Any:
+        return self.value
+
+
+def statistic_result(accumulator: Accumulator) -> Any:
+    """Return the result of accumulator, raise ValueError if it has too few values"""
+    result = accumulator.result()
+    if result is None:
+        raise ValueError("Not enough values to compute the statistic")
+    return result
+
+
+ACCUMULATORS: Dict[str, Type[Accumulator]] = {
+    "count": CountAccumulator,
+    "sum": SumAccumulator,
+    "min": MinAccumulator,
+    "max": MaxAccumulator,
+    "mean": MeanAccumulator,
+    "var": VarianceAccumulator,
+    "std": StdAccumulator,
+    "median": QuantileAccumulator,
+    "first": FirstAccumulator,
+    "last": LastAccumulator,
+}
+
+
+def parse_aggregation_spec(name: str, spec: AggregationSpec) -> Tuple[Any, str]:
+    """Normalize an aggregation spec into (key, function name)
+
+    Examples:
+        >>> parse_aggregation_spec("n", "count")
+        (None, 'count')
+        >>> parse_aggregation_spec("total", ("size", "sum"))
+        ('size', 'sum')
+    """
+    if isinstance(spec, str):
+        key, function_name = None, spec
+    elif isinstance(spec, tuple) and len(spec) == 2:
+        key, function_name = spec
+    else:
+        raise TypeError(
+            f"Invalid aggregation {name!r}: expected a function name or a (key, function name) tuple"
+        )
+    if function_name not in ACCUMULATORS:
+        raise ValueError(
+            f"Unknown aggregation function {function_name!r} for {name!r}, available functions: {list(ACCUMULATORS)}"
+        )
+    if key is None and ACCUMULATORS[function_name].needs_value:
+        raise ValueError(f"Aggregation {name!r} needs a key: ({function_name!r}, key)")
+    return key, function_name
+
+
+class Aggregator:
+    """Compute several named aggregates in one pass over items
+
+    Args:
+        aggregations: name -> aggregation spec ("count" or (key, function name)).
+        get_key_func: function returning the getter of a key (Container._get_key_func).
+    """
+
+    def __init__(
+        self,
+        aggregations: Dict[str, AggregationSpec],
+        get_key_func: Callable[[Any], Callable[[Any], Any]],
+    ):
+        self.aggregations = []
+        for name, spec in aggregations.items():
+            key, function_name = parse_aggregation_spec(name, spec)
+            key_func = get_key_func(key) if key is not None else None
+            self.aggregations.append((name, key_func, ACCUMULATORS[function_name]))
+
+    def new_state(self) -> list:
+        return [accumulator_cls() for _, _, accumulator_cls in self.aggregations]
+
+    def add(self, state: list, item: Any) -> None:
+        for accumulator, (_, key_func, _) in zip(state, self.aggregations):
+            if key_func is None:
+                accumulator.add(None)
+            else:
+                accumulator.add(key_func(item))
+
+    def merge(self, state: list, other_state: list) -> None:
+        """Merge other_state (computed on the following items) into state"""
+        for accumulator, other_accumulator in zip(state, other_state):
+            accumulator.merge(other_accumulator)
+
+    def result(self, state: list) -> Dict[str, Any]:
+        return {
+            name: accumulator.result()
+            for accumulator, (name, _, _) in zip(state, self.aggregations)
+        }
+
+
+class MaterializedAggregate:
+    """Aggregate kept up to date by the mutations of a container
+
+    The running state is updated on each added item. Removed items are removed
+    from the state of invertible accumulators (count, sum, mean), other
+    accumulators and updates of a key the aggregate depends on mark it stale: it
+    is recomputed with one scan on the next read.
+
+    Args:
+        spec: "count" or (key, function name), see parse_aggregation_spec.
+        by: If not None, key of the groups, the result is a dict group -> value.
+        get_key_func: function returning the getter of a key (Container._get_key_func).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        spec: AggregationSpec,
+        get_key_func: Callable[[Any], Callable[[Any], Any]],
+        by: Any = None,
+    ):
+        self.name = name
+        self.spec = spec
+        self.key, self.function_name = parse_aggregation_spec(name, spec)
+        self.by = by
+        self._accumulator_cls = ACCUMULATORS[self.function_name]
+        self._key_func = get_key_func(self.key) if self.key is not None else None
+        self._by_func = get_key_func(by) if by is not None else None
+        # None if any update may change the aggregate (callable keys)
+        self.dependencies = _key_dependencies(self.key, by)
+        self.stale = True
+        self._states: Dict[Any, Accumulator] = {}
+        self._group_counts: Dict[Any, int] = {}
+        # results of the groups, only the changed groups are computed again
+        self._results: Dict[Any, Any] = {}
+        self._changed_groups: Set[Any] = set()
+
+    def rebuild(self, items: Iterable[Any]) -> None:
+        self._states = {}
+        self._group_counts = {}
+        self._results = {}
+        self._changed_groups = set()
+        self.stale = False
+        for item in items:
+            self.add(item)
+
+    def add(self, item: Any) -> None:
+        if self.stale:
+            return
+        group_key = self._by_func(item) if self._by_func is not None else None
+        accumulator = self._states.get(group_key)
+        if accumulator is None:
+            accumulator = self._states[group_key] = self._accumulator_cls()
+            self._group_counts[group_key] = 0
+        accumulator.add(self._key_func(item) if self._key_func is not None else None)
+        self._group_counts[group_key] += 1
+        self._changed_groups.add(group_key)
+
+    def remove(self, item: Any) -> None:
+        if self.stale:
+            return
+        if not self._accumulator_cls.invertible:
+            self.stale = True
+            return
+        group_key = self._by_func(item) if self._by_func is not None else None
+        self._states[group_key].remove(
+            self._key_func(item) if self._key_func is not None else None
+        )
+        self._group_counts[group_key] -= 1
+        if not self._group_counts[group_key]:
+            del self._states[group_key]
+            del self._group_counts[group_key]
+        self._changed_groups.add(group_key)
+
+    def on_update(self, updated_keys: Iterable[str]) -> None:
+        if self.dependencies is None or not self.dependencies.isdisjoint(updated_keys):
+            self.stale = True
+
+    def on_reorder(self) -> None:
+        if self.function_name in ("first", "last"):
+            self.stale = True
+
+    def result(self, items: Iterable[Any]) -> Any:
+        """Return the aggregate, items are scanned only if it is stale"""
+        if self.stale:
+            self.rebuild(items)
+        results = self._results
+        for group_key in self._changed_groups:
+            accumulator = self._states.get(group_key)
+            if accumulator is None:
+                results.pop(group_key, None)
+            else:
+                results[group_key] = accumulator.result()
+        self._changed_groups = set()
+        if self.by is not None:
+            return dict(results)
+        if None in results:
+            return results[None]
+        return self._accumulator_cls().result()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name!r})"
+
+
+def _key_dependencies(*keys: Any) -> Optional[Set[str]]:
+    dependencies = set()
+    for key in keys:
+        if key is None:
+            continue
+        if isinstance(key, str):
+            # the key itself for dicts with dotted keys (see make_accessor)
+            dependencies.update([key, path_root(key)])
+        elif isinstance(key, (list, tuple)):
+            dependencies.update(key)
+            dependencies.update(path_root(k) for k in key)
+        else:
+            return None
+    return dependencies
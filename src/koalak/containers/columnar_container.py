@@ -0,0 +1,636 @@
+import builtins
+import functools
+import itertools
+import operator as builtin_operator
+import os
+import pickle
+from array import array
+from collections import Counter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from . import parallel, snapshots
+from .accessors import is_path, make_accessor, path_root
+from .aggregations import ACCUMULATORS, AggregationSpec, parse_aggregation_spec
+from .compiled_query import CompiledQuery, bind_predicate
+
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+# Map a comparison operator to the C function computing it with the search value
+# as first argument: `item_value < search_value` is `search_value > item_value`
+_REFLECTED_OPERATORS = {
+    "lt": builtin_operator.gt,
+    "le": builtin_operator.ge,
+    "gt": builtin_operator.lt,
+    "ge": builtin_operator.le,
+    "eq": builtin_operator.eq,
+    "ne": builtin_operator.ne,
+}
+
+
+def _negate(predicate: Callable[[Any], bool]) -> Callable[[Any], bool]:
+    return lambda value: not predicate(value)
+
+
+class _Column:
+    """Base class of the columns, `raw` holds the stored (possibly encoded) values"""
+
+    raw: Sequence
+
+    def accepts(self, value: Any) -> bool:
+        raise NotImplementedError
+
+    def append(self, value: Any) -> None:
+        raise NotImplementedError
+
+    def take(self, positions: Iterable[int]) -> "_Column":
+        raise NotImplementedError
+
+    def decode(self, raw_value: Any) -> Any:
+        return raw_value
+
+    def raw_predicate(self, operator: str, search_value: Any) -> Callable[[Any], bool]:
+        """Return a predicate evaluated on the raw stored values"""
+        return bind_predicate(operator, search_value)
+
+    def values(self) -> Iterable[Any]:
+        return iter(self.raw)
+
+    def __getitem__(self, position: int) -> Any:
+        return self.raw[position]
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+
+def _writable(raw: Sequence, typecode: str) -> array:
+    """Return raw as an array, copying the read-only views of loaded snapshots"""
+    if type(raw) is array:
+        return raw
+    copied = array(typecode)
+    copied.frombytes(raw.cast("B"))
+    return copied
+
+
+def _buffer_reduce_args(raw: Sequence, protocol: int) -> Any:
+    # with protocol 5 the values can be written out-of-band (see snapshots)
+    if protocol >= 5:
+        return pickle.PickleBuffer(raw)
+    return raw.tobytes()
+
+
+def _view_from_buffer(buffer: Any, typecode: str) -> memoryview:
+    return memoryview(buffer).cast("B").cast(typecode)
+
+
+def _rebuild_numeric_column(typecode: str, buffer: Any) -> "_NumericColumn":
+    column = _NumericColumn.__new__(_NumericColumn)
+    column.typecode = typecode
+    column.raw = _view_from_buffer(buffer, typecode)
+    return column
+
+
+def _rebuild_category_column(categories: List[Any], buffer: Any) -> "_CategoryColumn":
+    column = _CategoryColumn.__new__(_CategoryColumn)
+    column.categories = categories
+    column._codes_by_value = {value: code for code, value in enumerate(categories)}
+    column.raw = _view_from_buffer(buffer, "q")
+    return column
+
+
+class _NumericColumn(_Column):
+    """Column of int (typecode "q") or float (typecode "d") stored in an array.array
+
+    Columns loaded from a snapshot hold a read-only memoryview of the file until
+    their first modification.
+    """
+
+    def __init__(self, typecode: str, values: Iterable = ()):
+        self.typecode = typecode
+        self.raw = array(typecode, values)
+
+    def __reduce_ex__(self, protocol: int):
+        raw_args = _buffer_reduce_args(self.raw, protocol)
+        return _rebuild_numeric_column, (self.typecode, raw_args)
+
+    def accepts(self, value: Any) -> bool:
+        value_type = type(value)
+        if self.typecode == "q":
+            return value_type is int and _INT64_MIN <= value <= _INT64_MAX
+        # ints are stored as floats only if they are exactly representable
+        return value_type is float or (
+            value_type is int and -(2**53) <= value <= 2**53
+        )
+
+    def append(self, value: Any) -> None:
+        self.raw = _writable(self.raw, self.typecode)
+        self.raw.append(value)
+
+    def take(self, positions: Iterable[int]) -> "_NumericColumn":
+        return _NumericColumn(self.typecode, map(self.raw.__getitem__, positions))
+
+    def raw_predicate(self, operator: str, search_value: Any) -> Callable[[Any], bool]:
+        if operator in _REFLECTED_OPERATORS:
+            return functools.partial(_REFLECTED_OPERATORS[operator], search_value)
+        if operator in ("default", "in", "not", "nin"):
+            try:
+                predicate = frozenset(search_value).__contains__
+            except TypeError:
+                return super().raw_predicate(operator, search_value)
+            if operator in ("not", "nin"):
+                return _negate(predicate)
+            return predicate
+        return super().raw_predicate(operator, search_value)
+
+
+class _CategoryColumn(_Column):
+    """Dictionary encoded column of strings (and None)
+
+    Values are stored as integer codes, operators are evaluated once per distinct
+    value and then applied to the codes.
+    """
+
+    def __init__(self, values: Iterable = ()):
+        self.categories: List[Any] = []
+        self._codes_by_value: Dict[Any, int] = {}
+        self.raw = array("q")
+        for value in values:
+            self.append(value)
+
+    def __reduce_ex__(self, protocol: int):
+        raw_args = _buffer_reduce_args(self.raw, protocol)
+        return _rebuild_category_column, (self.categories, raw_args)
+
+    def accepts(self, value: Any) -> bool:
+        return value is None or type(value) is str
+
+    def append(self, value: Any) -> None:
+        code = self._codes_by_value.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(value)
+            self._codes_by_value[value] = code
+        self.raw = _writable(self.raw, "q")
+        self.raw.append(code)
+
+    def take(self, positions: Iterable[int]) -> "_CategoryColumn":
+        column = _CategoryColumn()
+        column.categories = list(self.categories)
+        column._codes_by_value = dict(self._codes_by_value)
+        column.raw = array("q", map(self.raw.__getitem__, positions))
+        return column
+
+    def decode(self, raw_value: int) -> Any:
+        return self.categories[raw_value]
+
+    def raw_predicate(self, operator: str, search_value: Any) -> Callable[[Any], bool]:
+        predicate = bind_predicate(operator, search_value)
+        matching_codes = frozenset(
+            code for code, category in enumerate(self.categories) if predicate(category)
+        )
+        return matching_codes.__contains__
+
+    def values(self) -> Iterable[Any]:
+        return map(self.categories.__getitem__, self.raw)
+
+    def __getitem__(self, position: int) -> Any:
+        return self.categories[self.raw[position]]
+
+
+class _ObjectColumn(_Column):
+    """Fallback column storing any Python object in a list"""
+
+    def __init__(self, values: Iterable = ()):
+        self.raw = list(values)
+
+    def accepts(self, value: Any) -> bool:
+        return True
+
+    def append(self, value: Any) -> None:
+        self.raw.append(value)
+
+    def take(self, positions: Iterable[int]) -> "_ObjectColumn":
+        return _ObjectColumn(map(self.raw.__getitem__, positions))
+
+
+def _make_column(values: list) -> _Column:
+    """Create the most compact column able to store all the values"""
+    types = set(map(type, values))
+    if types and types <= {int}:
+        try:
+            return _NumericColumn("q", values)
+        except OverflowError:
+            return _ObjectColumn(values)
+    if types and types <= {int, float}:
+        return _NumericColumn("d", values)
+    if types <= {str, type(None)}:
+        return _CategoryColumn(values)
+    return _ObjectColumn(values)
+
+
+class ColumnarContainer:
+    """Container of dict records storing each field in a typed column.
+
+    Integers and floats are stored in `array.array` columns, strings are
+    dictionary encoded (integer codes and a list of distinct values) and other
+    values are kept in plain lists. Aggregations and comparison filters work on
+    the columns directly instead of accessing the records one by one.
+
+    Records are returned as new dicts containing every field of the container,
+    missing fields are set to None.
+
+    With `executor="process"`, the filters are evaluated on chunks of the columns
+    by `workers` processes. Forked workers read the columns of the parent process
+    directly (shared copy-on-write pages), only the matching positions are sent back.
+    """
+
+    # Minimum number of records to split a filter among worker processes
+    parallel_min_items = 10_000
+
+    def __init__(
+        self,
+        data: Iterable[Dict[str, Any]] = None,
+        name: str = None,
+        executor: str = None,
+        workers: int = None,
+    ):
+        self.name = name
+        self._columns: Dict[str, _Column] = {}
+        self._length = 0
+        self.executor, self.workers = parallel.check_executor(executor, workers)
+        if data is not None:
+            self._load(data)
+
+    @classmethod
+    def from_items(
+        cls,
+        items: Iterable[Any],
+        fields: List[str],
+        get: Callable[[Any, str], Any] = getattr,
+        name: str = None,
+    ) -> "ColumnarContainer":
+        """Build a ColumnarContainer from the `fields` of any items"""
+        return cls(
+            ({field: get(item, field) for field in fields} for item in items), name=name
+        )
+
+    # ================ #
+    # MODIFIER METHODS #
+    # ================ #
+    def add(self, record: Dict[str, Any]) -> None:
+        for field in record:
+            if field not in self._columns:
+                self._columns[field] = _make_column([None] * self._length)
+        for field, column in self._columns.items():
+            value = record.get(field)
+            if not column.accepts(value):
+                column = _make_column(list(column.values()) + [value])
+                self._columns[field] = column
+            else:
+                column.append(value)
+        self._length += 1
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.add(record)
+
+    # ============= #
+    # QUERY METHODS #
+    # ============= #
+    @property
+    def fields(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, field: str) -> List[Any]:
+        """Return the decoded values of a field"""
+        return list(self._get_column(field).values())
+
+    def search(self, pos_criteria: Dict = None, **criteria) -> Iterator[Dict[str, Any]]:
+        for position in self._select(pos_criteria, criteria):
+            yield self[position]
+
+    def filter(self, pos_criteria: Dict = None, **criteria) -> "ColumnarContainer":
+        return self._take(self._select(pos_criteria, criteria))
+
+    def first(self, pos_criteria: Dict = None, **criteria) -> Dict[str, Any]:
+        for record in self.search(pos_criteria, **criteria):
+            return record
+        raise ValueError("No match found")
+
+    def count(self, pos_criteria: Dict = None, **criteria) -> int:
+        return len(self._select(pos_criteria, criteria))
+
+    def count_values(self, key: str) -> Dict[Any, int]:
+        column = self._get_column(key)
+        counter = Counter(column.raw)
+        return {column.decode(raw_value): count for raw_value, count in counter.items()}
+
+    def distinct(self, key: str, **criteria) -> List[Any]:
+        column = self._get_column(key)
+        raw_values = self._column_raw_values(column, self._select(None, criteria))
+        return [column.decode(raw_value) for raw_value in dict.fromkeys(raw_values)]
+
+    def sum(self, key: str, pos_criteria: Dict = None, **criteria) -> Any:
+        column = self._get_column(key)
+        positions = self._select(pos_criteria, criteria)
+        return builtins.sum(self._decoded_values(column, positions))
+
+    def mean(self, key: str, pos_criteria: Dict = None, **criteria) -> float:
+        column = self._get_column(key)
+        positions = self._select(pos_criteria, criteria)
+        if not positions:
+            raise ValueError("mean requires at least one value")
+        return builtins.sum(self._decoded_values(column, positions)) / len(positions)
+
+    def min(self, key: str) -> Dict[str, Any]:
+        """Return the record with the minimum value of key"""
+        return self[self._position_of_extremum(key, builtins.min)]
+
+    def max(self, key: str) -> Dict[str, Any]:
+        """Return the record with the maximum value of key"""
+        return self[self._position_of_extremum(key, builtins.max)]
+
+    def groupby(self, key: str) -> "ColumnarGroupBy":
+        """Group the records by key, see ColumnarGroupBy"""
+        return ColumnarGroupBy(self, key)
+
+    def to_container(self):
+        """Convert to a DictContainer of records"""
+        from .generic_container import DictContainer
+
+        return DictContainer(list(self), copy=False, name=self.name)
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """Write the columns to a snapshot file, see `load`"""
+        state = {"name": self.name, "columns": self._columns, "length": self._length}
+        snapshots.dump(state, path)
+
+    @classmethod
+    def load(
+        cls, path: Union[str, os.PathLike], mmap: bool = False
+    ) -> "ColumnarContainer":
+        """
+        Read a container written by `save`.
+
+        Int, float and string columns are stored as raw arrays in the file. They are
+        not decoded: the columns are views of the read file or, with mmap=True, of
+        the memory-mapped file, so only the accessed pages are loaded in memory.
+
+        Warning:
+            Snapshots are pickles, loading a file can execute arbitrary code. Only
+            load files from a trusted source.
+        """
+        state = snapshots.load(path, mmap_mode=mmap)
+        container = cls(name=state["name"])
+        container._columns = state["columns"]
+        container._length = state["length"]
+        return container
+
+    # ============== #
+    # DUNDER METHODS #
+    # ============== #
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        fields = list(self._columns)
+        columns_values = [column.values() for column in self._columns.values()]
+        for values in zip(*columns_values):
+            yield dict(zip(fields, values))
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError("ColumnarContainer index out of range")
+        return {field: column[position] for field, column in self._columns.items()}
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __str__(self) -> str:
+        str_name = self.name if self.name else ""
+        return f"{ColumnarContainer.__name__}({str_name})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    # =============== #
+    # PRIVATE METHODS #
+    # =============== #
+    def _load(self, data: Iterable[Dict[str, Any]]) -> None:
+        records = list(data)
+        fields = {}
+        for record in records:
+            for field in record:
+                fields[field] = None
+        for field in fields:
+            self._columns[field] = _make_column(
+                [record.get(field) for record in records]
+            )
+        self._length = len(records)
+
+    def _get_column(self, field: str) -> _Column:
+        try:
+            return self._columns[field]
+        except KeyError:
+            raise KeyError(field) from None
+
+    def _select(self, pos_criteria: Optional[Dict], criteria: Dict) -> Sequence[int]:
+        """Return the positions of the records matching the criteria"""
+        if pos_criteria is not None and criteria:
+            raise ValueError("Cannot use both positional criteria and keyword criteria")
+        if pos_criteria is not None:
+            criteria = pos_criteria
+
+        if (
+            criteria
+            and self.executor == "process"
+            and self.workers > 1
+            and self._length >= self.parallel_min_items
+            and parallel.is_picklable(criteria)
+        ):
+            positions = []
+            bounds = parallel.chunk_bounds(self._length, self.workers)
+            chunks_positions = parallel.map_chunks(
+                _select_chunk,
+                self,
+                self._length,
+                self.workers,
+                (criteria,),
+                take=_take_chunk,
+            )
+            for (start, _), chunk_positions in zip(bounds, chunks_positions):
+                positions.extend(position + start for position in chunk_positions)
+            return positions
+        return self._filter_positions(criteria, range(self._length))
+
+    def _filter_positions(self, criteria: Dict, positions: range) -> Sequence[int]:
+        """Return the positions in the range of the records matching the criteria"""
+        for key, search_value, operator in CompiledQuery(criteria).criteria:
+            if key in self._columns or not is_path(key):
+                column = self._get_column(key)
+                predicate = column.raw_predicate(operator, search_value)
+                values = self._column_raw_values(column, positions)
+            else:
+                predicate = bind_predicate(operator, search_value)
+                values = self._path_values(key, positions)
+            positions = list(itertools.compress(positions, map(predicate, values)))
+            if not positions:
+                break
+        return positions
+
+    def _path_values(self, path: str, positions: Sequence[int]) -> Iterable:
+        """Values of a path ("host.ip", "ports[0]") read in the decoded values of
+        the column of its first field"""
+        root = path_root(path)
+        accessor = make_accessor(path, builtin_operator.getitem)
+        column = self._get_column(root)
+        return (
+            accessor({root: value}) for value in self._decoded_values(column, positions)
+        )
+
+    def _column_raw_values(self, column: _Column, positions: Sequence[int]) -> Iterable:
+        if isinstance(positions, range) and positions.step == 1:
+            if len(positions) == self._length:
+                return column.raw
+            return column.raw[positions.start : positions.stop]
+        return map(column.raw.__getitem__, positions)
+
+    def _decoded_values(self, column: _Column, positions: Sequence[int]) -> Iterable:
+        raw_values = self._column_raw_values(column, positions)
+        if isinstance(column, _CategoryColumn):
+            return map(column.categories.__getitem__, raw_values)
+        return raw_values
+
+    def _position_of_extremum(self, key: str, function: Callable) -> int:
+        column = self._get_column(key)
+        if isinstance(column, _CategoryColumn):
+            # compare the distinct values only, then find the first code
+            extremum_code = function(set(column.raw), key=column.categories.__getitem__)
+            return builtin_operator.indexOf(column.raw, extremum_code)
+        raw = column.raw
+        return builtin_operator.indexOf(raw, function(raw))
+
+    def _group_positions(self, key: str) -> Dict[Any, List[int]]:
+        """Return group key -> positions of the records of the group"""
+        column = self._get_column(key)
+        groups_positions: Dict[Any, List[int]] = {}
+        for position, raw_value in enumerate(column.raw):
+            groups_positions.setdefault(raw_value, []).append(position)
+        return {
+            column.decode(raw_value): positions
+            for raw_value, positions in groups_positions.items()
+        }
+
+    def _take(self, positions: Sequence[int]) -> "ColumnarContainer":
+        result = ColumnarContainer()
+        result._columns = {
+            field: column.take(positions) for field, column in self._columns.items()
+        }
+        result._length = len(positions)
+        return result
+
+
+# Functions executed in worker processes, see parallel.map_chunks
+def _take_chunk(
+    container: ColumnarContainer, start: int, stop: int
+) -> ColumnarContainer:
+    return container._take(range(start, stop))
+
+
+def _select_chunk(
+    container: ColumnarContainer, start: int, stop: int, criteria: Dict
+) -> List[int]:
+    positions = container._filter_positions(criteria, range(start, stop))
+    return [position - start for position in positions]
+
+
+# Aggregations reduced with one C-level call over the values of a group
+_COLUMNAR_REDUCERS: Dict[str, Callable[[List[Any]], Any]] = {
+    "sum": builtins.sum,
+    "min": builtins.min,
+    "max": builtins.max,
+    "mean": lambda values: builtins.sum(values) / len(values),
+    "first": lambda values: values[0],
+    "last": lambda values: values[-1],
+}
+
+
+class ColumnarGroupBy(Mapping):
+    """Lazy result of ColumnarContainer.groupby, a mapping of group key -> ColumnarContainer"""
+
+    def __init__(self, container: ColumnarContainer, key: str):
+        self.container = container
+        self.key = key
+        self._groups: Optional[Dict[Any, ColumnarContainer]] = None
+
+    def agg(self, **aggregations: AggregationSpec) -> Dict[Any, Dict[str, Any]]:
+        """
+        Compute named aggregates for each group.
+
+        The positions of each group are computed once, then each aggregate reads
+        its column with a single reduction per group.
+
+        Args:
+            **aggregations: name -> "count" or (field, function).
+
+        Returns:
+            dict: group key -> {aggregate name: value}
+        """
+        parsed_aggregations = [
+            (name,) + parse_aggregation_spec(name, spec)
+            for name, spec in aggregations.items()
+        ]
+        groups_positions = self.container._group_positions(self.key)
+        result = {group_key: {} for group_key in groups_positions}
+        for name, field, function_name in parsed_aggregations:
+            if function_name == "count":
+                for group_key, positions in groups_positions.items():
+                    result[group_key][name] = len(positions)
+                continue
+
+            column = self.container._get_column(field)
+            reducer = _COLUMNAR_REDUCERS.get(function_name)
+            for group_key, positions in groups_positions.items():
+                values = list(self.container._decoded_values(column, positions))
+                if reducer is not None:
+                    result[group_key][name] = reducer(values)
+                else:
+                    accumulator = ACCUMULATORS[function_name]()
+                    for value in values:
+                        accumulator.add(value)
+                    result[group_key][name] = accumulator.result()
+        return result
+
+    def _get_groups(self) -> Dict[Any, ColumnarContainer]:
+        if self._groups is None:
+            groups = {}
+            for group_key, positions in self.container._group_positions(
+                self.key
+            ).items():
+                group = self.container._take(positions)
+                group.name = f"groupby[{self.key}={group_key}])"
+                groups[group_key] = group
+            self._groups = groups
+        return self._groups
+
+    def __getitem__(self, group_key: Any) -> ColumnarContainer:
+        return self._get_groups()[group_key]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._get_groups())
+
+    def __len__(self) -> int:
+        return len(self._get_groups())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.container}, {self.key!r})"
@@ -0,0 +1,259 @@
+import functools
+import operator as builtin_operator
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .accessors import make_accessor
+
+# Operators whose search value is a list of candidate values
+LIST_OPERATORS = ("default", "not", "in", "nin")
+
+# Prefixes applying an operator to the elements of a list ("ports__any__gt")
+QUANTIFIERS = ("any", "all")
+
+# Lower rank is evaluated first: equality filters out most items, negations few
+_OPERATORS_SELECTIVITY_RANK = {
+    "eq": 0,
+    "default": 0,
+    "in": 1,
+    "lt": 2,
+    "le": 2,
+    "gt": 2,
+    "ge": 2,
+    "ne": 3,
+    "not": 3,
+    "nin": 3,
+}
+
+
+def normalize_to_list(value: Any) -> list:
+    """
+    Converts a value to a list if it is not already a list.
+
+    Args:
+        value (any): The value to normalize to a list.
+
+    Returns:
+        list: The value as a list, or the value itself if it's already a list.
+    """
+    return [value] if not isinstance(value, list) else value
+
+
+def _to_frozenset(values: list):
+    try:
+        return frozenset(values)
+    except TypeError:
+        return None
+
+
+def _bind_default(search_values: list) -> Callable[[Any], bool]:
+    if len(search_values) == 1:
+        search_value = search_values[0]
+
+        def predicate(item_value):
+            if isinstance(item_value, list):
+                return search_value in item_value
+            return search_value == item_value
+
+        return predicate
+
+    search_set = _to_frozenset(search_values)
+
+    def predicate(item_value):
+        if isinstance(item_value, list):
+            if search_set is not None:
+                try:
+                    return not search_set.isdisjoint(item_value)
+                except TypeError:
+                    pass
+            return any(v in item_value for v in search_values)
+        if search_set is not None:
+            try:
+                return item_value in search_set
+            except TypeError:
+                pass
+        return any(v == item_value for v in search_values)
+
+    return predicate
+
+
+def _bind_not(search_values: list) -> Callable[[Any], bool]:
+    default_predicate = _bind_default(search_values)
+    return lambda item_value: not default_predicate(item_value)
+
+
+def _bind_in(search_values: list) -> Callable[[Any], bool]:
+    search_set = _to_frozenset(search_values)
+    if search_set is None:
+        return lambda item_value: item_value in search_values
+
+    def predicate(item_value):
+        try:
+            return item_value in search_set
+        except TypeError:
+            return item_value in search_values
+
+    return predicate
+
+
+def _bind_nin(search_values: list) -> Callable[[Any], bool]:
+    in_predicate = _bind_in(search_values)
+    return lambda item_value: not in_predicate(item_value)
+
+
+def _bind_eq(search_value) -> Callable[[Any], bool]:
+    return functools.partial(builtin_operator.eq, search_value)
+
+
+def _bind_ne(search_value) -> Callable[[Any], bool]:
+    return functools.partial(builtin_operator.ne, search_value)
+
+
+def _bind_lt(search_value) -> Callable[[Any], bool]:
+    return lambda item_value: item_value < search_value
+
+
+def _bind_le(search_value) -> Callable[[Any], bool]:
+    return lambda item_value: item_value <= search_value
+
+
+def _bind_gt(search_value) -> Callable[[Any], bool]:
+    return lambda item_value: item_value > search_value
+
+
+def _bind_ge(search_value) -> Callable[[Any], bool]:
+    return lambda item_value: item_value >= search_value
+
+
+def _bind_quantified(
+    quantifier: str, element_predicate: Callable[[Any], bool]
+) -> Callable[[Any], bool]:
+    """Apply element_predicate to the elements of the value of the item
+
+    A scalar value is handled as a list of one element and None as an empty list.
+    """
+    check = any if quantifier == "any" else all
+
+    def predicate(item_value):
+        if item_value is None:
+            item_value = ()
+        elif not isinstance(item_value, (list, tuple, set, frozenset)):
+            item_value = (item_value,)
+        return check(map(element_predicate, item_value))
+
+    return predicate
+
+
+# Map each operator to a function binding the search value into a predicate
+# taking the value of the item
+OPERATORS: Dict[str, Callable[[Any], Callable[[Any], bool]]] = {
+    "default": _bind_default,
+    "not": _bind_not,
+    "eq": _bind_eq,
+    "ne": _bind_ne,
+    "lt": _bind_lt,
+    "le": _bind_le,
+    "gt": _bind_gt,
+    "ge": _bind_ge,
+    "in": _bind_in,
+    "nin": _bind_nin,
+}
+
+
+def split_operator(operator: str) -> Tuple[Optional[str], str]:
+    """Split an operator into (quantifier or None, operator applied to the values)
+
+    Examples:
+        >>> split_operator("any__gt")
+        ('any', 'gt')
+    """
+    quantifier, _, element_operator = operator.rpartition("__")
+    return quantifier or None, element_operator
+
+
+def bind_predicate(operator: str, search_value: Any) -> Callable[[Any], bool]:
+    """Return the predicate of an operator (possibly quantified) taking the item value"""
+    quantifier, element_operator = split_operator(operator)
+    element_predicate = OPERATORS[element_operator](search_value)
+    if quantifier is None:
+        return element_predicate
+    return _bind_quantified(quantifier, element_predicate)
+
+
+@functools.lru_cache(maxsize=512)
+def _compile_plan(criteria_keys: Tuple[str, ...]) -> Tuple[Tuple[str, str, str], ...]:
+    """Parse the criteria keys once per shape.
+
+    A criteria key is a field name or a path ("host.ip", "ports[0]") optionally
+    followed by a quantifier and an operator: "ip", "ip__in", "ports__any__gt".
+    Dicts having the path itself as key (see make_accessor) are matched on it.
+
+    Returns:
+        tuple of (criteria_key, field, operator) ordered by selectivity, the
+        operator of quantified criteria is "<quantifier>__<operator>"
+    """
+    plan = []
+    for criteria_key in criteria_keys:
+        key, *modifiers = criteria_key.split("__")
+        quantifier = None
+        if modifiers and modifiers[0] in QUANTIFIERS:
+            quantifier = modifiers.pop(0)
+        if len(modifiers) > 1 or (modifiers and modifiers[0] not in OPERATORS):
+            raise ValueError(f"Unsupported operator '{'__'.join(modifiers)}'")
+        operator = modifiers[0] if modifiers else "default"
+        rank = _OPERATORS_SELECTIVITY_RANK[operator]
+        if quantifier is not None:
+            operator = f"{quantifier}__{operator}"
+            # iterating over the elements is more expensive than one comparison
+            rank += len(_OPERATORS_SELECTIVITY_RANK)
+        plan.append((rank, criteria_key, key, operator))
+    plan.sort(key=lambda e: e[0])
+    return tuple(
+        (criteria_key, key, operator) for _, criteria_key, key, operator in plan
+    )
+
+
+class CompiledQuery:
+    """Reusable predicate built from search criteria.
+
+    Criteria keys are parsed once (and cached by shape), operators are bound to
+    their search values and evaluated from the most to the least selective.
+
+    Example:
+        >>> query = CompiledQuery({"age__gt": 18, "name": ["alice", "bob"]})
+        >>> adults = [person for person in people if query(person)]
+    """
+
+    def __init__(
+        self, criteria: Dict[str, Any], get: Callable[[Any, str], Any] = getattr
+    ):
+        self.get = get
+        # list of (key, search_value, operator) used by the indexes
+        self.criteria: List[Tuple[str, Any, str]] = []
+        # list of (accessor of the key, predicate on its value)
+        self._predicates: List[Tuple[Callable[[Any], Any], Callable[[Any], bool]]] = []
+
+        criteria_keys = tuple(k for k, v in criteria.items() if v is not None)
+        for criteria_key, key, operator in _compile_plan(criteria_keys):
+            search_value = criteria[criteria_key]
+            if split_operator(operator)[1] in LIST_OPERATORS:
+                search_value = normalize_to_list(search_value)
+            self.criteria.append((key, search_value, operator))
+            self._predicates.append(
+                (make_accessor(key, get), bind_predicate(operator, search_value))
+            )
+
+    def __call__(self, item: Any) -> bool:
+        for accessor, predicate in self._predicates:
+            if not predicate(accessor(item)):
+                return False
+        return True
+
+    def filter(self, iterable: Iterable[Any]) -> Iterable[Any]:
+        """Yield the elements of iterable matching the query"""
+        return filter(self, iterable)
+
+    def __repr__(self) -> str:
+        str_criteria = ", ".join(
+            f"{key}__{operator}={value!r}" for key, value, operator in self.criteria
+        )
+        return f"{self.__class__.__name__}({str_criteria})"
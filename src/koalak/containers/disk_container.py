@@ -0,0 +1,239 @@
+import io
+import json
+import mmap
+import os
+from array import array
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from .generic_container import DictContainer
+
+Record = Dict[str, Any]
+
+
+def _encode_json(record: Record) -> bytes:
+    # json escapes the newlines of strings, a record is always one line
+    return json.dumps(record, separators=(",", ":")).encode()
+
+
+def _decode_json(raw: bytes) -> Record:
+    return json.loads(raw)
+
+
+class RecordFile(Sequence):
+    """Append-only file of records with an index of their offsets.
+
+    Records are stored one per line (JSON lines by default) and read through a
+    memory map: only the offsets (8 bytes per record) are kept in memory, records
+    are decoded each time they are accessed.
+
+    The offsets are saved in `<path>.idx` by `flush` and `close`. If this file is
+    missing or does not match the record file, they are rebuilt with one scan.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        encode: Callable[[Record], bytes] = _encode_json,
+        decode: Callable[[bytes], Record] = _decode_json,
+    ):
+        self.path = os.fspath(path)
+        self.index_path = self.path + ".idx"
+        self.encode = encode
+        self.decode = decode
+        self._file = open(self.path, "a+b")
+        self._mmap: Optional[mmap.mmap] = None
+        # offsets of the records followed by the offset of the end of the file
+        self._offsets = array("Q")
+        self._load_offsets()
+
+    def append(self, record: Record) -> None:
+        raw = self.encode(record)
+        if b"\n" in raw:
+            raise ValueError("Encoded records can not contain a newline")
+        self._file.write(raw + b"\n")
+        self._offsets.append(self._offsets[-1] + len(raw) + 1)
+
+    def extend(self, records: Iterable[Record]) -> None:
+        for record in records:
+            self.append(record)
+
+    def flush(self) -> None:
+        """Write the pending records and save the offsets"""
+        self._file.flush()
+        with open(self.index_path, "wb") as index_file:
+            self._offsets.tofile(index_file)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def __getitem__(self, position: int) -> Record:
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        length = len(self)
+        if position < 0:
+            position += length
+        if not 0 <= position < length:
+            raise IndexError("RecordFile index out of range")
+        offsets = self._offsets
+        start, stop = offsets[position], offsets[position + 1]
+        return self.decode(self._get_mmap(stop)[start : stop - 1])
+
+    def __iter__(self) -> Iterator[Record]:
+        offsets = self._offsets
+        length = len(self)
+        if not length:
+            return
+        mapped = self._get_mmap(offsets[length])
+        decode = self.decode
+        for position in range(length):
+            yield decode(mapped[offsets[position] : offsets[position + 1] - 1])
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.path!r})"
+
+    def _get_mmap(self, end: int) -> mmap.mmap:
+        """Return a memory map of the file covering at least `end` bytes"""
+        if self._mmap is None or len(self._mmap) < end:
+            self._file.flush()
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _load_offsets(self) -> None:
+        size = os.fstat(self._file.fileno()).st_size
+        offsets = array("Q")
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as index_file:
+                offsets.frombytes(index_file.read())
+        if offsets and offsets[0] == 0 and offsets[-1] == size:
+            self._offsets = offsets
+            return
+
+        # missing or outdated offsets, rebuild them from the newlines
+        offsets = array("Q", [0])
+        if size:
+            mapped = self._get_mmap(size)
+            position = mapped.find(b"\n")
+            while position != -1:
+                offsets.append(position + 1)
+                position = mapped.find(b"\n", position + 1)
+            if offsets[-1] != size:
+                raise ValueError(f"Truncated record at the end of {self.path!r}")
+        self._offsets = offsets
+
+
+class DiskContainer(DictContainer):
+    """Container of dict records stored on disk in a RecordFile.
+
+    Records are decoded lazily when they are accessed, so datasets larger than
+    the memory can be queried with the Container API (search, first, count,
+    groupby, indexes, ...). Only the indexes are kept in memory.
+
+    The file is append-only: add and extend are supported but methods modifying
+    or removing the existing records raise io.UnsupportedOperation. The file is
+    already persistent, save and load (snapshots) are not supported either.
+
+    Example:
+        >>> with DiskContainer("hosts.jsonl") as hosts:
+        ...     hosts.add({"ip": "10.0.0.1", "port": 22})
+        ...     hosts.count(port=22)
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        data: Iterable[Record] = None,
+        name: str = None,
+        encode: Callable[[Record], bytes] = _encode_json,
+        decode: Callable[[bytes], Record] = _decode_json,
+    ):
+        super().__init__(
+            RecordFile(path, encode=encode, decode=decode), copy=False, name=name
+        )
+        if data is not None:
+            self.extend(data)
+
+    @property
+    def path(self) -> str:
+        return self._data.path
+
+    def flush(self) -> None:
+        self._data.flush()
+
+    def close(self) -> None:
+        self._data.close()
+
+    # Existing records can not be modified in an append-only file
+    def update_first(self, *args, **kwargs):
+        raise io.UnsupportedOperation("DiskContainer is append-only")
+
+    def update(self, *args, **kwargs):
+        raise io.UnsupportedOperation("DiskContainer is append-only")
+
+    def delete_first(self, *args, **kwargs):
+        raise io.UnsupportedOperation("DiskContainer is append-only")
+
+    def delete_many(self, *args, **kwargs):
+        raise io.UnsupportedOperation("DiskContainer is append-only")
+
+    def pop_where(self, *args, **kwargs):
+        raise io.UnsupportedOperation("DiskContainer is append-only")
+
+    def clear(self):
+        raise io.UnsupportedOperation("DiskContainer is append-only")
+
+    def sort(self, *args, **kwargs):
+        raise io.UnsupportedOperation("DiskContainer is append-only")
+
+    # The records are already stored in the file: flush it and open it again
+    def save(self, *args, **kwargs):
+        raise io.UnsupportedOperation(
+            "DiskContainer can not be saved to a snapshot, flush it instead"
+        )
+
+    @classmethod
+    def load(cls, *args, **kwargs):
+        raise io.UnsupportedOperation(
+            "DiskContainer can not be loaded from a snapshot, open its file instead"
+        )
+
+    def __enter__(self) -> "DiskContainer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __str__(self) -> str:
+        return f"{DiskContainer.__name__}({self.path!r})"
+
+    def _materialize_data(self) -> None:
+        # the record file supports random access, never load it in memory
+        pass
+
+    def _new_result_container(self, data: List[Record]) -> DictContainer:
+        # results are computed in memory, they are not written to another file
+        return DictContainer(data, copy=False)
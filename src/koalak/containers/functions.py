@@ -1,7 +1,78 @@
+import builtins
+import heapq
 import itertools
-from typing import Any, Iterable
+from operator import getitem
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .generic_container import Container, ContainerKey, DictContainer, T
+from .accessors import make_accessor, make_multi_accessor
+from .aggregations import (
+    Accumulator,
+    AggregationSpec,
+    Aggregator,
+    MeanAccumulator,
+    QuantileAccumulator,
+    StdAccumulator,
+    VarianceAccumulator,
+    statistic_result,
+)
+from .compiled_query import CompiledQuery
+from .generic_container import (
+    Container,
+    ContainerKey,
+    DictContainer,
+    T,
+    iter_unique,
+)
+from .sketches import check_quantile
+
+# The helpers below work directly on the iterables: the accessors are chosen once
+# from the first item (getitem for dicts, getattr otherwise, see make_accessor) and
+# the items are never wrapped in a Container. Containers use their own methods (indexes).
+
+_EMPTY = object()
+
+
+def _peek(iterable: Iterable[T]) -> Tuple[Any, Iterator[T]]:
+    """Return (first item or _EMPTY, iterator over all the items)"""
+    if isinstance(iterable, (list, tuple)):
+        return (iterable[0] if iterable else _EMPTY), iter(iterable)
+    iterator = iter(iterable)
+    first_item = next(iterator, _EMPTY)
+    if first_item is _EMPTY:
+        return _EMPTY, iterator
+    return first_item, itertools.chain([first_item], iterator)
+
+
+def _identity(item: Any) -> Any:
+    return item
+
+
+def _get_key_func(first_item: Any, key: ContainerKey) -> Callable[[Any], Any]:
+    if key is None:
+        return None
+    get = getitem if isinstance(first_item, dict) else getattr
+    if isinstance(key, str):
+        return make_accessor(key, get)
+    elif isinstance(key, (list, tuple)):
+        return make_multi_accessor(list(key), get)
+    elif callable(key):
+        return key
+    else:
+        raise TypeError("Invalid type for 'key'")
+
+
+def _compile(
+    first_item: Any, pos_criteria: Dict, criteria: Dict, get=None
+) -> CompiledQuery:
+    if pos_criteria is not None and criteria:
+        raise ValueError("Cannot use both positional criteria and keyword criteria")
+    if pos_criteria is not None:
+        criteria = pos_criteria
+    if isinstance(criteria, CompiledQuery):
+        return criteria
+    if get is None:
+        get = getitem if isinstance(first_item, dict) else getattr
+    return CompiledQuery(criteria, get)
 
 
 def _get_appropriate_container(iterable) -> Container:
@@ -20,40 +91,263 @@ def _get_appropriate_container(iterable) -> Container:
     return container(iterable, copy=False)
 
 
-def first(iterable: Iterable[T], *args, **kwargs) -> T:
-    container = _get_appropriate_container(iterable)
-    return container.first(*args, **kwargs)
+def first(iterable: Iterable[T], pos_criteria: Dict = None, **criteria) -> T:
+    if isinstance(iterable, Container):
+        return iterable.first(pos_criteria, **criteria)
+    first_item, iterator = _peek(iterable)
+    if first_item is _EMPTY:
+        raise ValueError("No match found")
+    query = _compile(first_item, pos_criteria, criteria)
+    if query.criteria:
+        iterator = filter(query, iterator)
+    for item in iterator:
+        return item
+    raise ValueError("No match found")
 
 
-def search(iterable: Iterable[T], *args, key=None, **kwargs):
-    if key:
-        container = Container(iterable)
-        container.get = key
-    else:
+def search(iterable: Iterable[T], pos_criteria: Dict = None, *, key=None, **criteria):
+    """Lazily yield the items matching the criteria, see Container.search
+
+    Args:
+        key: Function used to get the value of a field of an item (item, field),
+            default to getitem for dicts and getattr for other objects.
+    """
+    if isinstance(iterable, Container) and key is None:
+        return iterable.search(pos_criteria, **criteria)
+    if "search" in criteria or "searchable_fields" in criteria:
+        # the free-text search is implemented by the containers
         container = _get_appropriate_container(iterable)
-    return container.search(*args, **kwargs)
+        if key:
+            container.get = key
+        return container.search(pos_criteria, **criteria)
+
+    first_item, iterator = _peek(iterable)
+    if first_item is _EMPTY:
+        return iter(())
+    query = _compile(first_item, pos_criteria, criteria, get=key)
+    return filter(query, iterator)
+
+
+def min(iterable: Iterable[T], key: ContainerKey = None) -> T:
+    if isinstance(iterable, Container):
+        return iterable.min(key)
+    first_item, iterator = _peek(iterable)
+    if first_item is _EMPTY:
+        raise ValueError("min() arg is an empty sequence")
+    return builtins.min(iterator, key=_get_key_func(first_item, key))
+
+
+def max(iterable: Iterable[T], key: ContainerKey = None) -> T:
+    if isinstance(iterable, Container):
+        return iterable.max(key)
+    first_item, iterator = _peek(iterable)
+    if first_item is _EMPTY:
+        raise ValueError("max() arg is an empty sequence")
+    return builtins.max(iterator, key=_get_key_func(first_item, key))
+
+
+def nlargest(iterable: Iterable[T], n: int, key: ContainerKey = None) -> List[T]:
+    """Return the n items with the largest values of key, see Container.top"""
+    if isinstance(iterable, Container):
+        return iterable.top(n, key, reverse=True)
+    first_item, iterator = _peek(iterable)
+    if first_item is _EMPTY:
+        return []
+    return heapq.nlargest(n, iterator, key=_get_key_func(first_item, key))
+
+
+def nsmallest(iterable: Iterable[T], n: int, key: ContainerKey = None) -> List[T]:
+    """Return the n items with the smallest values of key, see Container.top"""
+    if isinstance(iterable, Container):
+        return iterable.top(n, key, reverse=False)
+    first_item, iterator = _peek(iterable)
+    if first_item is _EMPTY:
+        return []
+    return heapq.nsmallest(n, iterator, key=_get_key_func(first_item, key))
+
+
+def sum(
+    iterable: Iterable[T], key: ContainerKey, pos_criteria: Dict = None, **criteria
+) -> Any:
+    if isinstance(iterable, Container):
+        return iterable.sum(key, pos_criteria, **criteria)
+    first_item, iterator = _peek(iterable)
+    if first_item is _EMPTY:
+        return 0
+    query = _compile(first_item, pos_criteria, criteria)
+    if query.criteria:
+        iterator = filter(query, iterator)
+    key_func = _get_key_func(first_item, key)
+    if key_func is not None:
+        iterator = map(key_func, iterator)
+    return builtins.sum(iterator)
+
+
+def count(iterable: Iterable[T], pos_criteria: Dict = None, **criteria) -> int:
+    if isinstance(iterable, Container):
+        return iterable.count(pos_criteria, **criteria)
+    if pos_criteria is None and not criteria and hasattr(iterable, "__len__"):
+        return len(iterable)
+    first_item, iterator = _peek(iterable)
+    if first_item is _EMPTY:
+        return 0
+    query = _compile(first_item, pos_criteria, criteria)
+    if query.criteria:
+        iterator = filter(query, iterator)
+    count = 0
+    for _ in iterator:
+        count += 1
+    return count
+
+
+def reduce(iterable: Iterable[T], **aggregations: AggregationSpec) -> Dict[str, Any]:
+    """
+    Compute several named aggregates in a single pass over the items.
+
+    Args:
+        **aggregations: name -> "count" or (key, function) where function is one
+            of "count", "sum", "min", "max", "mean", "var", "std", "median",
+            "first", "last".
+
+    Example:
+        >>> reduce(findings, n="count", total=("size", "sum"), worst=("score", "max"))
+        {"n": 12, "total": 1337, "worst": 9.8}
+    """
+    first_item, iterator = _peek(iterable)
+    aggregator = Aggregator(aggregations, lambda key: _get_key_func(first_item, key))
+    state = aggregator.new_state()
+    if first_item is not _EMPTY:
+        for item in iterator:
+            aggregator.add(state, item)
+    return aggregator.result(state)
+
+
+def count_values(iterable: Iterable[T], key: ContainerKey) -> Dict[Any, int]:
+    if isinstance(iterable, Container):
+        return iterable.count_values(key)
+    first_item, iterator = _peek(iterable)
+    if first_item is _EMPTY:
+        return {}
+    key_func = _get_key_func(first_item, key)
+    if key_func is not None:
+        iterator = map(key_func, iterator)
+    result = {}
+    for value in iterator:
+        result[value] = result.get(value, 0) + 1
+    return result
+
+
+def mean(
+    iterable: Iterable[T], key: ContainerKey, pos_criteria: Dict = None, **criteria
+) -> float:
+    if isinstance(iterable, Container):
+        return iterable.mean(key, pos_criteria, **criteria)
+    return _accumulate(iterable, MeanAccumulator(), key, pos_criteria, criteria)
+
+
+def var(
+    iterable: Iterable[T],
+    key: ContainerKey,
+    pos_criteria: Dict = None,
+    *,
+    ddof: int = 0,
+    **criteria,
+) -> float:
+    if isinstance(iterable, Container):
+        return iterable.var(key, pos_criteria, ddof=ddof, **criteria)
+    accumulator = VarianceAccumulator(ddof)
+    return _accumulate(iterable, accumulator, key, pos_criteria, criteria)
 
 
-def min(iterable: Iterable[T], *args, **kwargs) -> T:
-    container = _get_appropriate_container(iterable)
-    return container.min(*args, **kwargs)
+def std(
+    iterable: Iterable[T],
+    key: ContainerKey,
+    pos_criteria: Dict = None,
+    *,
+    ddof: int = 0,
+    **criteria,
+) -> float:
+    if isinstance(iterable, Container):
+        return iterable.std(key, pos_criteria, ddof=ddof, **criteria)
+    return _accumulate(iterable, StdAccumulator(ddof), key, pos_criteria, criteria)
 
 
-def max(iterable: Iterable[T], *args, **kwargs) -> T:
-    container = _get_appropriate_container(iterable)
-    return container.max(*args, **kwargs)
+def median(
+    iterable: Iterable[T],
+    key: ContainerKey,
+    pos_criteria: Dict = None,
+    *,
+    approximate: bool = False,
+    **criteria,
+) -> float:
+    return quantile(
+        iterable, key, 0.5, pos_criteria, approximate=approximate, **criteria
+    )
 
 
-def sum(iterable: Iterable[T], *args, **kwargs) -> Any:
-    container = _get_appropriate_container(iterable)
-    return container.sum(*args, **kwargs)
+def quantile(
+    iterable: Iterable[T],
+    key: ContainerKey,
+    q: float,
+    pos_criteria: Dict = None,
+    *,
+    approximate: bool = False,
+    **criteria,
+) -> float:
+    if isinstance(iterable, Container):
+        return iterable.quantile(
+            key, q, pos_criteria, approximate=approximate, **criteria
+        )
+    check_quantile(q)
+    accumulator = QuantileAccumulator(q, approximate=approximate)
+    return _accumulate(iterable, accumulator, key, pos_criteria, criteria)
 
 
-def count(iterable: Iterable[T], *args, **kwargs) -> int:
-    container = _get_appropriate_container(iterable)
-    return container.count(*args, **kwargs)
+def unique(
+    iterable: Iterable[T],
+    key: ContainerKey = None,
+    *,
+    approximate: bool = False,
+    capacity: int = None,
+    error_rate: float = 0.01,
+) -> Iterator[T]:
+    """Lazily yield the first item of each distinct value, see Container.unique"""
+    if isinstance(iterable, Container):
+        return iterable._iter_unique(
+            key, approximate=approximate, capacity=capacity, error_rate=error_rate
+        )
+    if capacity is None and hasattr(iterable, "__len__"):
+        capacity = len(iterable)
+    first_item, iterator = _peek(iterable)
+    if first_item is _EMPTY:
+        return iter(())
+    key_func = _get_key_func(first_item, key) or _identity
+    return iter_unique(
+        iterator,
+        key_func,
+        approximate=approximate,
+        capacity=capacity,
+        error_rate=error_rate,
+    )
 
 
-def count_values(iterable: Iterable[T], *args, **kwargs) -> int:
-    container = _get_appropriate_container(iterable)
-    return container.count_values(*args, **kwargs)
+def _accumulate(
+    iterable: Iterable[T],
+    accumulator: Accumulator,
+    key: ContainerKey,
+    pos_criteria: Optional[Dict],
+    criteria: Dict[str, Any],
+) -> Any:
+    """Feed accumulator with the values of key of the matching items, see
+    Container._accumulate"""
+    first_item, iterator = _peek(iterable)
+    if first_item is not _EMPTY:
+        query = _compile(first_item, pos_criteria, criteria)
+        if query.criteria:
+            iterator = filter(query, iterator)
+        key_func = _get_key_func(first_item, key)
+        if key_func is not None:
+            iterator = map(key_func, iterator)
+        for value in iterator:
+            accumulator.add(value)
+    return statistic_result(accumulator)
@@ -1,4 +1,8 @@
-import csv
+import builtins
+import heapq
+import io
+import os
+from copy import copy as builtin_copy
 from copy import deepcopy as builtin_deepcopy
 from operator import getitem, setitem
 from typing import (
@@ -7,39 +11,81 @@ from typing import (
     Dict,
     Generic,
     Iterable,
+    Iterator,
     List,
+    Mapping,
     Optional,
+    Set,
     Tuple,
     TypeVar,
     Union,
 )
 
+from koalak.descriptions import EntityDescription
+
+from . import parallel, readers, snapshots
+from .accessors import make_accessor, make_multi_accessor, path_root
+from .aggregations import (
+    Accumulator,
+    AggregationSpec,
+    Aggregator,
+    MaterializedAggregate,
+    MeanAccumulator,
+    QuantileAccumulator,
+    StdAccumulator,
+    VarianceAccumulator,
+    statistic_result,
+)
+from .compiled_query import CompiledQuery, normalize_to_list
+from .indexes import INDEX_KINDS, SortedIndex, TextIndex
+from .joins import JOIN_HOWS, hash_match
+from .query import Query
+from .sketches import BloomFilter, check_quantile
+from .utils import canonical_hashable
+
 ContainerKey = Union[str, List[str], Tuple[str], Callable[[Any], Any]]
 
 
 T = TypeVar("T")
 
+# Capacity of the Bloom filter of unique() when the number of items is unknown
+DEFAULT_BLOOM_FILTER_CAPACITY = 1_000_000
 
-def normalize_to_list(value: Any) -> list:
-    """
-    Converts a value to a list if it is not already a list.
 
-    Args:
-        value (any): The value to normalize to a list.
+def _identity(item: Any) -> Any:
+    return item
 
-    Returns:
-        list: The value as a list, or the value itself if it's already a list.
-    """
-    return [value] if not isinstance(value, list) else value
+
+def _get_item_or_attribute(obj: Any, key: str) -> Any:
+    if isinstance(obj, dict):
+        return obj[key]
+    return getattr(obj, key)
 
 
 class Container(Generic[T]):
     get = getattr
     set = setattr
+    # Minimum number of items to split a scan among worker processes
+    parallel_min_items = 10_000
 
     def __init__(
-        self, data: List[T] = None, copy: bool = None, deepcopy=None, name: str = None
+        self,
+        data: List[T] = None,
+        copy: bool = None,
+        deepcopy=None,
+        name: str = None,
+        executor: str = None,
+        workers: int = None,
     ):
+        """
+        Args:
+            executor: "serial" (default) or "process" to split the full scans of
+                count, sum, count_values, the statistics and groupby().agg among
+                `workers` processes. Criteria, keys and aggregations must be
+                picklable (not lambdas), otherwise the scan stays serial. search,
+                first, update and delete stay lazy and serial.
+            workers: Number of worker processes, default to the number of CPUs.
+        """
         if copy and deepcopy:
             raise ValueError("Can have only copy or deepcopy not both")
         if copy is None:
@@ -58,15 +104,33 @@ class Container(Generic[T]):
 
         self._data = data
         self.name = name
+        self._indexes = {}
+        self._text_index: Optional[TextIndex] = None
+        self._materialized: Dict[str, MaterializedAggregate] = {}
+        self._key_funcs: Dict[Any, Callable[[Any], Any]] = {}
+        self.executor, self.workers = parallel.check_executor(executor, workers)
+
+    @property
+    def data(self) -> List[T]:
+        return self._data
 
     # ================ #
     # MODIFIER METHODS #
     # ================ #
     def add(self, obj: T) -> None:
+        position = len(self._data)
         self._data.append(obj)
+        for index in self._iter_indexes():
+            index.add(position, obj)
+        for materialized in self._materialized.values():
+            materialized.add(obj)
 
     def extend(self, other: Iterable[T]) -> None:
-        self._data.extend(other)
+        if not self._indexes and self._text_index is None and not self._materialized:
+            self._data.extend(other)
+            return
+        for obj in other:
+            self.add(obj)
 
     def update_first(
         self, filter_query: Dict[str, Any], update_query: Dict[str, Any]
@@ -82,18 +146,16 @@ class Container(Generic[T]):
             None.
         """
 
-        for d in self.search(**filter_query):
-            for key, value in update_query.items():
-                self.set(d, key, value)
-            return d
+        for position in self._search_positions(filter_query):
+            return self._update_position(position, update_query)
         raise ValueError("Not found")
 
     def update(
         self, filter_query: Dict[str, Any], update_query: Dict[str, Any]
     ) -> None:
-        for d in self.search(**filter_query):
-            for key, value in update_query.items():
-                self.set(d, key, value)
+        # Materialize positions first, updating may change the index being read
+        for position in list(self._search_positions(filter_query)):
+            self._update_position(position, update_query)
 
     def delete_first(self, positional_criteria: dict = None, **criteria):
         """
@@ -112,28 +174,175 @@ class Container(Generic[T]):
             positional_criteria, **criteria
         )
 
-        for d in self.search(**criteria):
-            self._data.remove(d)
+        for position in self._search_positions(criteria):
+            item = self._data.pop(position)
+            self._remove_from_indexes({position: item})
+            for materialized in self._materialized.values():
+                materialized.remove(item)
             return
         raise ValueError("Not found")
 
-    def delete(self, positional_criteria: dict = None, **criteria):
+    def delete(self, positional_criteria: dict = None, **criteria) -> None:
+        """Delete all the items matching the criteria (all items if no criteria)"""
+        self.delete_many(positional_criteria, **criteria)
+
+    def delete_many(self, positional_criteria: dict = None, **criteria) -> List[T]:
+        """
+        Delete all the items matching the criteria in a single pass.
+
+        Returns:
+            list: The removed items, in their order in the container.
+        """
         criteria = self._normalize_positional_and_keyword_criteria(
             positional_criteria, **criteria
         )
+        self._materialize_data()
         if not criteria:
+            removed = self._data
             self._data = []
-            return
+            self._rebuild_indexes()
+            self._rebuild_materialized()
+            return removed
 
-        matched = list(self.search(**criteria))
-        # FIXME: not optimized at ALL!!!
-        self.data = [e for e in self if e not in matched]
+        positions = set(self._search_positions(criteria))
+        return self._remove_positions(positions)
+
+    def pop_where(self, predicate: Callable[[T], bool]) -> List[T]:
+        """
+        Delete the items for which predicate returns True.
+
+        Args:
+            predicate: A callable taking an item, for example a CompiledQuery.
+
+        Returns:
+            list: The removed items, in their order in the container.
+        """
+        self._materialize_data()
+        positions = {
+            position for position, item in enumerate(self._data) if predicate(item)
+        }
+        return self._remove_positions(positions)
 
     def clear(self) -> None:
         """
         Clears all items from the container.
         """
         self._data.clear()
+        self._rebuild_indexes()
+        self._rebuild_materialized()
+
+    # ======= #
+    # INDEXES #
+    # ======= #
+    def create_index(self, key: str, kind: str = None) -> None:
+        """
+        Create an index on a field to speed up the search methods.
+
+        Indexes are opt-in and kept up to date by the methods of the container
+        (add, extend, update, delete, ...). Items modified outside the container
+        require a call to `reindex`.
+
+        Args:
+            key: Name of the field to index.
+            kind: Kind of the index, "hash" (default) or "sorted". Hash indexes
+                serve the "default", "eq" and "in" operators. Sorted indexes also
+                serve "lt", "le", "gt" and "ge" and are used by min, max and sort.
+                A field has only one index, creating a new one replaces it.
+        """
+        if kind is None:
+            kind = "hash"
+        if not isinstance(key, str):
+            raise TypeError(f"Index key must be a str not {type(key).__name__!r}")
+        if kind not in INDEX_KINDS:
+            raise ValueError(
+                f"Unknown index kind {kind!r}, available kinds: {list(INDEX_KINDS)}"
+            )
+        self._materialize_data()
+        index = INDEX_KINDS[kind](key, self.get)
+        index.build(self._data)
+        self._indexes[key] = index
+
+    def create_text_index(self, searchable_fields: List[str] = None) -> None:
+        """
+        Create a trigram index used by the free-text `search=` parameter of search.
+
+        The searchable fields of each item are converted to lowercase strings once,
+        substring searches then only check the items containing all the trigrams of
+        the searched string.
+
+        Args:
+            searchable_fields: Fields to index. If None, the fields of the first item
+                are indexed and the index is used by searches without
+                `searchable_fields`.
+        """
+        self._materialize_data()
+        index = TextIndex(
+            self.get,
+            searchable_fields=searchable_fields,
+            get_searchable_fields=self._get_searchable_fields,
+        )
+        index.build(self._data)
+        self._text_index = index
+
+    def drop_text_index(self) -> None:
+        self._text_index = None
+
+    def drop_index(self, key: str) -> None:
+        """Remove the index created on `key`"""
+        del self._indexes[key]
+
+    def has_index(self, key: str) -> bool:
+        return key in self._indexes
+
+    def reindex(self) -> None:
+        """Rebuild all indexes and materialized aggregates, needed when items are
+        modified outside the container"""
+        self._rebuild_indexes()
+        self._rebuild_materialized()
+
+    # ======================= #
+    # MATERIALIZED AGGREGATES #
+    # ======================= #
+    def materialize(
+        self, name: str, aggregate_spec: AggregationSpec, by: ContainerKey = None
+    ) -> None:
+        """
+        Register an aggregate kept up to date by the methods of the container.
+
+        The aggregate is computed once, then add and extend update its running
+        state. Deleted items are removed from count, sum and mean aggregates,
+        other aggregates and updates of a key the aggregate depends on trigger a
+        recompute on the next read.
+
+        Args:
+            name: Name used to read the aggregate with `materialized`.
+            aggregate_spec: "count" or (key, function) where function is one of
+                "count", "sum", "min", "max", "mean", "var", "std", "median",
+                "first", "last".
+            by: If not None, compute the aggregate for each group of this key.
+
+        Example:
+            >>> container.materialize("open_by_os", "count", by="os")
+            >>> container.materialized("open_by_os")
+            {"linux": 12, "windows": 3}
+        """
+        self._materialize_data()
+        materialized = MaterializedAggregate(
+            name, aggregate_spec, self._get_key_func, by=by
+        )
+        materialized.rebuild(self._data)
+        self._materialized[name] = materialized
+
+    def materialized(self, name: str) -> Any:
+        """Return the current value of a materialized aggregate (a dict if grouped)"""
+        try:
+            materialized = self._materialized[name]
+        except KeyError:
+            raise KeyError(f"No materialized aggregate named {name!r}") from None
+        return materialized.result(self._data)
+
+    def drop_materialized(self, name: str) -> None:
+        del self._materialized[name]
 
     # ============= #
     # QUERY METHODS #
@@ -142,7 +351,7 @@ class Container(Generic[T]):
     def filter(self, **criteria):
         # FIXME: what's the difference between filter and search!
         data = []
-        for item in self.search(**criteria):
+        for item in self.search(criteria):
             data.append(item)
         return Container(data, copy=False)
 
@@ -150,7 +359,7 @@ class Container(Generic[T]):
         criteria = self._normalize_positional_and_keyword_criteria(
             pos_criteria, **criteria
         )
-        for item in self.search(**criteria):
+        for item in self.search(criteria):
             return item
         raise ValueError("No match found")
 
@@ -158,14 +367,23 @@ class Container(Generic[T]):
         criteria = self._normalize_positional_and_keyword_criteria(
             pos_criteria, **criteria
         )
-        if not criteria and isinstance(self._data, list):
+        if not criteria and hasattr(self._data, "__len__"):
             return len(self._data)
+        if self._scan_in_processes(criteria):
+            return sum(self._map_chunks(_count_chunk, criteria))
         count = 0
-        for _ in self.search(**criteria):
+        for _ in self.search(criteria):
             count += 1
         return count
 
     def count_values(self, key: ContainerKey):
+        if self._scan_in_processes(None, key):
+            result = {}
+            for partial_result in self._map_chunks(_count_values_chunk, key):
+                for value, count in partial_result.items():
+                    result[value] = result.get(value, 0) + count
+            return result
+
         key_func = self._get_key_func(key)
         result = {}
         for e in self:
@@ -180,7 +398,7 @@ class Container(Generic[T]):
         key_func = self._get_key_func(key)
         results = []
         seen = set()
-        for item in self.search(**criteria):
+        for item in self.search(criteria):
             value = key_func(item)
             if value not in seen:
                 results.append(value)
@@ -191,12 +409,69 @@ class Container(Generic[T]):
         criteria = self._normalize_positional_and_keyword_criteria(
             pos_criteria, **criteria
         )
+        if self._scan_in_processes(criteria, key):
+            return sum(self._map_chunks(_sum_chunk, key, criteria))
         key_func = self._get_key_func(key)
-        return sum(key_func(e) for e in self.search(**criteria))
+        return sum(key_func(e) for e in self.search(criteria))
+
+    def mean(self, key: ContainerKey, pos_criteria: Dict = None, **criteria) -> float:
+        """Returns the arithmetic mean of the values of key for the matching items"""
+        return self._accumulate(MeanAccumulator(), key, pos_criteria, criteria)
+
+    def var(
+        self, key: ContainerKey, pos_criteria: Dict = None, *, ddof: int = 0, **criteria
+    ) -> float:
+        """
+        Returns the variance of the values of key, computed in one pass (Welford).
+
+        Args:
+            key: A ContainerKey to determine the values.
+            ddof: Delta degrees of freedom, 0 for the population variance and 1
+                for the sample variance.
+        """
+        return self._accumulate(VarianceAccumulator(ddof), key, pos_criteria, criteria)
+
+    def std(
+        self, key: ContainerKey, pos_criteria: Dict = None, *, ddof: int = 0, **criteria
+    ) -> float:
+        """Returns the standard deviation of the values of key, see `var`"""
+        return self._accumulate(StdAccumulator(ddof), key, pos_criteria, criteria)
+
+    def median(
+        self,
+        key: ContainerKey,
+        pos_criteria: Dict = None,
+        *,
+        approximate: bool = False,
+        **criteria,
+    ) -> float:
+        """Returns the median of the values of key, see `quantile`"""
+        return self.quantile(
+            key, 0.5, pos_criteria, approximate=approximate, **criteria
+        )
 
-    def mean(self, key):
-        # TODO: implement me
-        pass
+    def quantile(
+        self,
+        key: ContainerKey,
+        q: float,
+        pos_criteria: Dict = None,
+        *,
+        approximate: bool = False,
+        **criteria,
+    ) -> float:
+        """
+        Returns the q-th quantile of the values of key.
+
+        Args:
+            key: A ContainerKey to determine the values.
+            q: Quantile to compute, between 0 and 1.
+            approximate: If False (default), the values are kept and sorted to
+                interpolate the exact quantile. If True, the quantile is estimated
+                in constant memory with the P² algorithm.
+        """
+        check_quantile(q)
+        accumulator = QuantileAccumulator(q, approximate=approximate)
+        return self._accumulate(accumulator, key, pos_criteria, criteria)
 
     def max(self, key: Optional[ContainerKey] = None) -> T:
         """
@@ -210,6 +485,9 @@ class Container(Generic[T]):
             The item with the maximum value.
         """
 
+        index = self._get_complete_sorted_index(key)
+        if index is not None:
+            return self._data[index.max_position()]
         key_func = self._get_key_func(key)
         return max(self._data, key=key_func)
 
@@ -224,9 +502,39 @@ class Container(Generic[T]):
         Returns:
             The item with the minimum value.
         """
+        index = self._get_complete_sorted_index(key)
+        if index is not None:
+            return self._data[index.min_position()]
         key_func = self._get_key_func(key)
         return min(self._data, key=key_func)
 
+    def top(
+        self, n: int, key: Optional[ContainerKey] = None, reverse: bool = True
+    ) -> List[T]:
+        """
+        Returns the first n items of the container sorted by key.
+
+        Equivalent to `sorted(container, key=key, reverse=reverse)[:n]` without
+        sorting all the items: a bounded heap keeps the n best items in
+        O(len * log n), and a sorted index on key is read directly.
+
+        Args:
+            n: Number of items to return.
+            key: A ContainerKey to determine the value used for comparison. If None,
+                 compares the items themselves.
+            reverse: If True (default), the items with the largest values come first.
+        """
+        if n <= 0:
+            return []
+        index = self._get_complete_sorted_index(key)
+        if index is not None:
+            data = self._data
+            return [data[i] for i in index.sorted_positions(reverse, limit=n)]
+        key_func = self._get_key_func(key)
+        if reverse:
+            return heapq.nlargest(n, self._data, key=key_func)
+        return heapq.nsmallest(n, self._data, key=key_func)
+
     def sort(self, key: Optional[ContainerKey] = None, reverse: bool = None) -> None:
         """
         Sorts the items in the container based on the provided key.
@@ -239,22 +547,58 @@ class Container(Generic[T]):
         """
         if reverse is None:
             reverse = False
-        key_func = self._get_key_func(key)
-        self._data.sort(key=key_func, reverse=reverse)
+        index = self._get_complete_sorted_index(key)
+        if index is not None:
+            data = self._data
+            self._data[:] = [data[i] for i in index.sorted_positions(reverse)]
+        else:
+            key_func = self._get_key_func(key)
+            self._data.sort(key=key_func, reverse=reverse)
+        self._rebuild_indexes()
+        for materialized in self._materialized.values():
+            materialized.on_reorder()
 
-    def groupby(self, key: ContainerKey) -> Iterable[Tuple[Any, "Container[T]"]]:
-        result = {}
-        key_func = self._get_key_func(key)
-        for item in self:
-            group_key = key_func(item)
-            if group_key not in result:
-                result[group_key] = Container(name=f"groupby[{key}={group_key}])")
-            result[group_key].add(item)
-        return result
+    def groupby(self, key: ContainerKey) -> "GroupBy[T]":
+        """
+        Group the items by key.
+
+        The groups are only built when the result is accessed as a mapping
+        (group key -> Container), `agg` computes aggregates without building them.
+
+        Example:
+            >>> container.groupby("status").agg(n="count", total=("size", "sum"))
+            {"open": {"n": 2, "total": 30}, "closed": {"n": 1, "total": 5}}
+        """
+        return GroupBy(self, key)
+
+    def query(self) -> "Query[T]":
+        """
+        Start a lazy query on the container.
+
+        Example:
+            >>> container.query().where(age__gt=18).order_by("age").limit(10)
+        """
+        return Query(self)
+
+    def compile_query(self, pos_criteria: Dict = None, **criteria) -> CompiledQuery:
+        """
+        Compile search criteria into a reusable predicate.
+
+        The returned query can be passed to the query methods (search, first,
+        count, ...) instead of the criteria to avoid parsing them on each call, or
+        called directly on items.
+
+        Returns:
+            CompiledQuery: A callable returning True if an item matches the criteria.
+        """
+        criteria = self._normalize_positional_and_keyword_criteria(
+            pos_criteria, **criteria
+        )
+        return CompiledQuery(criteria, self.get)
 
     def search(
         self,
-        pos_criteria: Dict = None,
+        pos_criteria: Union[Dict, CompiledQuery] = None,
         *,
         search=None,
         searchable_fields=None,
@@ -275,30 +619,91 @@ class Container(Generic[T]):
         criteria = self._normalize_positional_and_keyword_criteria(
             pos_criteria, **criteria
         )
-        # FIXME: search and searchable_fields not in criteria?
-        # Clean criteria
-        cleaned_criteria = []
-        for key, value in criteria.items():
-            if value is None:
-                continue
-            if "__" in key:
-                key, operator = key.split("__", maxsplit=1)
-            else:
-                operator = "default"
-            value = normalize_to_list(value)
-            cleaned_criteria.append((key, value, operator))
+        for _, item in self._search_enumerate(
+            criteria, search=search, searchable_fields=searchable_fields
+        ):
+            yield item
 
-        for item in self._data:
-            if search:
-                if searchable_fields is None:
-                    searchable_fields = self._get_searchable_fields(item)
-                if not self._search_all_fields(item, search, searchable_fields):
-                    continue
-            if all(
-                self._matches_criteria(item, key, search_value, operator)
-                for key, search_value, operator in cleaned_criteria
-            ):
-                yield item
+    def join(
+        self,
+        other: Iterable[Any],
+        on: ContainerKey,
+        how: str = None,
+        right_on: ContainerKey = None,
+    ) -> "Container":
+        """
+        Join the items of the container with the items of other having the same key.
+
+        A hash table is built on the smaller side and the larger side is streamed.
+        Results follow the order of the container, then the order of other.
+
+        Args:
+            other: Container or iterable to join with.
+            on: ContainerKey of the items of the container (and of other if
+                `right_on` is not given).
+            how: "inner" (default) keeps only the items having a match, "left"
+                also keeps the items without match (joined with None).
+            right_on: ContainerKey of the items of other.
+
+        Returns:
+            Container: A container of (item, other_item) tuples, DictContainer
+                returns the merged dicts instead.
+        """
+        if how is None:
+            how = "inner"
+        if how not in JOIN_HOWS:
+            raise ValueError(f"Invalid join type {how!r}, available types: {JOIN_HOWS}")
+        if right_on is None:
+            right_on = on
+
+        self._materialize_data()
+        matches = hash_match(
+            self._data,
+            self._get_key_func(on),
+            other,
+            self._get_other_key_func(other, right_on),
+        )
+        result = []
+        for item, right_items in zip(self._data, matches):
+            if right_items:
+                for right_item in right_items:
+                    result.append(self._merge_joined_items(item, right_item))
+            elif how == "left":
+                result.append(self._merge_joined_items(item, None))
+        return self._new_result_container(result)
+
+    def lookup(
+        self,
+        other: Iterable[Any],
+        local_key: ContainerKey,
+        foreign_key: ContainerKey,
+        as_: str,
+    ) -> "Container[T]":
+        """
+        Attach to each item the list of items of other with a matching key.
+
+        The items are shallow copied, the matching items of other are set in the
+        field `as_` of the copies (an empty list if there is no match).
+
+        Args:
+            other: Container or iterable to look up.
+            local_key: ContainerKey of the items of the container.
+            foreign_key: ContainerKey of the items of other.
+            as_: Name of the field receiving the matching items.
+        """
+        self._materialize_data()
+        matches = hash_match(
+            self._data,
+            self._get_key_func(local_key),
+            other,
+            self._get_other_key_func(other, foreign_key),
+        )
+        result = []
+        for item, foreign_items in zip(self._data, matches):
+            item = builtin_copy(item)
+            self.set(item, as_, foreign_items)
+            result.append(item)
+        return self._new_result_container(result)
 
     def print(self):
         for e in self:
@@ -317,28 +722,219 @@ class Container(Generic[T]):
                     entry[field] = e[field]
             if entry:
                 data.append(entry)
-        return self.__class__(data)
+        return self._new_result_container(data)
 
-    def unique(self):
-        # FIXME: works only with dicts
-        seen = set()
-        result = []
-        for d in self:
-            d_tuple = tuple(sorted(d.items()))
-            if d_tuple in seen:
-                continue
-            seen.add(d_tuple)
-            result.append(d)
-        return self.__class__(result)
+    def unique(
+        self,
+        key: Optional[ContainerKey] = None,
+        *,
+        approximate: bool = False,
+        capacity: int = None,
+        error_rate: float = 0.01,
+    ) -> "Container[T]":
+        """
+        Returns a container keeping the first item of each distinct value.
+
+        Values are compared through a canonical hashable form, so dicts, lists,
+        nested values and attrs instances are supported.
+
+        Args:
+            key: A ContainerKey to determine the compared value. If None, the
+                items themselves are compared.
+            approximate: If True, use a Bloom filter of fixed size instead of a
+                set of the seen values. A small fraction (`error_rate`) of distinct
+                items may be dropped as false duplicates.
+            capacity: Expected number of distinct values for the Bloom filter,
+                default to the number of items.
+            error_rate: False positive rate of the Bloom filter.
+        """
+        return self._new_result_container(
+            list(
+                self._iter_unique(
+                    key,
+                    approximate=approximate,
+                    capacity=capacity,
+                    error_rate=error_rate,
+                )
+            )
+        )
+
+    def to_columns(self, fields: List[str] = None) -> "ColumnarContainer":
+        """
+        Convert the container to a ColumnarContainer storing each field in a typed column.
+
+        Args:
+            fields: Fields to convert, default to the fields of the first item.
+        """
+        from .columnar_container import ColumnarContainer
+
+        if fields is None:
+            fields = []
+            for item in self:
+                fields = self._get_searchable_fields(item)
+                break
+        return ColumnarContainer.from_items(self, fields, self.get, name=self.name)
+
+    # =========== #
+    # PERSISTENCE #
+    # =========== #
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """
+        Write the items, the indexes and the materialized aggregates specs to a
+        snapshot file (pickle protocol 5), see `load`.
+
+        Items and custom key functions must be picklable. Containers whose data
+        is not a list after _materialize_data (ex: a file kept open by a subclass)
+        raise io.UnsupportedOperation.
+        """
+        self._materialize_data()
+        if not isinstance(self._data, list):
+            raise io.UnsupportedOperation(
+                f"{type(self).__name__} wrapping a {type(self._data).__name__!r} "
+                "can not be saved to a snapshot"
+            )
+        state = {
+            "class": type(self),
+            "name": self.name,
+            "data": self._data,
+            "indexes": self._indexes,
+            "text_index": self._text_index,
+            "materialized": [
+                (materialized.name, materialized.spec, materialized.by)
+                for materialized in self._materialized.values()
+            ],
+        }
+        snapshots.dump(state, path)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike], mmap: bool = False) -> "Container":
+        """
+        Read a container written by `save`, with its indexes already built.
+
+        Only the specs of the materialized aggregates are saved, they are computed
+        again with one scan of the items.
+
+        The returned container has the class of the saved one, which must be `cls`
+        or one of its subclasses. `mmap` memory-maps the file instead of reading
+        it, see snapshots.load.
+
+        Warning:
+            Snapshots are pickles, loading a file can execute arbitrary code. Only
+            load files from a trusted source.
+        """
+        state = snapshots.load(path, mmap_mode=mmap)
+        container_cls = state["class"]
+        if not issubclass(container_cls, cls):
+            raise TypeError(
+                f"Snapshot contains a {container_cls.__name__!r} not a {cls.__name__!r}"
+            )
+        container = container_cls(state["data"], copy=False, name=state["name"])
+        container._indexes = state["indexes"]
+        text_index = state["text_index"]
+        if text_index is not None:
+            text_index._get_searchable_fields = container._get_searchable_fields
+        container._text_index = text_index
+        for name, spec, by in state["materialized"]:
+            container.materialize(name, spec, by=by)
+        return container
 
     # ============= #
     # CLASS METHODS #
     # ============= #
     @classmethod
-    def from_csv(cls, filepath):
-        with open(filepath) as file:
-            reader = csv.DictReader(file)
-            return cls(list(reader))
+    def from_csv(
+        cls,
+        filepath: str,
+        *,
+        stream: bool = False,
+        schema: EntityDescription = None,
+        indexes: Union[List[str], Dict[str, str]] = None,
+        chunk_size: int = 10_000,
+        name: str = None,
+    ) -> "Container":
+        """
+        Load the rows of a CSV file as dicts.
+
+        Args:
+            stream: If True, rows are parsed and added by chunks of `chunk_size`
+                rows and the indexes are filled while loading.
+            schema: Convert the values of each column with the type of the field
+                of the same name (see readers.get_field_converter), the
+                converters are built once.
+            indexes: Keys to index (list) or key -> index kind (dict). The fields
+                of the schema marked `indexed` are also indexed.
+        """
+        records = readers.iter_csv(filepath, schema)
+        return cls._from_records(records, stream, schema, indexes, chunk_size, name)
+
+    @classmethod
+    def from_jsonl(
+        cls,
+        filepath: str,
+        *,
+        stream: bool = False,
+        schema: EntityDescription = None,
+        indexes: Union[List[str], Dict[str, str]] = None,
+        chunk_size: int = 10_000,
+        name: str = None,
+    ) -> "Container":
+        """Load the records of a JSON lines file, see from_csv for the arguments"""
+        records = readers.iter_jsonl(filepath, schema)
+        return cls._from_records(records, stream, schema, indexes, chunk_size, name)
+
+    @classmethod
+    def iter_csv(cls, filepath: str, schema: EntityDescription = None) -> Iterator:
+        """
+        Lazily yield the rows of a CSV file, without holding the file in memory.
+
+        Example:
+            >>> functions.sum(Container.iter_csv("scans.csv", schema), "size", status="open")
+        """
+        return readers.iter_csv(filepath, schema)
+
+    @classmethod
+    def iter_jsonl(cls, filepath: str, schema: EntityDescription = None) -> Iterator:
+        """Lazily yield the records of a JSON lines file"""
+        return readers.iter_jsonl(filepath, schema)
+
+    @classmethod
+    def _from_records(
+        cls,
+        records: Iterable[Any],
+        stream: bool,
+        schema: Optional[EntityDescription],
+        indexes: Union[List[str], Dict[str, str], None],
+        chunk_size: int,
+        name: Optional[str],
+    ) -> "Container":
+        if indexes is None:
+            indexes = {}
+        elif not isinstance(indexes, dict):
+            indexes = dict.fromkeys(indexes)
+        if schema is not None:
+            for field in schema:
+                if field.indexed:
+                    indexes.setdefault(field.name, None)
+
+        if not stream:
+            container = cls(list(records), copy=False, name=name)
+            for key, kind in indexes.items():
+                container.create_index(key, kind)
+            return container
+
+        container = cls(name=name)
+        # sorted indexes are faster to build with one sort than row by row
+        sorted_indexes = {}
+        for key, kind in indexes.items():
+            if kind == SortedIndex.kind:
+                sorted_indexes[key] = kind
+            else:
+                container.create_index(key, kind)
+        for chunk in readers.iter_chunks(records, chunk_size):
+            container.extend(chunk)
+        for key, kind in sorted_indexes.items():
+            container.create_index(key, kind)
+        return container
 
     # ============== #
     # DUNDER METHODS #
@@ -371,66 +967,289 @@ class Container(Generic[T]):
     # PRIVATE METHODS #
     # =============== #
     def _get_key_func(self, key: Optional[ContainerKey]) -> Callable[[Any], Any]:
+        """Return the accessor of key, built once per key (see accessors.make_accessor)
+
+        Keys can be dotted paths with list indexes ("owner.name", "tags[0]").
+        """
         if key is None:
-            return lambda x: x
-        elif isinstance(key, str):
-            return lambda item: self.get(item, key)
-        elif isinstance(key, (list, tuple)):
-            return lambda item: tuple(self.get(item, k) for k in key)
-        elif callable(key):
+            return _identity
+        elif callable(key) and not isinstance(key, str):
             return key
-        else:
+        elif not isinstance(key, (str, list, tuple)):
             raise TypeError("Invalid type for 'key' in groupby")
 
-    def _matches_criteria(
-        self, item: object, key: str, search_value: any, operator: str
-    ) -> bool:
-        """
-        Checks if an object's attribute matches the specified criteria based on an operator.
+        # The getter is part of the cache key, it can be replaced on an instance
+        cache_key = (self.get, key if isinstance(key, str) else tuple(key))
+        key_func = self._key_funcs.get(cache_key)
+        if key_func is None:
+            if isinstance(key, str):
+                key_func = make_accessor(key, self.get)
+            else:
+                key_func = make_multi_accessor(list(key), self.get)
+            self._key_funcs[cache_key] = key_func
+        return key_func
 
-        Args:
-            item (object): The object to check.
-            key (str): The attribute key to check on the object.
-            value (any): The value to compare against the object's attribute.
-            operator (str): The operator defining how to compare the value with the object's attribute.
+    def _accumulate(
+        self,
+        accumulator: Accumulator,
+        key: ContainerKey,
+        pos_criteria: Optional[Dict],
+        criteria: Dict[str, Any],
+    ) -> Any:
+        criteria = self._normalize_positional_and_keyword_criteria(
+            pos_criteria, **criteria
+        )
+        if accumulator.mergeable and self._scan_in_processes(
+            criteria, key, accumulator
+        ):
+            for partial_accumulator in self._map_chunks(
+                _accumulate_chunk, accumulator, key, criteria
+            ):
+                accumulator.merge(partial_accumulator)
+        else:
+            key_func = self._get_key_func(key)
+            for item in self.search(criteria):
+                accumulator.add(key_func(item))
+        return statistic_result(accumulator)
+
+    def _compile_criteria(
+        self, criteria: Union[Dict[str, Any], CompiledQuery]
+    ) -> CompiledQuery:
+        if isinstance(criteria, CompiledQuery):
+            return criteria
+        return CompiledQuery(criteria, self.get)
+
+    def _candidate_positions(
+        self, cleaned_criteria: List[Tuple[str, Any, str]]
+    ) -> Optional[List[int]]:
+        """Return the sorted candidate positions using the indexes or None for a full scan"""
+        criteria_by_index = {}
+        for key, search_value, operator in cleaned_criteria:
+            if key in self._indexes:
+                criteria_by_index.setdefault(key, []).append((operator, search_value))
+
+        candidates = None
+        for key, index_criteria in criteria_by_index.items():
+            positions = self._indexes[key].lookup(index_criteria)
+            if positions is None:
+                continue
+            if candidates is None:
+                candidates = positions
+            else:
+                candidates = candidates & positions
+            if not candidates:
+                break
+        if candidates is None:
+            return None
+        return sorted(candidates)
+
+    def _search_positions(
+        self, criteria: Union[Dict[str, Any], CompiledQuery]
+    ) -> Iterable[int]:
+        """Yield the positions of the items matching the criteria"""
+        for position, _ in self._search_enumerate(criteria):
+            yield position
+
+    def _search_enumerate(
+        self,
+        criteria: Union[Dict[str, Any], CompiledQuery],
+        search=None,
+        searchable_fields=None,
+    ) -> Iterable[Tuple[int, T]]:
+        """Yield the couples (position, item) of the items matching the criteria"""
+        # FIXME: search and searchable_fields not in criteria?
+        query = self._compile_criteria(criteria)
+        data = self._data
+        positions = self._candidate_positions(query.criteria)
+        text_index = self._get_text_index(searchable_fields) if search else None
+        # Without searchable_fields, search in the fields of the first item
+        if search and searchable_fields is None and isinstance(data, list) and data:
+            searchable_fields = self._get_searchable_fields(data[0])
+        # Positions to check against search, None to check all of them
+        search_positions = None
+        if text_index is not None:
+            if (
+                text_index.searchable_fields is None
+                and text_index.fields != searchable_fields
+            ):
+                # the first item changed since the index was built
+                text_index.build(data)
+            text_positions = text_index.lookup(search)
+            if positions is not None:
+                positions_set = set(positions)
+                text_positions = [p for p in text_positions if p in positions_set]
+            positions = text_positions
+            # the text index returns exact matches, except for unindexed items
+            search_positions = text_index.unindexed_positions()
+
+        if positions is None:
+            # _data is not always a list (ex: generators wrapped without copy)
+            items = enumerate(data)
+        else:
+            items = ((position, data[position]) for position in positions)
 
-        Returns:
-            bool: True if the object's attribute matches the criteria, False otherwise.
+        for position, item in items:
+            if search and (search_positions is None or position in search_positions):
+                if searchable_fields is None:
+                    searchable_fields = self._get_searchable_fields(item)
+                if not self._search_all_fields(item, search, searchable_fields):
+                    continue
+            if query(item):
+                yield position, item
+
+    def _scan_in_processes(self, criteria: Optional[Dict], *arguments: Any) -> bool:
+        """True if a full scan should be split among worker processes
+
+        Only aggregations reading every item use processes. Indexed scans, small
+        containers and arguments that can not be sent to a worker process (ex:
+        lambdas, compiled queries) stay serial.
         """
-        item_value = self.get(item, key)
-        # debug(item, key, search_value, operator, item_value)
-        if operator == "default":
-            if isinstance(item_value, list):
-                return any(v in item_value for v in search_value)
-            else:
-                return any(v == item_value for v in search_value)
-        elif operator == "not":
-            if isinstance(item_value, list):
-                return all(v not in item_value for v in search_value)
+        if self.executor != "process" or self.workers < 2:
+            return False
+        data = self._data
+        if not isinstance(data, list) or len(data) < self.parallel_min_items:
+            return False
+        if criteria:
+            query = self._compile_criteria(criteria)
+            if self._candidate_positions(query.criteria) is not None:
+                return False
+        return parallel.is_picklable(type(self), criteria, *arguments)
+
+    def _map_chunks(self, function: Callable[..., Any], *args: Any) -> List[Any]:
+        """Run function on chunks of _data in worker processes"""
+        data = self._data
+        return parallel.map_chunks(
+            function,
+            data,
+            len(data),
+            self.workers,
+            (type(self),) + args,
+            take=_take_chunk,
+        )
+
+    def _update_position(self, position: int, update_query: Dict[str, Any]) -> T:
+        item = self._data[position]
+        indexes = [
+            index
+            for key, index in self._indexes.items()
+            if key in update_query or path_root(key) in update_query
+        ]
+        if self._text_index is not None:
+            indexes.append(self._text_index)
+        for index in indexes:
+            index.remove(position, item)
+        for key, value in update_query.items():
+            self.set(item, key, value)
+        for index in indexes:
+            index.add(position, item)
+        for materialized in self._materialized.values():
+            materialized.on_update(update_query)
+        return item
+
+    def _get_complete_sorted_index(
+        self, key: Optional[ContainerKey]
+    ) -> Optional[SortedIndex]:
+        """Return the sorted index of key if it can replace a full scan"""
+        if not isinstance(key, str):
+            return None
+        index = self._indexes.get(key)
+        if not isinstance(index, SortedIndex) or not index.is_complete():
+            return None
+        if not len(index):
+            # let the builtins raise their error on empty containers
+            return None
+        return index
+
+    def _iter_indexes(self):
+        yield from self._indexes.values()
+        if self._text_index is not None:
+            yield self._text_index
+
+    def _get_text_index(self, searchable_fields) -> Optional[TextIndex]:
+        """Return the text index if it indexes the same fields as the search"""
+        text_index = self._text_index
+        if text_index is None:
+            return None
+        if searchable_fields is None and text_index.searchable_fields is None:
+            return text_index
+        if (
+            searchable_fields is not None
+            and text_index.searchable_fields is not None
+            and list(searchable_fields) == list(text_index.searchable_fields)
+        ):
+            return text_index
+        return None
+
+    def _get_other_key_func(
+        self, other: Iterable[Any], key: ContainerKey
+    ) -> Callable[[Any], Any]:
+        """Key function of the items of another container or iterable"""
+        if isinstance(other, Container):
+            return other._get_key_func(key)
+        # plain iterables may contain dicts or objects
+        container = Container()
+        container.get = _get_item_or_attribute
+        return container._get_key_func(key)
+
+    def _new_result_container(self, data: List[Any]) -> "Container":
+        """Wrap the items computed by unique, join, lookup and show (not copied)"""
+        return self.__class__(data, copy=False)
+
+    def _merge_joined_items(self, item: T, other_item: Any) -> Any:
+        return item, other_item
+
+    def _iter_unique(
+        self,
+        key: Optional[ContainerKey] = None,
+        approximate: bool = False,
+        capacity: int = None,
+        error_rate: float = 0.01,
+    ) -> Iterator[T]:
+        return iter_unique(
+            self._data,
+            self._get_key_func(key),
+            approximate=approximate,
+            capacity=capacity,
+            error_rate=error_rate,
+        )
+
+    def _materialize_data(self) -> None:
+        """Convert _data to a list if it's an iterator (ex: wrapped generator)"""
+        if not isinstance(self._data, list):
+            self._data = list(self._data)
+
+    def _remove_positions(self, positions: Set[int]) -> List[T]:
+        """Remove the items at positions with a single compaction pass"""
+        if not positions:
+            return []
+        kept = []
+        removed = {}
+        for position, item in enumerate(self._data):
+            if position in positions:
+                removed[position] = item
             else:
-                return all(v != item_value for v in search_value)
-        elif operator == "eq":
-            return search_value == item_value
-        elif operator == "ne":
-            return search_value != item_value
-        elif operator == "lt":
-            return item_value < search_value
-        elif operator == "le":
-            return item_value <= search_value
-        elif operator == "gt":
-            return item_value > search_value
-        elif operator == "ge":
-            return item_value >= search_value
-        elif operator == "in":
-            return item_value in search_value
-        elif operator == "nin":
-            return item_value not in search_value
-        elif operator == "key__":
-            raise ValueError
-        elif operator == "search__":
-            raise ValueError
-        else:
-            raise ValueError(f"Unsupported operator '{operator}'")
+                kept.append(item)
+        self._data = kept
+        self._remove_from_indexes(removed)
+        for materialized in self._materialized.values():
+            for item in removed.values():
+                materialized.remove(item)
+        return list(removed.values())
+
+    def _remove_from_indexes(self, removed: Dict[int, T]) -> None:
+        """Update the indexes after deleting items from _data (position => item)"""
+        for index in self._indexes.values():
+            index.remove_positions(removed)
+        if self._text_index is not None:
+            self._text_index.remove_positions(removed)
+
+    def _rebuild_materialized(self) -> None:
+        for materialized in self._materialized.values():
+            materialized.rebuild(self._data)
+
+    def _rebuild_indexes(self) -> None:
+        for index in self._iter_indexes():
+            index.build(self._data)
 
     def _search_all_fields(self, item, search, searchable_fields):
         # TODO: search as list?
@@ -468,6 +1287,173 @@ class Container(Generic[T]):
         return criteria
 
 
+class GroupBy(Mapping, Generic[T]):
+    """Lazy result of Container.groupby, a mapping of group key -> Container"""
+
+    def __init__(self, container: Container[T], key: ContainerKey):
+        self.container = container
+        self.key = key
+        self._groups: Optional[Dict[Any, Container[T]]] = None
+
+    def agg(self, **aggregations: AggregationSpec) -> Dict[Any, Dict[str, Any]]:
+        """
+        Compute named aggregates for each group in a single pass.
+
+        Only the running state of each aggregate is kept per group, the items of
+        the groups are never collected.
+
+        Args:
+            **aggregations: name -> "count" or (key, function) where function is
+                one of "count", "sum", "min", "max", "mean", "first", "last".
+
+        Returns:
+            dict: group key -> {aggregate name: value}
+        """
+        container = self.container
+        aggregator = Aggregator(aggregations, container._get_key_func)
+        if all(
+            accumulator.mergeable for accumulator in aggregator.new_state()
+        ) and container._scan_in_processes(None, self.key, aggregations):
+            states = {}
+            for partial_states in container._map_chunks(
+                _groupby_agg_chunk, self.key, aggregations
+            ):
+                for group_key, partial_state in partial_states.items():
+                    state = states.get(group_key)
+                    if state is None:
+                        states[group_key] = partial_state
+                    else:
+                        aggregator.merge(state, partial_state)
+            return {
+                group_key: aggregator.result(state)
+                for group_key, state in states.items()
+            }
+
+        key_func = container._get_key_func(self.key)
+        states = {}
+        for item in container:
+            group_key = key_func(item)
+            state = states.get(group_key)
+            if state is None:
+                state = states[group_key] = aggregator.new_state()
+            aggregator.add(state, item)
+        return {
+            group_key: aggregator.result(state) for group_key, state in states.items()
+        }
+
+    def _get_groups(self) -> Dict[Any, Container[T]]:
+        if self._groups is None:
+            groups = {}
+            key = self.key
+            key_func = self.container._get_key_func(key)
+            for item in self.container:
+                group_key = key_func(item)
+                if group_key not in groups:
+                    groups[group_key] = Container(name=f"groupby[{key}={group_key}])")
+                groups[group_key].add(item)
+            self._groups = groups
+        return self._groups
+
+    def __getitem__(self, group_key: Any) -> Container[T]:
+        return self._get_groups()[group_key]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._get_groups())
+
+    def __len__(self) -> int:
+        return len(self._get_groups())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.container}, {self.key!r})"
+
+
+# ================================================= #
+# FUNCTIONS EXECUTED ON CHUNKS IN WORKER PROCESSES  #
+# ================================================= #
+# They are called with the whole data of the container (inherited by fork) or a
+# pickled chunk of it, see parallel.map_chunks
+def _take_chunk(data: List[T], start: int, stop: int) -> List[T]:
+    return data[start:stop]
+
+
+def _chunk_container(
+    data: List[T], start: int, stop: int, container_cls: type
+) -> Container[T]:
+    return container_cls(data[start:stop], copy=False)
+
+
+def _count_chunk(data, start, stop, container_cls, criteria) -> int:
+    return _chunk_container(data, start, stop, container_cls).count(criteria)
+
+
+def _sum_chunk(data, start, stop, container_cls, key, criteria) -> Any:
+    return _chunk_container(data, start, stop, container_cls).sum(key, criteria)
+
+
+def _count_values_chunk(data, start, stop, container_cls, key) -> Dict[Any, int]:
+    return _chunk_container(data, start, stop, container_cls).count_values(key)
+
+
+def _accumulate_chunk(
+    data, start, stop, container_cls, accumulator, key, criteria
+) -> Accumulator:
+    container = _chunk_container(data, start, stop, container_cls)
+    key_func = container._get_key_func(key)
+    for item in container.search(criteria):
+        accumulator.add(key_func(item))
+    return accumulator
+
+
+def _groupby_agg_chunk(
+    data, start, stop, container_cls, key, aggregations
+) -> Dict[Any, list]:
+    container = _chunk_container(data, start, stop, container_cls)
+    aggregator = Aggregator(aggregations, container._get_key_func)
+    key_func = container._get_key_func(key)
+    states = {}
+    for item in container:
+        group_key = key_func(item)
+        state = states.get(group_key)
+        if state is None:
+            state = states[group_key] = aggregator.new_state()
+        aggregator.add(state, item)
+    return states
+
+
+def iter_unique(
+    items: Iterable[T],
+    key_func: Callable[[T], Any],
+    approximate: bool = False,
+    capacity: int = None,
+    error_rate: float = 0.01,
+) -> Iterator[T]:
+    """Lazily yield the first item of each distinct value, see Container.unique"""
+    if approximate:
+        if capacity is None:
+            try:
+                capacity = len(items)
+            except TypeError:
+                capacity = DEFAULT_BLOOM_FILTER_CAPACITY
+        seen = BloomFilter(builtins.max(capacity, 1), error_rate)
+        for item in items:
+            if not seen.add(canonical_hashable(key_func(item))):
+                yield item
+    else:
+        seen = set()
+        for item in items:
+            value = canonical_hashable(key_func(item))
+            if value in seen:
+                continue
+            seen.add(value)
+            yield item
+
+
 class DictContainer(Container):
     get = getitem
     set = setitem
+
+    def _merge_joined_items(self, item: dict, other_item: Optional[dict]) -> dict:
+        merged = dict(item)
+        if other_item is not None:
+            merged.update(other_item)
+        return merged
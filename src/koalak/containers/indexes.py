@@ -0,0 +1,577 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .accessors import make_accessor
+
+_MISSING_VALUE_ERRORS = (AttributeError, KeyError, IndexError, TypeError)
+
+RANGE_OPERATORS = ("lt", "le", "gt", "ge")
+
+
+def shift_positions(
+    positions: Iterable[int], removed_positions: List[int]
+) -> List[int]:
+    """Map the positions of the kept items of a list to their positions after
+    deleting the (sorted) removed_positions, keeping their order"""
+    if len(removed_positions) == 1:
+        removed_position = removed_positions[0]
+        return [p - (p > removed_position) for p in positions]
+    return [p - bisect_left(removed_positions, p) for p in positions]
+
+
+class DeletionLog:
+    """Ids of the items deleted from a container since its index was compacted.
+
+    Indexes store item ids instead of positions: the id of an item is its position
+    when it was indexed. Deleting items does not rewrite the ids of the following
+    items, the position of an id is the id minus the number of deleted ids before
+    it. Once the log is full, the index compacts its ids in a single pass.
+    """
+
+    max_size = 4096
+
+    def __init__(self):
+        self.ids: List[int] = []
+
+    def add(self, ids: Iterable[int]) -> None:
+        self.ids = sorted(self.ids + list(ids))
+
+    def is_full(self) -> bool:
+        return len(self.ids) > self.max_size
+
+    def to_id(self, position: int) -> int:
+        ids = self.ids
+        if not ids:
+            return position
+        # Smallest id whose position is `position` (it can not be a deleted id)
+        offset = bisect_left(
+            range(position, position + len(ids) + 1),
+            position,
+            key=lambda id_: id_ - bisect_right(ids, id_),
+        )
+        return position + offset
+
+    def to_positions(self, ids: Iterable[int]) -> List[int]:
+        if not self.ids:
+            return list(ids)
+        return shift_positions(ids, self.ids)
+
+    def __bool__(self) -> bool:
+        return bool(self.ids)
+
+
+class BaseIndex:
+    """Base class of the indexes mapping the values of one field to item positions.
+
+    An index only has to return a superset of the matching positions: results are
+    always verified against the criteria afterward. Items whose value can not be
+    indexed are kept in a separate set that is returned with every lookup.
+    """
+
+    kind: str = None
+    operators: Tuple[str, ...] = ()
+
+    def __init__(self, key: str, get: Callable[[Any, str], Any]):
+        self.key = key
+        self.get = get
+        # keys can be paths ("host.ip")
+        self._accessor = make_accessor(key, get)
+        # Ids of the items (see DeletionLog) whose value can not be indexed
+        self._unindexed: Set[int] = set()
+        self._deleted = DeletionLog()
+        self._reset()
+
+    def build(self, data: Iterable[Any]) -> None:
+        self._unindexed = set()
+        self._deleted = DeletionLog()
+        self._reset()
+        for position, item in enumerate(data):
+            self._add_id(position, item)
+
+    def add(self, position: int, item: Any) -> None:
+        self._add_id(self._deleted.to_id(position), item)
+
+    def remove(self, position: int, item: Any) -> None:
+        self._remove_id(self._deleted.to_id(position), item)
+
+    def remove_positions(self, removed: Dict[int, Any]) -> None:
+        """Remove the items deleted from the container (position => item)
+
+        The following items are not reindexed, their positions are shifted.
+        """
+        ids = [self._deleted.to_id(position) for position in removed]
+        for id_, item in zip(ids, removed.values()):
+            self._remove_id(id_, item)
+        self._deleted.add(ids)
+        if self._deleted.is_full():
+            deleted_ids = self._deleted.ids
+            self._unindexed = set(shift_positions(self._unindexed, deleted_ids))
+            self._shift_ids(deleted_ids)
+            self._deleted = DeletionLog()
+
+    def _add_id(self, id_: int, item: Any) -> None:
+        try:
+            value = self._accessor(item)
+        except _MISSING_VALUE_ERRORS:
+            # the verification step will raise the same error as a full scan
+            self._unindexed.add(id_)
+            return
+        if not self._add_value(id_, value):
+            self._unindexed.add(id_)
+
+    def _remove_id(self, id_: int, item: Any) -> None:
+        try:
+            value = self._accessor(item)
+        except _MISSING_VALUE_ERRORS:
+            self._unindexed.discard(id_)
+            return
+        if not self._remove_value(id_, value):
+            self._unindexed.discard(id_)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        # the accessor is rebuilt from the key, it may be a closure
+        del state["_accessor"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._accessor = make_accessor(self.key, self.get)
+
+    def lookup(self, criteria: List[Tuple[str, Any]]) -> Optional[Set[int]]:
+        """Return the candidate positions matching all the (operator, value) criteria
+
+        Returns None if the index can not serve any of the criteria.
+        """
+        ids = self._lookup_ids(criteria)
+        if ids is None or not self._deleted:
+            return ids
+        return set(self._deleted.to_positions(ids))
+
+    def _lookup_ids(self, criteria: List[Tuple[str, Any]]) -> Optional[Set[int]]:
+        candidates = None
+        for operator, search_value in criteria:
+            positions = self._lookup_one(operator, search_value)
+            if positions is None:
+                continue
+            if candidates is None:
+                candidates = positions
+            else:
+                candidates &= positions
+        if candidates is None:
+            return None
+        return candidates | self._unindexed
+
+    # Methods of the subclasses, working on item ids
+    def _lookup_one(self, operator: str, search_value: Any) -> Optional[Set[int]]:
+        raise NotImplementedError
+
+    def _reset(self) -> None:
+        raise NotImplementedError
+
+    def _add_value(self, id_: int, value: Any) -> bool:
+        """Index the value, return False if it can not be indexed"""
+        raise NotImplementedError
+
+    def _remove_value(self, id_: int, value: Any) -> bool:
+        raise NotImplementedError
+
+    def _shift_ids(self, deleted_ids: List[int]) -> None:
+        """Replace the ids by the positions of the items after deleting deleted_ids"""
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.key!r})"
+
+
+class HashIndex(BaseIndex):
+    """Hash index serving the "default", "eq" and "in" operators.
+
+    List values are indexed by each of their elements (to serve the "default"
+    operator), unhashable values are not indexed.
+    """
+
+    kind = "hash"
+    operators = ("default", "eq", "in")
+
+    def _reset(self) -> None:
+        self._positions: Dict[Any, Set[int]] = {}
+
+    def _lookup_one(self, operator: str, search_value: Any) -> Optional[Set[int]]:
+        if operator not in self.operators:
+            return None
+        if operator == "eq":
+            search_values = [search_value]
+        else:
+            search_values = search_value
+
+        candidates = set()
+        for value in search_values:
+            try:
+                positions = self._positions.get(value)
+            except TypeError:
+                # unhashable search value (ex: list), can not use the index
+                return None
+            if positions:
+                candidates.update(positions)
+        return candidates
+
+    def _hashable_values(self, value: Any) -> Optional[List[Any]]:
+        if isinstance(value, list):
+            values = value
+        else:
+            values = [value]
+        try:
+            for e in values:
+                hash(e)
+        except TypeError:
+            return None
+        return values
+
+    def _add_value(self, id_: int, value: Any) -> bool:
+        values = self._hashable_values(value)
+        if values is None:
+            return False
+        for e in values:
+            self._positions.setdefault(e, set()).add(id_)
+        return True
+
+    def _remove_value(self, id_: int, value: Any) -> bool:
+        values = self._hashable_values(value)
+        if values is None:
+            return False
+        for e in values:
+            positions = self._positions.get(e)
+            if positions is None:
+                continue
+            positions.discard(id_)
+            if not positions:
+                del self._positions[e]
+        return True
+
+    def _shift_ids(self, deleted_ids: List[int]) -> None:
+        for value, ids in self._positions.items():
+            self._positions[value] = set(shift_positions(ids, deleted_ids))
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+
+class SortedIndex(BaseIndex):
+    """Sorted index serving range operators ("lt", "le", "gt", "ge") and equality.
+
+    Values are kept in a sorted array maintained with bisect, ties are ordered by
+    position. None, lists and values not comparable with the already indexed
+    values are not indexed.
+    """
+
+    kind = "sorted"
+    operators = ("default", "eq", "in") + RANGE_OPERATORS
+
+    def _reset(self) -> None:
+        self._keys: List[Any] = []
+        # item ids, in the order of _keys
+        self._positions: List[int] = []
+
+    def build(self, data: Iterable[Any]) -> None:
+        self._unindexed = set()
+        self._deleted = DeletionLog()
+        self._reset()
+        pairs = []
+        for position, item in enumerate(data):
+            try:
+                value = self._accessor(item)
+            except _MISSING_VALUE_ERRORS:
+                self._unindexed.add(position)
+                continue
+            if value is None or isinstance(value, list):
+                self._unindexed.add(position)
+                continue
+            pairs.append((value, position))
+        try:
+            pairs.sort()
+        except TypeError:
+            # mixed types, index what can be compared one by one
+            for value, position in pairs:
+                if not self._add_value(position, value):
+                    self._unindexed.add(position)
+            return
+        self._keys = [value for value, _ in pairs]
+        self._positions = [position for _, position in pairs]
+
+    def _lookup_ids(self, criteria: List[Tuple[str, Any]]) -> Optional[Set[int]]:
+        # Merge range criteria into one bisect to stay in O(log n + k)
+        range_criteria = [
+            (op, value) for op, value in criteria if op in RANGE_OPERATORS
+        ]
+        other_criteria = [
+            (op, value) for op, value in criteria if op not in RANGE_OPERATORS
+        ]
+        candidates = super()._lookup_ids(other_criteria)
+        if not range_criteria:
+            return candidates
+
+        try:
+            lo, hi = self._range_bounds(range_criteria)
+        except TypeError:
+            return candidates
+        positions = set(self._positions[lo:hi])
+        if candidates is None:
+            return positions | self._unindexed
+        return (candidates & positions) | self._unindexed
+
+    def _range_bounds(self, range_criteria: List[Tuple[str, Any]]) -> Tuple[int, int]:
+        keys = self._keys
+        lo, hi = 0, len(keys)
+        for operator, search_value in range_criteria:
+            if operator == "gt":
+                lo = max(lo, bisect_right(keys, search_value))
+            elif operator == "ge":
+                lo = max(lo, bisect_left(keys, search_value))
+            elif operator == "lt":
+                hi = min(hi, bisect_left(keys, search_value))
+            elif operator == "le":
+                hi = min(hi, bisect_right(keys, search_value))
+        return lo, max(lo, hi)
+
+    def _lookup_one(self, operator: str, search_value: Any) -> Optional[Set[int]]:
+        if operator not in self.operators:
+            return None
+        if operator == "eq":
+            search_values = [search_value]
+        else:
+            search_values = search_value
+
+        candidates = set()
+        keys = self._keys
+        for value in search_values:
+            try:
+                lo = bisect_left(keys, value)
+                hi = bisect_right(keys, value, lo)
+            except TypeError:
+                return None
+            candidates.update(self._positions[lo:hi])
+        return candidates
+
+    def _add_value(self, id_: int, value: Any) -> bool:
+        if value is None or isinstance(value, list):
+            return False
+        try:
+            lo = bisect_left(self._keys, value)
+            hi = bisect_right(self._keys, value, lo)
+        except TypeError:
+            return False
+        # ids grow with positions, ties stay ordered by position
+        i = bisect_left(self._positions, id_, lo, hi)
+        self._keys.insert(i, value)
+        self._positions.insert(i, id_)
+        return True
+
+    def _remove_value(self, id_: int, value: Any) -> bool:
+        if value is None or isinstance(value, list):
+            return False
+        try:
+            lo = bisect_left(self._keys, value)
+            hi = bisect_right(self._keys, value, lo)
+        except TypeError:
+            return False
+        i = bisect_left(self._positions, id_, lo, hi)
+        if i < hi and self._positions[i] == id_:
+            del self._keys[i]
+            del self._positions[i]
+            return True
+        return False
+
+    def _shift_ids(self, deleted_ids: List[int]) -> None:
+        self._positions = shift_positions(self._positions, deleted_ids)
+
+    # Methods reading the sorted values directly
+    def is_complete(self) -> bool:
+        """True if every item is in the sorted array"""
+        return not self._unindexed
+
+    def min_position(self) -> int:
+        return self._deleted.to_positions([self._positions[0]])[0]
+
+    def max_position(self) -> int:
+        # builtin max() returns the first maximal item
+        id_ = self._positions[bisect_left(self._keys, self._keys[-1])]
+        return self._deleted.to_positions([id_])[0]
+
+    def sorted_positions(
+        self, reverse: bool = False, limit: Optional[int] = None
+    ) -> List[int]:
+        """Positions in the order of a stable sort on the indexed key
+
+        Args:
+            limit: Return only the first `limit` positions, in O(log n + limit).
+        """
+        positions = self._positions
+        if limit is None:
+            limit = len(positions)
+        if not reverse:
+            return self._deleted.to_positions(positions[:limit])
+        # A stable reversed sort keeps ties in their original order
+        keys = self._keys
+        result = []
+        hi = len(keys)
+        while hi > 0 and len(result) < limit:
+            lo = bisect_left(keys, keys[hi - 1], 0, hi)
+            result.extend(positions[lo:hi])
+            hi = lo
+        return self._deleted.to_positions(result[:limit])
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class TextIndex:
+    """Trigram inverted index serving the free-text `search=` mode.
+
+    For each item, the searchable fields are converted to lowercase strings once
+    and joined into a single text. A substring search only checks the items
+    containing every trigram of the searched string.
+
+    Without `searchable_fields`, the fields of the first item are indexed, like a
+    search without index. Items missing one of these fields are not indexed and
+    are returned by every lookup, the search then raises the same error as a scan.
+    """
+
+    kind = "text"
+    ngram_size = 3
+    _FIELDS_SEPARATOR = "\x00"
+
+    def __init__(
+        self,
+        get: Callable[[Any, str], Any],
+        searchable_fields: Optional[List[str]] = None,
+        get_searchable_fields: Callable[[Any], List[str]] = None,
+    ):
+        if searchable_fields is None and get_searchable_fields is None:
+            raise ValueError(
+                "One of 'searchable_fields' or 'get_searchable_fields' is required"
+            )
+        self.get = get
+        self.searchable_fields = searchable_fields
+        self._get_searchable_fields = get_searchable_fields
+        # Indexed fields, the fields of the first item without searchable_fields
+        self.fields: Optional[List[str]] = searchable_fields
+        # Texts and postings use item ids (see DeletionLog)
+        self._texts: Dict[int, str] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._unindexed: Set[int] = set()
+        self._deleted = DeletionLog()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+        # bound to the container, set again when the container is loaded
+        state["_get_searchable_fields"] = None
+        return state
+
+    def build(self, data: Iterable[Any]) -> None:
+        self.fields = self.searchable_fields
+        self._texts = {}
+        self._postings = {}
+        self._unindexed = set()
+        self._deleted = DeletionLog()
+        for position, item in enumerate(data):
+            self._add_id(position, item)
+
+    def add(self, position: int, item: Any) -> None:
+        self._add_id(self._deleted.to_id(position), item)
+
+    def remove(self, position: int, item: Any = None) -> None:
+        self._remove_id(self._deleted.to_id(position))
+
+    def remove_positions(self, removed: Dict[int, Any]) -> None:
+        """Remove the items deleted from the container (position => item)
+
+        The following items are not tokenized again, their positions are shifted.
+        """
+        ids = [self._deleted.to_id(position) for position in removed]
+        for id_ in ids:
+            self._remove_id(id_)
+        self._deleted.add(ids)
+        if self._deleted.is_full():
+            deleted_ids = self._deleted.ids
+            self._unindexed = set(shift_positions(self._unindexed, deleted_ids))
+            self._texts = dict(
+                zip(shift_positions(self._texts, deleted_ids), self._texts.values())
+            )
+            for ngram, ids in self._postings.items():
+                self._postings[ngram] = set(shift_positions(ids, deleted_ids))
+            self._deleted = DeletionLog()
+
+    def lookup(self, search: str) -> List[int]:
+        """Return the sorted positions of the items containing `search` in one field
+
+        Positions of `unindexed_positions` are also returned, they must be verified.
+        """
+        search = search.lower()
+        texts = self._texts
+        if len(search) < self.ngram_size or self._FIELDS_SEPARATOR in search:
+            candidates = texts.keys()
+        else:
+            postings = []
+            for ngram in self._ngrams(search):
+                positions = self._postings.get(ngram)
+                if not positions:
+                    postings = [set()]
+                    break
+                postings.append(positions)
+            postings.sort(key=len)
+            candidates = postings[0].intersection(*postings[1:])
+        ids = [id_ for id_ in candidates if search in texts[id_]]
+        ids.extend(self._unindexed)
+        return self._deleted.to_positions(sorted(ids))
+
+    def unindexed_positions(self) -> Set[int]:
+        """Positions of the items missing one of the indexed fields"""
+        return set(self._deleted.to_positions(self._unindexed))
+
+    def _add_id(self, id_: int, item: Any) -> None:
+        if self.fields is None:
+            self.fields = self._get_searchable_fields(item)
+        try:
+            text = self._item_to_text(item)
+        except _MISSING_VALUE_ERRORS:
+            self._unindexed.add(id_)
+            return
+        self._texts[id_] = text
+        for ngram in self._ngrams(text):
+            self._postings.setdefault(ngram, set()).add(id_)
+
+    def _remove_id(self, id_: int) -> None:
+        # Use the stored text, the item may have been modified since
+        self._unindexed.discard(id_)
+        text = self._texts.pop(id_, None)
+        if text is None:
+            return
+        for ngram in self._ngrams(text):
+            ids = self._postings.get(ngram)
+            if ids is None:
+                continue
+            ids.discard(id_)
+            if not ids:
+                del self._postings[ngram]
+
+    def _item_to_text(self, item: Any) -> str:
+        return self._FIELDS_SEPARATOR.join(
+            str(self.get(item, field_name)).lower() for field_name in self.fields
+        )
+
+    def _ngrams(self, text: str) -> Set[str]:
+        n = self.ngram_size
+        return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.searchable_fields!r})"
+
+
+INDEX_KINDS = {
+    "hash": HashIndex,
+    "sorted": SortedIndex,
+}
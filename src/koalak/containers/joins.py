@@ -0,0 +1,41 @@
+from typing import Any, Callable, Iterable, List, Sequence
+
+JOIN_HOWS = ("inner", "left")
+
+
+def _safe_len(iterable: Iterable) -> float:
+    try:
+        return len(iterable)
+    except TypeError:
+        # iterators have no length, consider them as the larger side and stream them
+        return float("inf")
+
+
+def hash_match(
+    left: Sequence[Any],
+    left_key_func: Callable[[Any], Any],
+    right: Iterable[Any],
+    right_key_func: Callable[[Any], Any],
+) -> List[List[Any]]:
+    """Return, for each left item, the list of right items having the same key.
+
+    The hash table is built on the smaller side and the larger side is streamed,
+    in both cases the matches keep the order of the right items.
+    """
+    matches: List[List[Any]] = [[] for _ in range(len(left))]
+    if _safe_len(right) <= len(left):
+        table = {}
+        for right_item in right:
+            table.setdefault(right_key_func(right_item), []).append(right_item)
+        for position, left_item in enumerate(left):
+            right_items = table.get(left_key_func(left_item))
+            if right_items:
+                matches[position].extend(right_items)
+    else:
+        table = {}
+        for position, left_item in enumerate(left):
+            table.setdefault(left_key_func(left_item), []).append(position)
+        for right_item in right:
+            for position in table.get(right_key_func(right_item), ()):
+                matches[position].append(right_item)
+    return matches
@@ -0,0 +1,108 @@
+import itertools
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+EXECUTORS = ("serial", "process")
+
+# Sources of the chunks inherited by the forked workers instead of being pickled,
+# by call of map_chunks: concurrent calls (ex: from threads) do not share a source
+_forked_sources: Dict[int, Any] = {}
+_forked_source_ids = itertools.count()
+
+
+def check_executor(executor: Optional[str], workers: Optional[int]) -> Tuple[str, int]:
+    """Validate the executor options of a container and return (executor, workers)"""
+    if executor is None:
+        executor = "serial"
+    if executor not in EXECUTORS:
+        raise ValueError(
+            f"Unknown executor {executor!r}, available executors: {list(EXECUTORS)}"
+        )
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be positive")
+    return executor, workers
+
+
+def chunk_bounds(length: int, n_chunks: int) -> List[Tuple[int, int]]:
+    """Split range(length) into at most n_chunks contiguous (start, stop) bounds
+
+    Examples:
+        >>> chunk_bounds(10, 3)
+        [(0, 4), (4, 7), (7, 10)]
+    """
+    size, remainder = divmod(length, n_chunks)
+    bounds = []
+    start = 0
+    for i in range(n_chunks):
+        stop = start + size + (i < remainder)
+        if stop > start:
+            bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def is_picklable(*objects: Any) -> bool:
+    """True if the objects can be sent to a worker process (ex: not a lambda)"""
+    try:
+        pickle.dumps(objects)
+    except Exception:
+        # depending on the object, pickle raises PicklingError, TypeError, AttributeError...
+        return False
+    return True
+
+
+def map_chunks(
+    function: Callable[..., Any],
+    source: Any,
+    length: int,
+    workers: int,
+    args: tuple = (),
+    take: Callable[[Any, int, int], Any] = None,
+) -> List[Any]:
+    """Call `function(source, start, stop, *args)` on chunks of source in worker processes
+
+    With the "fork" start method, the workers inherit `source` from the parent
+    process: its memory pages are shared copy-on-write and never pickled. Otherwise
+    `take(source, start, stop)` builds each chunk in the parent, the chunk is pickled
+    and the function is called as `function(chunk, 0, stop - start, *args)`.
+
+    The function must return results relative to `start` (ex: positions in the
+    chunk), they are returned in the order of the chunks.
+    """
+    bounds = chunk_bounds(length, workers)
+    if not bounds:
+        return []
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        source_id = next(_forked_source_ids)
+        _forked_sources[source_id] = source
+        try:
+            with ProcessPoolExecutor(len(bounds), mp_context=context) as pool:
+                futures = [
+                    pool.submit(
+                        _call_on_forked_source, function, source_id, start, stop, args
+                    )
+                    for start, stop in bounds
+                ]
+                return [future.result() for future in futures]
+        finally:
+            del _forked_sources[source_id]
+
+    with ProcessPoolExecutor(len(bounds)) as pool:
+        futures = [
+            pool.submit(function, take(source, start, stop), 0, stop - start, *args)
+            for start, stop in bounds
+        ]
+        return [future.result() for future in futures]
+
+
+def _call_on_forked_source(
+    function: Callable[..., Any], source_id: int, start: int, stop: int, args: tuple
+) -> Any:
+    return function(_forked_sources[source_id], start, stop, *args)
@@ -0,0 +1,193 @@
+import copy
+import heapq
+import itertools
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
+
+from .compiled_query import CompiledQuery
+from .utils import canonical_hashable
+
+if TYPE_CHECKING:
+    from .generic_container import Container, ContainerKey
+
+T = TypeVar("T")
+
+
+class Query(Generic[T]):
+    """Lazy query over a Container built by chaining operations.
+
+    Nothing is evaluated until the query is iterated, and every method returns
+    a new Query so a base query can be reused (ex: one query per page).
+    When `order_by` is combined with `limit`, only the top `offset + limit`
+    items are kept in a heap instead of sorting all the matching items.
+
+    Example:
+        >>> page = (
+        ...     container.query()
+        ...     .where(status="open")
+        ...     .order_by("size", reverse=True)
+        ...     .offset(20)
+        ...     .limit(10)
+        ...     .select(["name", "size"])
+        ... )
+        >>> list(page)
+    """
+
+    def __init__(self, container: "Container[T]"):
+        self._container = container
+        self._queries: List[CompiledQuery] = []
+        self._distinct_key: Optional["ContainerKey"] = None
+        self._order_key: Optional["ContainerKey"] = None
+        self._order_reverse = False
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._fields: Optional[List[str]] = None
+
+    # =============== #
+    # BUILDER METHODS #
+    # =============== #
+    def where(self, pos_criteria: Dict = None, **criteria) -> "Query[T]":
+        """Keep the items matching the criteria (same syntax as Container.search)"""
+        criteria = self._container._normalize_positional_and_keyword_criteria(
+            pos_criteria, **criteria
+        )
+        query = self._clone()
+        query._queries.append(self._container._compile_criteria(criteria))
+        return query
+
+    def distinct(self, key: "ContainerKey") -> "Query[T]":
+        """Keep only the first item for each value of key"""
+        query = self._clone()
+        query._distinct_key = key
+        return query
+
+    def order_by(self, key: "ContainerKey", reverse: bool = False) -> "Query[T]":
+        query = self._clone()
+        query._order_key = key
+        query._order_reverse = reverse
+        return query
+
+    def offset(self, n: int) -> "Query[T]":
+        if n < 0:
+            raise ValueError("offset must be positive")
+        query = self._clone()
+        query._offset = n
+        return query
+
+    def limit(self, n: int) -> "Query[T]":
+        if n < 0:
+            raise ValueError("limit must be positive")
+        query = self._clone()
+        query._limit = n
+        return query
+
+    def select(self, fields: List[str]) -> "Query[T]":
+        """Return dicts containing only the given fields instead of the items"""
+        if isinstance(fields, str):
+            fields = [fields]
+        query = self._clone()
+        query._fields = list(fields)
+        return query
+
+    # ================ #
+    # TERMINAL METHODS #
+    # ================ #
+    def first(self) -> Any:
+        for item in self.limit(1):
+            return item
+        raise ValueError("No match found")
+
+    def count(self) -> int:
+        count = 0
+        for _ in self:
+            count += 1
+        return count
+
+    def to_container(self) -> "Container":
+        from .generic_container import Container, DictContainer
+
+        if self._fields is not None:
+            return DictContainer(list(self), copy=False)
+        return Container(list(self), copy=False)
+
+    def __iter__(self) -> Iterator[Any]:
+        container = self._container
+        items = self._iter_matching_items()
+
+        if self._distinct_key is not None:
+            items = self._iter_distinct(items)
+
+        stop = None if self._limit is None else self._offset + self._limit
+        if self._order_key is not None and not self._is_ordered_by_index():
+            key_func = container._get_key_func(self._order_key)
+            if stop is not None:
+                # top-k with a bounded heap, both functions are stable
+                if self._order_reverse:
+                    items = heapq.nlargest(stop, items, key=key_func)
+                else:
+                    items = heapq.nsmallest(stop, items, key=key_func)
+            else:
+                items = sorted(items, key=key_func, reverse=self._order_reverse)
+
+        items = itertools.islice(items, self._offset, stop)
+
+        if self._fields is not None:
+            get = container.get
+            fields = self._fields
+            items = ({field: get(item, field) for field in fields} for item in items)
+        return iter(items)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._container})"
+
+    # =============== #
+    # PRIVATE METHODS #
+    # =============== #
+    def _clone(self) -> "Query[T]":
+        query = copy.copy(self)
+        query._queries = list(self._queries)
+        return query
+
+    def _is_ordered_by_index(self) -> bool:
+        if self._order_key is None:
+            return False
+        return self._container._get_complete_sorted_index(self._order_key) is not None
+
+    def _iter_matching_items(self) -> Iterable[T]:
+        container = self._container
+        queries = self._queries
+        if self._is_ordered_by_index():
+            # read the items directly in the order of the sorted index
+            index = container._get_complete_sorted_index(self._order_key)
+            data = container._data
+            items = (data[i] for i in index.sorted_positions(self._order_reverse))
+            for query in queries:
+                items = filter(query, items)
+            return items
+
+        if not queries:
+            return iter(container)
+        # the first query can use the indexes of the container
+        items = container.search(queries[0])
+        for query in queries[1:]:
+            items = filter(query, items)
+        return items
+
+    def _iter_distinct(self, items: Iterable[T]) -> Iterator[T]:
+        key_func = self._container._get_key_func(self._distinct_key)
+        seen = set()
+        for item in items:
+            value = canonical_hashable(key_func(item))
+            if value in seen:
+                continue
+            seen.add(value)
+            yield item
@@ -0,0 +1,147 @@
+import csv
+import datetime
+import itertools
+import json
+import types
+import typing
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from koalak.descriptions import EntityDescription, FieldDescription
+
+Record = Dict[str, Any]
+
+# Separator of the elements of list and set fields in a CSV cell
+CSV_LIST_SEPARATOR = ","
+
+_TRUE_STRINGS = frozenset(["true", "1", "yes", "y", "on"])
+_FALSE_STRINGS = frozenset(["false", "0", "no", "n", "off"])
+
+
+def _str_to_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in _TRUE_STRINGS:
+        return True
+    if lowered in _FALSE_STRINGS:
+        return False
+    raise ValueError(f"Invalid boolean value {value!r}")
+
+
+_STR_PARSERS: Dict[Any, Callable[[str], Any]] = {
+    bool: _str_to_bool,
+    datetime.datetime: datetime.datetime.fromisoformat,
+    datetime.date: datetime.date.fromisoformat,
+    datetime.time: datetime.time.fromisoformat,
+    dict: json.loads,
+    typing.Dict: json.loads,
+}
+
+
+def _get_str_parser(annotation: Any) -> Optional[Callable[[str], Any]]:
+    """Return the function parsing a string into annotation or None to keep strings"""
+    if annotation is None or annotation is str or annotation is typing.Any:
+        return None
+    if annotation in _STR_PARSERS:
+        return _STR_PARSERS[annotation]
+    if isinstance(annotation, type):
+        # int, float and classes building themselves from a string
+        return annotation
+    return None
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    """Return X for Optional[X] and X | None, annotation otherwise"""
+    if typing.get_origin(annotation) not in (typing.Union, types.UnionType):
+        return annotation
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if len(args) != 1:
+        return annotation
+    return args[0]
+
+
+def get_field_converter(field: FieldDescription) -> Optional[Callable[[Any], Any]]:
+    """Return the function converting a read value to the type of the field
+
+    Values that already have the right type (ex: numbers of a JSON record) are
+    kept, strings are parsed and empty strings of non str fields become None.
+    Returns None if the values do not need any conversion.
+    """
+    annotation = _unwrap_optional(field.annotation)
+    origin = typing.get_origin(annotation)
+    if origin in (list, set):
+        if annotation is field.annotation:
+            element_parser = _get_str_parser(field.atomic_type)
+        else:
+            element_parser = _get_str_parser(typing.get_args(annotation)[0])
+
+        def convert_sequence(value: Any) -> Any:
+            if isinstance(value, str):
+                if not value:
+                    return origin()
+                value = value.split(CSV_LIST_SEPARATOR)
+            if element_parser is not None:
+                value = [element_parser(e) if isinstance(e, str) else e for e in value]
+            return origin(value)
+
+        return convert_sequence
+
+    parser = _get_str_parser(annotation)
+    if parser is None:
+        return None
+
+    def convert(value: Any) -> Any:
+        if not isinstance(value, str):
+            return value
+        if not value:
+            return None
+        return parser(value)
+
+    return convert
+
+
+def get_converters(schema: EntityDescription) -> Dict[str, Callable[[Any], Any]]:
+    """Return field name -> converter for the fields of schema needing a conversion"""
+    converters = {}
+    for field in schema:
+        converter = get_field_converter(field)
+        if converter is not None:
+            converters[field.name] = converter
+    return converters
+
+
+def convert_records(
+    records: Iterable[Record], schema: Optional[EntityDescription]
+) -> Iterator[Record]:
+    """Convert the fields of the records in place with the types of schema"""
+    if schema is None:
+        yield from records
+        return
+    converters = list(get_converters(schema).items())
+    for record in records:
+        for name, converter in converters:
+            if name in record:
+                record[name] = converter(record[name])
+        yield record
+
+
+def iter_csv(
+    filepath: str, schema: EntityDescription = None, **reader_kwargs
+) -> Iterator[Record]:
+    """Lazily yield the rows of a CSV file as dicts, converted with schema if given"""
+    with open(filepath, newline="") as file:
+        yield from convert_records(csv.DictReader(file, **reader_kwargs), schema)
+
+
+def iter_jsonl(filepath: str, schema: EntityDescription = None) -> Iterator[Record]:
+    """Lazily yield the records of a JSON lines file, converted with schema if given"""
+    with open(filepath) as file:
+        records = (json.loads(line) for line in file if line.strip())
+        yield from convert_records(records, schema)
+
+
+def iter_chunks(iterable: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
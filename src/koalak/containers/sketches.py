@@ -0,0 +1,155 @@
+import math
+from typing import Any, Hashable, List, Sequence
+
+
+def quantile_from_sorted(sorted_values: Sequence[Any], q: float) -> float:
+    """Exact quantile of sorted values using linear interpolation between the closest ranks
+
+    Examples:
+        >>> quantile_from_sorted([1, 2, 3, 4], 0.5)
+        2.5
+    """
+    check_quantile(q)
+    n = len(sorted_values)
+    if not n:
+        raise ValueError("quantile requires at least one value")
+    position = q * (n - 1)
+    lower = math.floor(position)
+    upper = min(lower + 1, n - 1)
+    fraction = position - lower
+    if not fraction:
+        return sorted_values[lower]
+    return (
+        sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+    )
+
+
+def check_quantile(q: float) -> None:
+    if not 0 <= q <= 1:
+        raise ValueError(f"Quantile must be between 0 and 1, not {q!r}")
+
+
+class P2Quantile:
+    """Streaming approximation of one quantile with the P² algorithm.
+
+    Uses five markers updated with a piecewise-parabolic formula: memory is
+    constant whatever the number of values (Jain & Chlamtac, 1985). The result
+    is exact while less than five values were added.
+    """
+
+    def __init__(self, q: float):
+        check_quantile(q)
+        self.q = q
+        self.count = 0
+        # marker heights, actual positions and desired positions
+        self._heights: List[float] = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self._increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        heights = self._heights
+        if self.count <= 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # find the cell k of the value and adjust the extreme markers
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= heights[k + 1]:
+                k += 1
+
+        positions = self._positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # adjust the heights of the middle markers if necessary
+        for i in range(1, 4):
+            delta = self._desired[i] - positions[i]
+            if (delta >= 1 and positions[i + 1] - positions[i] > 1) or (
+                delta <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                direction = 1 if delta >= 0 else -1
+                height = self._parabolic(i, direction)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, direction)
+                heights[i] = height
+                positions[i] += direction
+
+    def result(self) -> float:
+        if not self.count:
+            raise ValueError("quantile requires at least one value")
+        if self.count <= 5:
+            return quantile_from_sorted(self._heights, self.q)
+        return self._heights[2]
+
+    def _parabolic(self, i: int, d: int) -> float:
+        n = self._positions
+        h = self._heights
+        return h[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i: int, d: int) -> float:
+        n = self._positions
+        h = self._heights
+        return h[i] + d * (h[i + d] - h[i]) / (n[i + d] - n[i])
+
+
+class BloomFilter:
+    """Probabilistic set of hashable values with a bounded false positive rate.
+
+    Membership tests can return false positives (about `error_rate` once
+    `capacity` values were added) but never false negatives. Memory is fixed
+    at creation: about 1.2 bytes per value for a 1% error rate.
+
+    Values are hashed with the builtin hash(), a filter is only valid in the
+    process that built it.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.n_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.n_bits + 7) // 8)
+
+    def add(self, value: Hashable) -> bool:
+        """Add value, return True if it was (probably) already present"""
+        present = True
+        bits = self._bits
+        for position in self._positions(value):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                present = False
+                bits[byte] |= mask
+        return present
+
+    def __contains__(self, value: Hashable) -> bool:
+        bits = self._bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+    def _positions(self, value: Hashable):
+        # double hashing: k positions derived from two hashes
+        h1 = hash(value)
+        h2 = hash((value, 0x9E3779B9)) | 1
+        n_bits = self.n_bits
+        return [(h1 + i * h2) % n_bits for i in range(self.n_hashes)]
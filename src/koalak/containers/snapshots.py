@@ -0,0 +1,80 @@
+import mmap
+import os
+import pickle
+import struct
+from typing import Any, Union
+
+# File layout:
+#   MAGIC
+#   number of buffers, length of the pickle (2 little endian uint64)
+#   (offset, length) of each buffer (little endian uint64)
+#   pickle (protocol 5) of the object
+#   out-of-band buffers, each one aligned on _ALIGNMENT bytes
+MAGIC = b"KOALAK-SNAPSHOT-1\n"
+_ALIGNMENT = 64
+_COUNTS = struct.Struct("<QQ")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def dump(obj: Any, path: Union[str, os.PathLike]) -> None:
+    """
+    Write obj to path with pickle protocol 5.
+
+    Objects exposing pickle.PickleBuffer in their __reduce_ex__ (ex: the columns
+    of ColumnarContainer) are written out-of-band, as raw aligned bytes after the
+    pickle, so `load` can map them from the file without copying them.
+    """
+    buffers = []
+    header = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    raw_buffers = [buffer.raw() for buffer in buffers]
+
+    table = []
+    offset = _align(len(MAGIC) + _COUNTS.size + 16 * len(raw_buffers) + len(header))
+    for raw_buffer in raw_buffers:
+        table += [offset, raw_buffer.nbytes]
+        offset = _align(offset + raw_buffer.nbytes)
+
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(_COUNTS.pack(len(raw_buffers), len(header)))
+        file.write(struct.pack(f"<{len(table)}Q", *table))
+        file.write(header)
+        for raw_buffer, buffer_offset in zip(raw_buffers, table[::2]):
+            file.write(b"\0" * (buffer_offset - file.tell()))
+            file.write(raw_buffer)
+
+
+def load(path: Union[str, os.PathLike], mmap_mode: bool = False) -> Any:
+    """
+    Read an object written by `dump`. The file is unpickled: only load trusted
+    files, a crafted file can execute arbitrary code.
+
+    Args:
+        mmap_mode: If True, the file is memory-mapped and the out-of-band buffers
+            are read-only views of the map: they are not copied and only the
+            accessed pages are read from the disk.
+    """
+    with open(path, "rb") as file:
+        if mmap_mode:
+            content = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            content = file.read()
+    view = memoryview(content)
+
+    if bytes(view[: len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{os.fspath(path)!r} is not a koalak snapshot")
+    position = len(MAGIC)
+    n_buffers, header_length = _COUNTS.unpack_from(view, position)
+    position += _COUNTS.size
+    table = struct.unpack_from(f"<{2 * n_buffers}Q", view, position)
+    position += 16 * n_buffers
+
+    header = view[position : position + header_length]
+    buffers = [
+        view[offset : offset + length]
+        for offset, length in zip(table[::2], table[1::2])
+    ]
+    return pickle.loads(header, buffers=buffers)
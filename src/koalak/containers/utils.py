@@ -1,5 +1,6 @@
-from typing import Any
+from typing import Any, Hashable
 
+import attrs
 from koalak.descriptions import EntityDescription
 
 
@@ -51,6 +52,44 @@ def setitem(obj: Any, key: str, value: Any):
         setattr(obj, key, value)
 
 
+def canonical_hashable(value: Any) -> Hashable:
+    """
+    Convert a value to a hashable value that is equal for structurally equal values.
+
+    Dicts (whatever the order of their keys), lists, sets and attrs instances are
+    converted recursively. Other unhashable objects are converted from their
+    __dict__, hashable values are returned as is.
+
+    Example:
+        >>> canonical_hashable({"b": [1, 2], "a": 1}) == canonical_hashable({"a": 1, "b": [1, 2]})
+        True
+    """
+    if isinstance(value, dict):
+        return (
+            dict,
+            frozenset((k, canonical_hashable(v)) for k, v in value.items()),
+        )
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(canonical_hashable(e) for e in value))
+    if isinstance(value, (set, frozenset)):
+        return (frozenset, frozenset(canonical_hashable(e) for e in value))
+    if attrs.has(type(value)):
+        return (
+            type(value),
+            tuple(
+                canonical_hashable(getattr(value, field.name))
+                for field in attrs.fields(type(value))
+            ),
+        )
+    try:
+        hash(value)
+    except TypeError:
+        if hasattr(value, "__dict__"):
+            return (type(value), canonical_hashable(vars(value)))
+        raise
+    return value
+
+
 def get_fields_from_object(item):
     if isinstance(item, dict):
         return list(item.keys())
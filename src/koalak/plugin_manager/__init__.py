@@ -1,5 +1,15 @@
 from .base_plugin import Plugin
 from .plugin_manager import Metadata, PluginManager, config_field
+from .runner import PluginResult, PluginRunner
 from .utils import abstract, field
 
-__all__ = ["Plugin", "Metadata", "PluginManager", "abstract", "config_field", "field"]
+__all__ = [
+    "Plugin",
+    "Metadata",
+    "PluginManager",
+    "PluginResult",
+    "PluginRunner",
+    "abstract",
+    "config_field",
+    "field",
+]
@@ -0,0 +1,153 @@
+import inspect
+import json
+import os
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Type, Union
+
+from .plugin_metadata import Metadata
+
+if TYPE_CHECKING:
+    from .plugin_manager import PluginManager
+
+# The manifest is a JSON file describing the plugins of a PluginManager:
+#   {"version": MANIFEST_VERSION, "fingerprint": {...}, "plugins": [{
+#       "name": ..., "metadata": {...}, "config": {...}, "checked": bool,
+#       "source": {"module": ..., "qualname": ...} or {"path": ...},
+#       "file": ..., "mtime": ...}]}
+# "source" is how to load the plugin (import a module or exec a home plugin file),
+# "file"/"mtime" is used to detect modified plugins and the fingerprint to detect
+# added or removed plugins.
+MANIFEST_VERSION = 1
+
+# Arguments of Metadata.__init__ stored in the manifest
+METADATA_FIELDS = [
+    name for name in inspect.signature(Metadata.__init__).parameters if name != "self"
+]
+
+
+class PluginProxy:
+    """
+    Lightweight stand-in for a plugin listed in the manifest and not yet imported.
+
+    `name` and `metadata` are read from the manifest, so plugins can be listed and
+    filtered without importing them. Instantiating the proxy or accessing any other
+    attribute loads the plugin (see `load`).
+    """
+
+    def __init__(
+        self,
+        plugin_manager: "PluginManager",
+        name: str,
+        metadata: Metadata,
+        source: Dict[str, str],
+        checked: bool,
+    ):
+        self.plugin_manager = plugin_manager
+        self.name = name
+        self.metadata = metadata
+        self.source = source
+        self.checked = checked
+
+    def load(self) -> Type:
+        """Import the plugin and return its class"""
+        return self.plugin_manager._load_proxy(self)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __getattr__(self, attribute_name: str) -> Any:
+        if attribute_name.startswith("__"):
+            raise AttributeError(attribute_name)
+        return getattr(self.load(), attribute_name)
+
+    def __repr__(self):
+        return f"<PluginProxy [{self.name}]>"
+
+
+def metadata_to_dict(metadata: Metadata) -> Dict[str, Any]:
+    return {name: getattr(metadata, name) for name in METADATA_FIELDS}
+
+
+def plugin_source(plugin: Type, home_plugin_path: str = None) -> Optional[dict]:
+    """Return how to load plugin again, None if it can not be loaded lazily
+    (ex: plugin defined inside a function or in __main__)"""
+    if home_plugin_path is not None:
+        return {"path": home_plugin_path}
+    module = sys.modules.get(plugin.__module__)
+    if (
+        module is None
+        or plugin.__module__ == "__main__"
+        or "<locals>" in plugin.__qualname__
+        or getattr(module, "__file__", None) is None
+    ):
+        return None
+    return {"module": plugin.__module__, "qualname": plugin.__qualname__}
+
+
+def source_file(source: Dict[str, str]) -> str:
+    if "path" in source:
+        return source["path"]
+    return sys.modules[source["module"]].__file__
+
+
+def build_manifest(
+    plugins: List[Type],
+    sources: Dict[str, dict],
+    checked: Set[str],
+    config: Dict[str, dict],
+    fingerprint: dict,
+) -> dict:
+    """Build the manifest of plugins having a source (name => source)
+
+    `checked` contains the names of the plugins whose constraints were checked.
+    """
+    entries = []
+    for plugin in plugins:
+        source = sources.get(plugin.name)
+        if source is None:
+            continue
+        file = source_file(source)
+        entries.append(
+            {
+                "name": plugin.name,
+                "metadata": metadata_to_dict(plugin.metadata),
+                "config": config.get(plugin.name, {}),
+                "checked": plugin.name in checked,
+                "source": source,
+                "file": file,
+                "mtime": os.stat(file).st_mtime_ns,
+            }
+        )
+    return {"version": MANIFEST_VERSION, "fingerprint": fingerprint, "plugins": entries}
+
+
+def write_manifest(path: Union[str, Path], manifest: dict) -> None:
+    # Write then rename, concurrent processes never read a partial manifest
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(path: Union[str, Path], fingerprint: dict) -> Optional[dict]:
+    """Return the manifest stored in path, None if it is missing or outdated"""
+    try:
+        with open(path) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if (
+        not isinstance(manifest, dict)
+        or manifest.get("version") != MANIFEST_VERSION
+        or manifest.get("fingerprint") != fingerprint
+    ):
+        return None
+    for entry in manifest["plugins"]:
+        try:
+            if os.stat(entry["file"]).st_mtime_ns != entry["mtime"]:
+                return None
+        except OSError:
+            return None
+    return manifest
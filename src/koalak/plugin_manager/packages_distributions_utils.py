@@ -1,22 +1,149 @@
+import hashlib
 import importlib.metadata
+import json
 import os
+import sys
 import types
-from importlib.metadata import PathDistribution
+from importlib.metadata import EntryPoint, PathDistribution
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 __all__ = "module_to_distribution"
 
 # TODO: clean and test this code!
 
-_map_modules_to_distribution = {}
-_seen_root_packages_names = set()
+# Directory of the on-disk cache, set KOALAK_CACHE_DIR to "" to disable it
+CACHE_DIR_ENV_VAR = "KOALAK_CACHE_DIR"
+
+
+def get_cache_dir() -> Optional[Path]:
+    cache_dir = os.environ.get(CACHE_DIR_ENV_VAR)
+    if cache_dir is not None:
+        return Path(cache_dir).expanduser() if cache_dir else None
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME") or "~/.cache"
+    return Path(xdg_cache_home).expanduser() / "koalak"
+
+
+def sys_path_fingerprint() -> Tuple[str, str]:
+    """Return (environment id, fingerprint) of sys.path
+
+    The environment id only depends on the entries of sys.path, the fingerprint
+    also depends on their modification times: installing or removing a distribution
+    adds or removes a *.dist-info directory and changes the mtime of its entry.
+    """
+    entries = []
+    for entry in sys.path:
+        try:
+            mtime = os.stat(entry or ".").st_mtime_ns
+        except OSError:
+            mtime = None
+        entries.append([entry, mtime])
+    environment_id = hashlib.sha256(json.dumps(sys.path).encode()).hexdigest()
+    fingerprint = hashlib.sha256(json.dumps(entries).encode()).hexdigest()
+    return environment_id[:16], fingerprint
+
+
+class MetadataCache:
+    """
+    Cache of values computed from the metadata of installed distributions.
+
+    Values are kept in memory and in a JSON file of the cache directory, shared
+    by all the processes of a same environment (same sys.path). The cache is
+    cleared automatically when the fingerprint of sys.path changes.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = cache_dir
+        self._environment_id = None
+        self._fingerprint = None
+        self._values: Dict[str, Any] = {}
+
+    @property
+    def path(self) -> Optional[Path]:
+        if self.cache_dir is None or self._environment_id is None:
+            return None
+        return self.cache_dir / f"metadata-{self._environment_id}.json"
+
+    def get(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value of key, compute and store it if missing
+
+        The value must be serializable in JSON."""
+        self._check_fingerprint()
+        if key not in self._values:
+            self.set(key, compute())
+        return self._values[key]
+
+    def set(self, key: str, value: Any):
+        self._check_fingerprint()
+        self._values[key] = value
+        self._save()
+
+    def clear(self):
+        self._values = {}
+        self._save()
+
+    def _check_fingerprint(self):
+        environment_id, fingerprint = sys_path_fingerprint()
+        if fingerprint == self._fingerprint:
+            return
+        self._environment_id = environment_id
+        self._fingerprint = fingerprint
+        self._values = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path) as file:
+                content = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        if (
+            not isinstance(content, dict)
+            or content.get("fingerprint") != self._fingerprint
+        ):
+            return {}
+        return content.get("values", {})
+
+    def _save(self):
+        if self.path is None:
+            return
+        content = {"fingerprint": self._fingerprint, "values": self._values}
+        # The cache is an optimization, failing to write it is not an error
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write then rename, concurrent processes never read a partial file
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as file:
+                json.dump(content, file)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+metadata_cache = MetadataCache(get_cache_dir())
+
+
+def cached_entry_points(group: str, name: str = None) -> List[EntryPoint]:
+    """Same as importlib.metadata.entry_points(group=group, name=name), cached"""
+
+    def compute():
+        return [
+            [entry_point.name, entry_point.value]
+            for entry_point in importlib.metadata.entry_points(group=group)
+        ]
+
+    return [
+        EntryPoint(entry_point_name, value, group)
+        for entry_point_name, value in metadata_cache.get(
+            f"entry_points:{group}", compute
+        )
+        if name is None or entry_point_name == name
+    ]
 
 
 def module_to_package_distribution_name(module: types.ModuleType | str) -> str:
     """All this module is here for this function,"""
-    # Declare global variables for caching
-    global _map_modules_to_distribution
-    global _seen_root_packages_names
-
     # Normalize argument
     if isinstance(module, types.ModuleType):
         module_name = module.__name__
@@ -26,22 +153,33 @@ def module_to_package_distribution_name(module: types.ModuleType | str) -> str:
     # get root package
     root_package_name = module_name.split(".")[0]
 
-    # Check if we already parsed the root_package
-    if root_package_name in _seen_root_packages_names:
-        return _map_modules_to_distribution[module_name]
+    def compute():
+        return _map_modules_to_distribution(root_package_name)
 
+    key = f"modules:{root_package_name}"
+    map_modules_to_distribution = metadata_cache.get(key, compute)
+    if module_name not in map_modules_to_distribution:
+        # Modules added to editable installs do not change the fingerprint
+        map_modules_to_distribution = compute()
+        metadata_cache.set(key, map_modules_to_distribution)
+    return map_modules_to_distribution[module_name]
+
+
+def _map_modules_to_distribution(root_package_name: str) -> Dict[str, str]:
     # Get all modules from all distributions for that given package
-    distributions_names = importlib.metadata.packages_distributions()[root_package_name]
-    distributions_names = list(set(distributions_names))
+    packages_distributions = metadata_cache.get(
+        "packages_distributions",
+        lambda: dict(importlib.metadata.packages_distributions()),
+    )
+    distributions_names = packages_distributions[root_package_name]
+    distributions_names = sorted(set(distributions_names))
+    map_modules_to_distribution = {}
     for distribution_name in distributions_names:
         distribution = importlib.metadata.distribution(distribution_name)
         modules = get_modules_from_distribution(distribution, root_package_name)
         for module in modules:
-            _map_modules_to_distribution[module] = distribution_name
-
-    # add to cache
-    _seen_root_packages_names.add(root_package_name)
-    return _map_modules_to_distribution[module_name]
+            map_modules_to_distribution[module] = distribution_name
+    return map_modules_to_distribution
 
 
 def get_modules_from_distribution(
@@ -1,9 +1,10 @@
 import glob
+import importlib
 import inspect
+import operator
 import os
-from importlib.metadata import entry_points
 from pathlib import Path
-from typing import Dict, Generic, Iterable, List, Type, TypeVar, Union
+from typing import AsyncIterator, Dict, Generic, Iterable, List, Type, TypeVar, Union
 
 from koalak.config import Config
 from koalak.containers import Container, search
@@ -17,7 +18,20 @@ from .consts import (
     KEY_METADATA_CONSTRAINTS,
     KEY_PLUGIN_MANAGER,
 )
+from .manifest import (
+    PluginProxy,
+    build_manifest,
+    plugin_source,
+    read_manifest,
+    write_manifest,
+)
+from .packages_distributions_utils import (
+    cached_entry_points,
+    module_to_package_distribution_name,
+)
 from .plugin_metadata import METADATA_ATTRIBUTES_NAMES, Metadata
+from .runner import DEFAULT_ASYNC_CONCURRENCY, PluginResult, PluginRunner
+from .scheduler import check_dependency_graph, dependency_graph
 
 # TODO: delete koalak_object_stroage
 # TODO: Remove things
@@ -75,6 +89,7 @@ class PluginManager(Generic[T]):
         home_data_path: Union[str, Path] = None,
         home_plugins_path: Union[str, Path] = None,
         exceptions_path: Union[str, Path] = None,
+        manifest_path: Union[str, Path] = None,
     ):
         """
 
@@ -83,6 +98,10 @@ class PluginManager(Generic[T]):
             auto_register: if True, automatically register plugins when subclassing baseplugin
             auto_check: if True, automatically check if plugins are well constructed
             home_path: path for plugin manager, to load home plugins
+            manifest_path: path of the manifest used to load plugins lazily. If the
+                manifest is missing or outdated, `init` loads all plugins and writes it,
+                otherwise `init` only registers proxies and plugins are imported
+                when they are used (see `write_manifest`)
 
         """
 
@@ -121,6 +140,7 @@ class PluginManager(Generic[T]):
         self.home_data_path: Path = home_data_path
         self.home_plugins_path: Path = home_plugins_path
         self.exceptions_path: Path = exceptions_path
+        self.manifest_path: Path = normalize_to_path_or_none(manifest_path)
 
         if self.config_path is not None:
             config = Config(self.config_path)
@@ -132,6 +152,10 @@ class PluginManager(Generic[T]):
         self._plugins: dict[str, Type[T]] = {}
         self._initialized: bool = False
         self._config_dict_form_plugins = {}
+        # name of home plugins => path of the file defining them
+        self._home_plugins_paths: dict[str, str] = {}
+        # names of the plugins whose constraints were checked (written in the manifest)
+        self._checked_plugins: set[str] = set()
 
         self._base_plugin: Type[T] = base_plugin
         self._register_base_plugin(base_plugin)
@@ -143,6 +167,17 @@ class PluginManager(Generic[T]):
     def base_plugin(self):
         return self._base_plugin
 
+    @property
+    def runner(self) -> PluginRunner:
+        """Call a method on all plugins concurrently
+
+        Examples:
+            >>> results = plugins.runner.scan(target).run()
+            >>> for result in plugins.runner(executor="process", timeout=60).scan(target):
+            ...     print(result.name, result.value)
+        """
+        return PluginRunner(self)
+
     # ========== #
     # Public API #
     # ========== #
@@ -167,8 +202,12 @@ class PluginManager(Generic[T]):
                 raise AttributeError(f"name is required for plugins '{plugin_cls}'")
 
             name = plugin_cls.name
-            if name in self._plugins:
+            # Lazy plugins are replaced by their class when they are imported
+            proxy = self._plugins.get(name)
+            if proxy is not None and not isinstance(proxy, PluginProxy):
                 raise ValueError(f"plugin '{name}' already exist")
+            if proxy is not None and proxy.checked:
+                check = False
 
             if not isinstance(name, str):
                 raise ValueError(f"plugin name {name!r} must be a string")
@@ -185,6 +224,7 @@ class PluginManager(Generic[T]):
             # Check constraint before registring
             if check:
                 self.check(plugin_cls)
+                self._checked_plugins.add(name)
 
             # TODO: read again config fields
             self._check_config_fields(plugin_cls)
@@ -207,6 +247,38 @@ class PluginManager(Generic[T]):
         for plugin_cls in self:
             yield plugin_cls(*args, **kwargs)
 
+    def arun(
+        self,
+        method_name: str,
+        *args,
+        concurrency: int = None,
+        timeout: float = None,
+        **kwargs,
+    ) -> AsyncIterator[PluginResult]:
+        """Call a method on all plugins from asyncio and yield the results as they finish
+
+        Coroutine methods are awaited, synchronous methods are run in threads.
+
+        Args:
+            method_name: name of the method to call on each plugin instance
+            *args: positional arguments of the method
+            concurrency: maximum number of plugins running at the same time
+            timeout: maximum duration in seconds of each plugin, a plugin running
+                longer is cancelled and gets a TimeoutError result
+            **kwargs: keyword arguments of the method
+
+        Examples:
+            >>> async for result in plugins.arun("scan", target, concurrency=500):
+            ...     print(result.name, result.value)
+
+        Plugins can be filtered with the runner: `plugins.runner(category="web").scan(target)`
+        is also an async iterable.
+        """
+        if concurrency is None:
+            concurrency = DEFAULT_ASYNC_CONCURRENCY
+        runner = self.runner(workers=concurrency, timeout=timeout)
+        return runner.call(method_name, *args, **kwargs).__aiter__()
+
     def init(self, _homepath_initialized: set = None):
         # TODO: read me again
         _homepath_initialized = _homepath_initialized or set()
@@ -218,23 +290,59 @@ class PluginManager(Generic[T]):
         # FIXME: this condition must be checked with framework,
         #  otherwise no init will happen for config
         if self.home_path in _homepath_initialized:
+            self.check_dependencies()
             return
         self._init_home()
-        self._load_plugins()
-        self._init_config()
 
-        # TODO: document & test entry points
-        # Load plugins from other libraries entry points
-        if self.entry_point:
-            for entry_point in entry_points(group=self.entry_point, name=self.name):
-                try:
-                    entry_point.load()
-                except ModuleNotFoundError as e:
-                    package_distribution = entry_point.dist.name
-                    raise ModuleNotFoundError(
-                        f"Failed to load entry point '{entry_point.name}' from distribution '{package_distribution}'. "
-                        f"Ensure the package is installed and accessible. Missing module: '{entry_point.value}'"
-                    ) from e
+        manifest = None
+        if self.manifest_path is not None:
+            manifest = read_manifest(self.manifest_path, self._manifest_fingerprint())
+
+        if manifest is None:
+            self._load_plugins()
+            self._init_config()
+            self._load_entry_points()
+            if self.manifest_path is not None:
+                self.write_manifest()
+        else:
+            self._register_proxies(manifest)
+            self._init_config()
+
+        self.check_dependencies()
+
+    def write_manifest(self, path: Union[str, Path] = None):
+        """Write the manifest of the registered plugins (default path: manifest_path)
+
+        Call it at install time (after `init`) to avoid importing all plugins
+        on the first run. Plugins that can not be imported again (ex: defined in
+        __main__ or inside a function) are not written in the manifest.
+        """
+        if path is None:
+            path = self.manifest_path
+        if path is None:
+            raise ValueError("path is required when manifest_path is not set")
+
+        sources = {}
+        for plugin in self._plugins.values():
+            if isinstance(plugin, PluginProxy):
+                sources[plugin.name] = plugin.source
+            else:
+                home_plugin_path = self._home_plugins_paths.get(plugin.name)
+                source = plugin_source(plugin, home_plugin_path)
+                if source is not None:
+                    sources[plugin.name] = source
+        manifest = build_manifest(
+            list(self),
+            sources,
+            self._checked_plugins,
+            self._config_dict_form_plugins,
+            self._manifest_fingerprint(),
+        )
+        write_manifest(path, manifest)
+
+    def check_dependencies(self):
+        """Check that Metadata.plugin_dependencies reference existing plugins without cycles"""
+        check_dependency_graph(dependency_graph(self._plugins))
 
     def iter(
         self,
@@ -292,7 +400,10 @@ class PluginManager(Generic[T]):
         if isinstance(item, type) and issubclass(item, self._base_plugin):
             item = item.name
 
-        return self._plugins.__getitem__(item)
+        plugin = self._plugins.__getitem__(item)
+        if isinstance(plugin, PluginProxy):
+            plugin = plugin.load()
+        return plugin
 
     def __iter__(self) -> Iterable[Type[T]]:
         yield from sorted(self._plugins.values(), key=lambda e: e.metadata.order)
@@ -403,18 +514,93 @@ class PluginManager(Generic[T]):
         """Load home plugins"""
         if not self.home_path:
             return
-        for python_path in glob.glob(os.path.join(self.home_plugins_path, "*.py")):
-            with open(python_path) as f:
-                data = f.read()
-                execution_context = {}
-                exec(data, execution_context)
-                for object_name, object in execution_context.items():
-                    if inspect.isclass(object) and issubclass(
-                        object, self._base_plugin
-                    ):
-                        if object is self._base_plugin:
-                            continue
-                        object._is_home_plugin = True
+        for python_path in self._iter_home_plugins_paths():
+            self._load_plugins_file(python_path)
+
+    def _iter_home_plugins_paths(self) -> list[str]:
+        if not self.home_path:
+            return []
+        return sorted(glob.glob(os.path.join(self.home_plugins_path, "*.py")))
+
+    def _load_plugins_file(self, python_path: str):
+        with open(python_path) as f:
+            data = f.read()
+            execution_context = {}
+            exec(data, execution_context)
+            for object_name, object in execution_context.items():
+                if inspect.isclass(object) and issubclass(object, self._base_plugin):
+                    if object is self._base_plugin:
+                        continue
+                    object._is_home_plugin = True
+                    if "name" in object.__dict__:
+                        self._home_plugins_paths[object.name] = python_path
+
+    def _iter_entry_points(self):
+        if not self.entry_point:
+            return []
+        return cached_entry_points(self.entry_point, self.name)
+
+    def _load_entry_points(self):
+        # TODO: document & test entry points
+        # Load plugins from other libraries entry points
+        for entry_point in self._iter_entry_points():
+            try:
+                entry_point.load()
+            except ModuleNotFoundError as e:
+                try:
+                    package_distribution = module_to_package_distribution_name(
+                        entry_point.module
+                    )
+                except KeyError:
+                    package_distribution = "unknown"
+                raise ModuleNotFoundError(
+                    f"Failed to load entry point '{entry_point.name}' from distribution '{package_distribution}'. "
+                    f"Ensure the package is installed and accessible. Missing module: '{entry_point.value}'"
+                ) from e
+
+    def _manifest_fingerprint(self) -> dict:
+        """Sources of plugins, the manifest is outdated when they change"""
+        return {
+            "home_plugins": self._iter_home_plugins_paths(),
+            "entry_points": sorted(
+                f"{e.name}={e.value}" for e in self._iter_entry_points()
+            ),
+        }
+
+    def _register_proxies(self, manifest: dict):
+        for entry in manifest["plugins"]:
+            name = entry["name"]
+            # Plugins imported before init (ex: builtin plugins) are already registered
+            if name in self._plugins:
+                continue
+            metadata = Metadata(**entry["metadata"])
+            metadata.plugin_manager = self
+            self._plugins[name] = PluginProxy(
+                self, name, metadata, entry["source"], entry["checked"]
+            )
+            if entry["checked"]:
+                self._checked_plugins.add(name)
+            if entry["config"]:
+                self._config_dict_form_plugins[name] = entry["config"]
+
+    def _load_proxy(self, proxy: PluginProxy) -> Type[T]:
+        """Import the plugin of proxy, its class replaces the proxy when registered"""
+        if self._plugins.get(proxy.name) is proxy:
+            source = proxy.source
+            if "path" in source:
+                self._load_plugins_file(source["path"])
+            else:
+                module = importlib.import_module(source["module"])
+                if self._plugins.get(proxy.name) is proxy:
+                    # The module was already imported, the plugin was not registered again
+                    plugin_cls = operator.attrgetter(source["qualname"])(module)
+                    self.register(plugin_cls)
+        plugin = self._plugins[proxy.name]
+        if isinstance(plugin, PluginProxy):
+            raise ImportError(
+                f"plugin '{proxy.name}' not found in {proxy.source}, the manifest is outdated"
+            )
+        return plugin
 
     def _init_config(self):
         if self.config is None:
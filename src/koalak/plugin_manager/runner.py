@@ -0,0 +1,445 @@
+import asyncio
+import functools
+import inspect
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Type,
+)
+
+from .scheduler import dependency_graph, topological_waves
+
+if TYPE_CHECKING:
+    from .plugin_manager import PluginManager
+
+EXECUTORS = ("thread", "process", "serial")
+DEFAULT_ASYNC_CONCURRENCY = 100
+
+
+class PluginResult:
+    """Outcome of calling a method on one plugin"""
+
+    def __init__(
+        self,
+        plugin: Type,
+        value: Any = None,
+        error: Optional[BaseException] = None,
+        duration: float = 0.0,
+    ):
+        self.plugin = plugin
+        self.value = value
+        self.error = error
+        self.duration = duration
+
+    @property
+    def name(self) -> str:
+        return self.plugin.name
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def timed_out(self) -> bool:
+        return isinstance(self.error, TimeoutError)
+
+    def get(self) -> Any:
+        """Return the value returned by the plugin or raise its error"""
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def __repr__(self):
+        if self.error is not None:
+            return f"<PluginResult [{self.name}] error={self.error!r}>"
+        return f"<PluginResult [{self.name}] value={self.value!r}>"
+
+
+class PluginRunner:
+    """
+    Call one method on every selected plugin concurrently.
+
+    Plugins are selected with the filters of `PluginManager.iter`, instantiated
+    with `init_args`/`init_kwargs` and the method is called on each instance.
+    Accessing any other attribute returns a function preparing a `PluginRun`
+    of the method with that name:
+
+        >>> plugins.runner(executor="process", timeout=30).scan(target).run()
+
+    Args:
+        executor: "thread" (default), "process" or "serial". Each plugin runs in
+            its own thread or process, at most `workers` at the same time.
+        workers: maximum number of plugins running at the same time
+            (default: number of CPUs for processes, min(32, CPUs + 4) for threads)
+        timeout: maximum duration in seconds of each plugin. A plugin running
+            longer gets a TimeoutError result; its process is terminated, its
+            thread is left running in the background (threads can not be killed).
+        init_args: positional arguments used to instantiate the plugins
+        init_kwargs: keyword arguments used to instantiate the plugins
+        **filters: filters of `PluginManager.iter` (name, category, tags, ...)
+    """
+
+    def __init__(
+        self,
+        plugin_manager: "PluginManager",
+        *,
+        executor: str = "thread",
+        workers: int = None,
+        timeout: float = None,
+        init_args: tuple = (),
+        init_kwargs: Dict[str, Any] = None,
+        **filters,
+    ):
+        if executor not in EXECUTORS:
+            raise ValueError(
+                f"Unknown executor {executor!r}, available executors: {list(EXECUTORS)}"
+            )
+        if workers is None:
+            cpu_count = os.cpu_count() or 1
+            workers = cpu_count if executor == "process" else min(32, cpu_count + 4)
+        if workers < 1:
+            raise ValueError("workers must be positive")
+        if timeout is not None:
+            if timeout <= 0:
+                raise ValueError("timeout must be positive")
+            if executor == "serial":
+                raise ValueError("timeout is not supported with the serial executor")
+
+        self.plugin_manager = plugin_manager
+        self.executor = executor
+        self.workers = workers
+        self.timeout = timeout
+        self.init_args = tuple(init_args)
+        self.init_kwargs = init_kwargs or {}
+        self.filters = filters
+
+    def __call__(self, **options) -> "PluginRunner":
+        """Return a new runner with updated options"""
+        current_options = {
+            "executor": self.executor,
+            "workers": self.workers if "executor" not in options else None,
+            "timeout": self.timeout,
+            "init_args": self.init_args,
+            "init_kwargs": self.init_kwargs,
+            **self.filters,
+        }
+        current_options.update(options)
+        return PluginRunner(self.plugin_manager, **current_options)
+
+    def __getattr__(self, method_name: str) -> Callable[..., "PluginRun"]:
+        if method_name.startswith("_"):
+            raise AttributeError(method_name)
+        return functools.partial(self.call, method_name)
+
+    def call(self, method_name: str, *args, **kwargs) -> "PluginRun":
+        """Prepare the call of plugin.method_name(*args, **kwargs) on each plugin"""
+        plugins = list(self.plugin_manager.iter(**self.filters))
+        for plugin in plugins:
+            if not callable(getattr(plugin, method_name, None)):
+                raise AttributeError(
+                    f"plugin '{plugin.name}' has no method '{method_name}'"
+                )
+        return PluginRun(self, plugins, method_name, args, kwargs)
+
+    def __repr__(self):
+        return f"<PluginRunner [{self.executor}] {self.plugin_manager!r}>"
+
+
+class PluginRun:
+    """
+    Call of one method on a list of plugins, created with `PluginRunner.call`.
+
+    Iterating over a PluginRun runs the plugins and yields a `PluginResult` as soon
+    as each plugin finishes, `run` waits for all the plugins and returns the results
+    in the order of the plugins. Errors raised by plugins do not stop the other
+    plugins, they are stored in the results.
+
+    `run_in_waves` respects `Metadata.plugin_dependencies`: plugins run in
+    topological waves and receive the values returned by their dependencies.
+
+    A PluginRun is also an async iterable (see `PluginManager.arun`): coroutine
+    methods are awaited in the event loop and the other methods are called in
+    threads, with at most `runner.workers` plugins running at the same time.
+    """
+
+    def __init__(
+        self,
+        runner: PluginRunner,
+        plugins: List[Type],
+        method_name: str,
+        args: tuple,
+        kwargs: Dict[str, Any],
+    ):
+        self.runner = runner
+        self.plugins = plugins
+        self.method_name = method_name
+        self.args = args
+        self.kwargs = kwargs
+        # name of plugin => {name of dependency: value returned by the dependency}
+        self._dependencies_results: Dict[str, Dict[str, Any]] = {}
+
+    def run(self) -> List[PluginResult]:
+        """Run all the plugins and return their results in the order of the plugins"""
+        results = {result.plugin.name: result for result in self}
+        return [results[plugin.name] for plugin in self.plugins]
+
+    def waves(self) -> List[List[Type]]:
+        """Split the plugins and their dependencies into waves of independent plugins"""
+        plugin_manager = self.runner.plugin_manager
+        graph = dependency_graph({plugin.name: plugin for plugin in plugin_manager})
+        waves = topological_waves(graph, [plugin.name for plugin in self.plugins])
+        return [[plugin_manager[name] for name in wave] for wave in waves]
+
+    def run_in_waves(self) -> List[PluginResult]:
+        """
+        Run the plugins after their dependencies (Metadata.plugin_dependencies)
+
+        Plugins of a same wave run concurrently. A plugin with dependencies receives
+        the keyword argument `dependencies_results`, a dict mapping the name of each
+        of its dependencies to the value it returned. Dependencies are run even if
+        they are not selected. A plugin is not run if one of its dependencies
+        failed, its result has a RuntimeError.
+
+        Returns:
+            the results of the plugins and their dependencies, wave by wave
+        """
+        results = {}
+        for wave in self.waves():
+            wave_run = PluginRun(
+                self.runner, [], self.method_name, self.args, self.kwargs
+            )
+            for plugin in wave:
+                dependencies = plugin.metadata.plugin_dependencies
+                failed = [e for e in dependencies if not results[e].ok]
+                if failed:
+                    error = RuntimeError(
+                        f"dependency '{failed[0]}' of plugin '{plugin.name}' failed"
+                    )
+                    results[plugin.name] = PluginResult(plugin, error=error)
+                    continue
+                wave_run.plugins.append(plugin)
+                if dependencies:
+                    wave_run._dependencies_results[plugin.name] = {
+                        e: results[e].value for e in dependencies
+                    }
+            for result in wave_run:
+                results[result.name] = result
+        return list(results.values())
+
+    def __iter__(self) -> Iterator[PluginResult]:
+        if self.runner.executor == "serial":
+            for plugin in self.plugins:
+                yield PluginResult(plugin, *_call_plugin(*self._call_args(plugin)))
+        else:
+            yield from self._iter_concurrent()
+
+    def __aiter__(self) -> AsyncIterator[PluginResult]:
+        return self._aiter()
+
+    async def _aiter(self) -> AsyncIterator[PluginResult]:
+        semaphore = asyncio.Semaphore(self.runner.workers)
+        tasks = [
+            asyncio.create_task(self._acall(plugin, semaphore))
+            for plugin in self.plugins
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # The consumer was cancelled or stopped iterating before the end
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _acall(self, plugin: Type, semaphore: asyncio.Semaphore) -> PluginResult:
+        timeout = self.runner.timeout
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                instance = plugin(*self.runner.init_args, **self.runner.init_kwargs)
+                method = getattr(instance, self.method_name)
+                kwargs = self._kwargs(plugin)
+                if inspect.iscoroutinefunction(method):
+                    awaitable = method(*self.args, **kwargs)
+                else:
+                    awaitable = asyncio.to_thread(method, *self.args, **kwargs)
+                value = await asyncio.wait_for(awaitable, timeout)
+            except asyncio.TimeoutError:
+                # asyncio.TimeoutError is not TimeoutError before Python 3.11
+                error = TimeoutError(
+                    f"plugin '{plugin.name}' did not finish in {timeout}s"
+                )
+                return PluginResult(plugin, error=error, duration=timeout)
+            except Exception as error:
+                return PluginResult(
+                    plugin, error=error, duration=time.perf_counter() - start
+                )
+            return PluginResult(plugin, value, duration=time.perf_counter() - start)
+
+    def _kwargs(self, plugin: Type) -> Dict[str, Any]:
+        if plugin.name not in self._dependencies_results:
+            return self.kwargs
+        dependencies_results = self._dependencies_results[plugin.name]
+        return {**self.kwargs, "dependencies_results": dependencies_results}
+
+    def _call_args(self, plugin: Type) -> tuple:
+        return (
+            plugin,
+            self.method_name,
+            self.args,
+            self._kwargs(plugin),
+            self.runner.init_args,
+            self.runner.init_kwargs,
+        )
+
+    def _iter_concurrent(self) -> Iterator[PluginResult]:
+        timeout = self.runner.timeout
+        start = (
+            self._start_process
+            if self.runner.executor == "process"
+            else self._start_thread
+        )
+        # Workers put (index, (value, error, duration)) in completions when they finish
+        completions = queue.SimpleQueue()
+        pending = list(enumerate(self.plugins))[::-1]
+        # index of running plugins => (function stopping the plugin, deadline)
+        running = {}
+        try:
+            while pending or running:
+                while pending and len(running) < self.runner.workers:
+                    index, plugin = pending.pop()
+                    stop = start(index, plugin, completions)
+                    deadline = None if timeout is None else time.monotonic() + timeout
+                    running[index] = (stop, deadline)
+
+                try:
+                    index, outcome = completions.get(timeout=_wait_time(running))
+                except queue.Empty:
+                    now = time.monotonic()
+                    for index, (stop, deadline) in list(running.items()):
+                        if deadline is not None and deadline <= now:
+                            del running[index]
+                            stop()
+                            error = TimeoutError(
+                                f"plugin '{self.plugins[index].name}' did not finish in {timeout}s"
+                            )
+                            yield PluginResult(
+                                self.plugins[index], error=error, duration=timeout
+                            )
+                    continue
+
+                # Ignore late results of plugins that already timed out
+                if running.pop(index, None) is not None:
+                    yield PluginResult(self.plugins[index], *outcome)
+        finally:
+            # The consumer may stop iterating before the end
+            for stop, _ in running.values():
+                stop()
+
+    def _start_thread(
+        self, index: int, plugin: Type, completions: queue.SimpleQueue
+    ) -> Callable[[], None]:
+        thread = threading.Thread(
+            target=_run_in_thread,
+            args=(completions, index, *self._call_args(plugin)),
+            daemon=True,
+        )
+        thread.start()
+        # Threads can not be stopped, a timed out thread finishes in the background
+        return lambda: None
+
+    def _start_process(
+        self, index: int, plugin: Type, completions: queue.SimpleQueue
+    ) -> Callable[[], None]:
+        # With "fork", plugins and arguments are inherited by the child process.
+        # Otherwise they are pickled: plugins must be importable (not defined locally)
+        context = multiprocessing.get_context(
+            "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+        )
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_run_in_process, args=(sender, *self._call_args(plugin))
+        )
+        process.start()
+        sender.close()
+        # Forward the result of the process to completions
+        threading.Thread(
+            target=_receive_from_process,
+            args=(receiver, process, completions, index),
+            daemon=True,
+        ).start()
+        return process.terminate
+
+
+def _wait_time(running: Dict[int, tuple]) -> Optional[float]:
+    """Time to wait before the next deadline of the running plugins"""
+    deadlines = [deadline for _, deadline in running.values() if deadline is not None]
+    if not deadlines:
+        return None
+    return max(0.0, min(deadlines) - time.monotonic())
+
+
+def _call_plugin(
+    plugin: Type,
+    method_name: str,
+    args: tuple,
+    kwargs: Dict[str, Any],
+    init_args: tuple,
+    init_kwargs: Dict[str, Any],
+) -> tuple:
+    """Instantiate plugin, call its method and return (value, error, duration)"""
+    start = time.perf_counter()
+    try:
+        instance = plugin(*init_args, **init_kwargs)
+        value = getattr(instance, method_name)(*args, **kwargs)
+    except Exception as error:
+        return None, error, time.perf_counter() - start
+    return value, None, time.perf_counter() - start
+
+
+def _run_in_thread(completions: queue.SimpleQueue, index: int, *call_args) -> None:
+    completions.put((index, _call_plugin(*call_args)))
+
+
+def _run_in_process(sender, *call_args) -> None:
+    outcome = _call_plugin(*call_args)
+    try:
+        sender.send(outcome)
+    except Exception as error:
+        # The returned value or the raised error can not be pickled
+        sender.send(
+            (None, RuntimeError(f"Can not send plugin result: {error!r}"), outcome[2])
+        )
+    finally:
+        sender.close()
+
+
+def _receive_from_process(
+    receiver, process, completions: queue.SimpleQueue, index: int
+) -> None:
+    try:
+        outcome = receiver.recv()
+    except EOFError:
+        # The process died without sending its result (crash or terminated)
+        process.join()
+        outcome = (
+            None,
+            RuntimeError(f"Plugin process exited with code {process.exitcode}"),
+            0.0,
+        )
+    else:
+        process.join()
+    finally:
+        receiver.close()
+    completions.put((index, outcome))
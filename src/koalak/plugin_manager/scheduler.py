@@ -0,0 +1,91 @@
+from typing import Dict, Iterable, List, Optional, Type
+
+# Graphs map the name of each plugin to the names of the plugins it depends on
+
+
+def dependency_graph(plugins: Dict[str, Type]) -> Dict[str, List[str]]:
+    """Build the graph of Metadata.plugin_dependencies of plugins (name => plugin)"""
+    graph = {}
+    for name, plugin in plugins.items():
+        dependencies = plugin.metadata.plugin_dependencies
+        for dependency in dependencies:
+            if dependency not in plugins:
+                raise ValueError(
+                    f"plugin '{name}' depends on unknown plugin '{dependency}'"
+                )
+        graph[name] = list(dependencies)
+    return graph
+
+
+def find_cycle(graph: Dict[str, List[str]]) -> Optional[List[str]]:
+    """Return a dependency cycle of graph (ex: ["a", "b", "a"]) or None"""
+    # Iterative depth first search, nodes on the current path are "visiting"
+    visiting, visited = set(), set()
+    for root in graph:
+        if root in visited:
+            continue
+        path = [root]
+        stack = [iter(graph[root])]
+        visiting.add(root)
+        while stack:
+            dependency = next(stack[-1], None)
+            if dependency is None:
+                stack.pop()
+                node = path.pop()
+                visiting.discard(node)
+                visited.add(node)
+            elif dependency in visiting:
+                return path[path.index(dependency) :] + [dependency]
+            elif dependency not in visited:
+                path.append(dependency)
+                stack.append(iter(graph[dependency]))
+                visiting.add(dependency)
+    return None
+
+
+def check_dependency_graph(graph: Dict[str, List[str]]) -> None:
+    """Raise ValueError if graph contains a dependency cycle"""
+    cycle = find_cycle(graph)
+    if cycle is not None:
+        raise ValueError(f"Cyclic plugin dependencies: {' -> '.join(cycle)}")
+
+
+def topological_waves(
+    graph: Dict[str, List[str]], names: Iterable[str] = None
+) -> List[List[str]]:
+    """
+    Split plugins into waves, each plugin is in a wave after all its dependencies.
+
+    Plugins of a same wave are independent and can run in parallel. Waves contain
+    names and their transitive dependencies, in the order of graph.
+
+    Args:
+        graph: dependency graph
+        names: plugins to schedule (default: all plugins of graph)
+
+    Examples:
+        >>> topological_waves({"a": [], "b": ["a"], "c": [], "d": ["b", "c"]})
+        [['a', 'c'], ['b'], ['d']]
+    """
+    check_dependency_graph(graph)
+    if names is None:
+        names = graph
+
+    # Depth of each plugin: 0 without dependencies, 1 + depth of its deepest dependency
+    depths = {}
+    for name in names:
+        stack = [name]
+        while stack:
+            node = stack[-1]
+            missing = [e for e in graph[node] if e not in depths]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            depths[node] = 1 + max((depths[e] for e in graph[node]), default=-1)
+
+    waves = [[] for _ in range(max(depths.values(), default=-1) + 1)]
+    for name in graph:
+        if name in depths:
+            waves[depths[name]].append(name)
+    return waves
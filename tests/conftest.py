@@ -0,0 +1,17 @@
+import pytest
+from koalak.plugin_manager import packages_distributions_utils
+from koalak.plugin_manager.packages_distributions_utils import (
+    CACHE_DIR_ENV_VAR,
+    MetadataCache,
+)
+
+
+@pytest.fixture(autouse=True)
+def tmp_metadata_cache(tmp_path_factory, monkeypatch):
+    """Keep the metadata cache of the tests out of the user cache directory"""
+    cache_dir = tmp_path_factory.mktemp("koalak_cache")
+    monkeypatch.setenv(CACHE_DIR_ENV_VAR, str(cache_dir))
+    monkeypatch.setattr(
+        packages_distributions_utils, "metadata_cache", MetadataCache(cache_dir)
+    )
+    return cache_dir
@@ -0,0 +1,104 @@
+import weakref
+from operator import attrgetter, getitem, itemgetter
+
+import pytest
+from koalak.containers import Container, DictContainer
+from koalak.containers.accessors import (
+    _make_cached_accessor,
+    make_accessor,
+    parse_path,
+)
+from koalak.utils import dict_flat
+
+from .utils import Person
+
+
+def test_parse_path():
+    assert parse_path("name") == ["name"]
+    assert parse_path("owner.name") == ["owner", "name"]
+    assert parse_path("hosts[0].ports[-1]") == ["hosts", 0, "ports", -1]
+    for invalid in ["", ".name", "owner..name", "tags[0]name", "tags[x]", "tags["]:
+        with pytest.raises(ValueError):
+            parse_path(invalid)
+
+
+def test_make_accessor_uses_c_getters():
+    assert isinstance(make_accessor("name", getitem), itemgetter)
+    assert isinstance(make_accessor("name", getattr), attrgetter)
+    assert isinstance(make_accessor("owner.name", getattr), attrgetter)
+    assert make_accessor("a.b[1]", getitem)({"a": {"b": [1, 2]}}) == 2
+
+
+def test_only_builtin_getters_are_cached():
+    assert make_accessor("owner.name", getitem) is make_accessor("owner.name", getitem)
+    cache_size = _make_cached_accessor.cache_info().currsize
+
+    def get(item, key):
+        return item[key]
+
+    get_ref = weakref.ref(get)
+    accessor = make_accessor("owner.name", get)
+    assert accessor({"owner": {"name": "bob"}}) == "bob"
+    assert make_accessor("owner.name", get) is not accessor
+    assert _make_cached_accessor.cache_info().currsize == cache_size
+    # the accessors do not keep the getter alive
+    del get, accessor
+    assert get_ref() is None
+
+
+@pytest.fixture
+def assets():
+    return DictContainer(
+        [
+            {"ip": "10.0.0.2", "owner": {"name": "bob"}, "ports": [443, 80]},
+            {"ip": "10.0.0.1", "owner": {"name": "alice"}, "ports": [22]},
+            {"ip": "10.0.0.3", "owner": {"name": "alice"}, "ports": [8080, 21]},
+        ]
+    )
+
+
+def test_dotted_keys_in_container_methods(assets):
+    assert assets.count_values("owner.name") == {"bob": 1, "alice": 2}
+    assert assets.sum("ports[0]") == 443 + 22 + 8080
+    assert assets.max("ports[-1]")["ip"] == "10.0.0.2"
+    assert list(assets.groupby("owner.name")) == ["bob", "alice"]
+    assets.sort(["owner.name", "ip"])
+    assert [e["ip"] for e in assets] == ["10.0.0.1", "10.0.0.3", "10.0.0.2"]
+
+
+def test_key_funcs_are_cached(assets):
+    assert assets._get_key_func("owner.name") is assets._get_key_func("owner.name")
+    assert assets._get_key_func(["ip", "owner.name"]) is assets._get_key_func(
+        ("ip", "owner.name")
+    )
+    assert assets._get_key_func(["ip"])(assets[0]) == ("10.0.0.2",)
+
+
+def test_object_paths():
+    alice = Person("alice", 30, tags=["admin", "dev"])
+    bob = Person("bob", 25, tags=["dev"])
+    alice.manager = bob
+    bob.manager = alice
+    people = Container([alice, bob])
+    assert people.distinct("manager.name") == ["bob", "alice"]
+    assert people.distinct("tags[0]") == ["admin", "dev"]
+    assert people._get_key_func(["name", "age"])(alice) == ("alice", 30)
+
+
+def test_flattened_dict_keys():
+    hosts = DictContainer(
+        [
+            dict_flat({"host": {"ip": "1.1.1.1", "ports": [22]}}),
+            dict_flat({"host": {"ip": "2.2.2.2", "ports": [80]}}),
+            {"host": {"ip": "1.1.1.1", "ports": [443]}},
+        ]
+    )
+    assert hosts.count_values("host.ip") == {"1.1.1.1": 2, "2.2.2.2": 1}
+    assert make_accessor("a.b", getitem)({"a.b": 1, "a": {"b": 2}}) == 1
+
+    hosts.create_index("host.ip")
+    hosts.materialize("ips", "count", by="host.ip")
+    hosts.update({"host.ip": "2.2.2.2"}, {"host.ip": "3.3.3.3"})
+    assert hosts.count_values("host.ip") == {"1.1.1.1": 2, "3.3.3.3": 1}
+    assert hosts.materialized("ips") == {"1.1.1.1": 2, "3.3.3.3": 1}
+    assert hosts.count({"host.ip": "3.3.3.3"}) == 1
@@ -0,0 +1,128 @@
+import pytest
+from koalak.containers import ColumnarContainer, Container, DictContainer
+
+from .utils import Person
+
+
+@pytest.fixture
+def records():
+    return [
+        {"name": "Alice", "age": 30, "score": 1.5, "tags": ["a"]},
+        {"name": "Bob", "age": 25, "score": 3.0, "tags": []},
+        {"name": "Charlie", "age": 35, "score": 2.5, "tags": ["b"]},
+        {"name": "Alice", "age": 40, "score": 0.5, "tags": ["a", "b"]},
+        {"name": "Foo", "age": 35, "score": 4.0, "tags": []},
+    ]
+
+
+def test_columnar_roundtrip(records):
+    data = ColumnarContainer(records)
+    assert len(data) == 5
+    assert list(data) == records
+    assert data[1] == records[1]
+    assert data[-1] == records[-1]
+    assert data.fields == ["name", "age", "score", "tags"]
+    assert data.column("age") == [30, 25, 35, 40, 35]
+    assert list(data.to_container()) == records
+
+
+@pytest.mark.parametrize(
+    "criteria",
+    [
+        {"name": "Alice"},
+        {"name": ["Bob", "Foo"]},
+        {"name__not": "Alice"},
+        {"name__gt": "Bob"},
+        {"age__gt": 30},
+        {"age__ge": 30, "age__lt": 40},
+        {"age": 35, "name": "Foo"},
+        {"age__in": [25, 40]},
+        {"age__nin": [25, 40]},
+        {"age__ne": 35},
+        {"score__le": 1.5},
+        {"tags": "a"},
+        {"name": "Eve"},
+    ],
+)
+def test_columnar_search_same_as_dict_container(records, criteria):
+    columnar = ColumnarContainer(records)
+    container = DictContainer(records)
+    assert list(columnar.search(**criteria)) == list(container.search(**criteria))
+    assert list(columnar.filter(**criteria)) == list(container.filter(**criteria))
+    assert columnar.count(**criteria) == container.count(**criteria)
+
+
+@pytest.mark.parametrize(
+    "criteria",
+    [
+        {"host.ip": "1"},
+        {"host.os.name__ne": "linux"},
+        {"ports[0]": 22},
+        {"ports[-1]__ge": 443},
+        {"ports__any__gt": 8000},
+        {"host.ip": ["1", "3"], "ports[0]__lt": 100},
+    ],
+)
+def test_columnar_search_nested_fields(criteria):
+    scans = [
+        {"host": {"ip": "1", "os": {"name": "linux"}}, "ports": [22, 80]},
+        {"host": {"ip": "2", "os": {"name": "windows"}}, "ports": [443]},
+        {"host": {"ip": "3", "os": {"name": "linux"}}, "ports": [8080, 8443]},
+    ]
+    columnar = ColumnarContainer(scans)
+    container = DictContainer(scans)
+    assert list(columnar.search(**criteria)) == list(container.search(**criteria))
+    assert columnar.count(**criteria) == container.count(**criteria)
+
+
+def test_columnar_aggregations(records):
+    data = ColumnarContainer(records)
+    assert data.sum("age") == 165
+    assert data.sum("age", name="Alice") == 70
+    assert data.sum("score", age__gt=30) == 7.0
+    assert data.mean("age") == 33
+    assert data.mean("age", name="Alice") == 35
+    assert data.min("age")["name"] == "Bob"
+    assert data.max("score")["name"] == "Foo"
+    assert data.max("name")["name"] == "Foo"
+    assert data.count_values("name") == {"Alice": 2, "Bob": 1, "Charlie": 1, "Foo": 1}
+    assert data.count_values("age") == {30: 1, 25: 1, 35: 2, 40: 1}
+    assert data.distinct("name", age__ge=35) == ["Charlie", "Alice", "Foo"]
+    with pytest.raises(ValueError):
+        data.mean("age", name="Eve")
+
+
+def test_columnar_groupby(records):
+    data = ColumnarContainer(records)
+    groups = data.groupby("name")
+    assert list(groups) == ["Alice", "Bob", "Charlie", "Foo"]
+    assert isinstance(groups["Alice"], ColumnarContainer)
+    assert groups["Alice"].sum("age") == 70
+    assert groups["Alice"].min("name")["age"] == 30
+    assert list(groups["Bob"]) == [records[1]]
+
+
+def test_columnar_add_promotes_columns(records):
+    data = ColumnarContainer(records)
+    data.add({"name": "Eve", "age": 22.5, "score": None, "city": "Paris"})
+    assert data[-1] == {
+        "name": "Eve",
+        "age": 22.5,
+        "score": None,
+        "tags": None,
+        "city": "Paris",
+    }
+    assert data[0]["city"] is None
+    assert data.sum("age") == 187.5
+    assert data.count(city="Paris") == 1
+
+
+def test_to_columns():
+    container = Container([Person("alice", 30, 10.0), Person("bob", 25, 5.0)])
+    data = container.to_columns(["name", "age", "money"])
+    assert data.sum("money") == 15.0
+    assert data.first(age__lt=30)["name"] == "bob"
+
+    data = DictContainer([{"a": 1, "b": "x"}, {"a": 2, "b": "y"}]).to_columns()
+    assert data.fields == ["a", "b"]
+    assert data.count_values("b") == {"x": 1, "y": 1}
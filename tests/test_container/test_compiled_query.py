@@ -0,0 +1,70 @@
+import pytest
+from koalak.containers import Container, DictContainer
+from koalak.containers.compiled_query import CompiledQuery
+
+from .utils import Person
+
+
+@pytest.fixture
+def people():
+    return [
+        {"name": "Alice", "age": 30, "tags": ["friendly", "smart"]},
+        {"name": "Bob", "age": 25, "tags": ["kind", "smart"]},
+        {"name": "Charlie", "age": 35, "tags": ["friendly"]},
+        {"name": "Alice", "age": 40, "tags": []},
+    ]
+
+
+@pytest.mark.parametrize(
+    "criteria, expected_names",
+    [
+        ({"name": "Alice"}, ["Alice", "Alice"]),
+        ({"name": ["Bob", "Charlie"]}, ["Bob", "Charlie"]),
+        ({"name__not": ["Bob", "Charlie"]}, ["Alice", "Alice"]),
+        ({"tags": "smart"}, ["Alice", "Bob"]),
+        ({"tags": ["kind", "friendly"]}, ["Alice", "Bob", "Charlie"]),
+        ({"tags__not": "smart"}, ["Charlie", "Alice"]),
+        ({"age__eq": 25}, ["Bob"]),
+        ({"age__ne": 25, "name": "Alice"}, ["Alice", "Alice"]),
+        ({"age__gt": 30}, ["Charlie", "Alice"]),
+        ({"age__ge": 30, "age__lt": 40}, ["Alice", "Charlie"]),
+        ({"age__le": 30}, ["Alice", "Bob"]),
+        ({"age__in": [25, 35]}, ["Bob", "Charlie"]),
+        ({"age__nin": [25, 35]}, ["Alice", "Alice"]),
+        ({"name": None}, ["Alice", "Bob", "Charlie", "Alice"]),
+    ],
+)
+def test_compiled_query(people, criteria, expected_names):
+    data = DictContainer(people)
+    query = data.compile_query(**criteria)
+    assert [e["name"] for e in people if query(e)] == expected_names
+    assert [e["name"] for e in data.search(query)] == expected_names
+    assert [e["name"] for e in data.search(**criteria)] == expected_names
+    assert data.count(query) == len(expected_names)
+
+
+def test_compiled_query_reused_on_objects():
+    data = Container([Person("alice", 30), Person("bob", 25), Person("carol", 35)])
+    query = data.compile_query(age__gt=26)
+    assert [p.name for p in data.search(query)] == ["alice", "carol"]
+    assert data.first(query).name == "alice"
+    data.add(Person("dave", 50))
+    assert [p.name for p in query.filter(data)] == ["alice", "carol", "dave"]
+
+
+def test_compiled_query_unhashable_values():
+    query = CompiledQuery({"value__in": [[1], [2]], "other": [{"a": 1}, 3]}, dict.get)
+    assert query({"value": [1], "other": {"a": 1}})
+    assert not query({"value": [3], "other": 3})
+
+
+def test_compiled_query_with_index(people):
+    data = DictContainer(people)
+    data.create_index("name")
+    query = data.compile_query(name="Alice", age__gt=30)
+    assert list(data.search(query)) == [people[3]]
+
+
+def test_compiled_query_unsupported_operator():
+    with pytest.raises(ValueError):
+        CompiledQuery({"age__unknown": 1})
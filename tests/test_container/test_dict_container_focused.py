@@ -465,3 +465,39 @@ def test_eq(list_of_dict):
 
     data3 = DictContainer([{"name": "Alice", "age": 30}, {"name": "Bob", "age": 25}])
     assert data1 != data3
+
+
+def test_delete_many(list_of_dict):
+    data = DictContainer(list_of_dict, deepcopy=True)
+    removed = data.delete_many(age=35)
+    assert removed == [{"name": "Charlie", "age": 35}, {"name": "Foo", "age": 35}]
+    assert data.data == [
+        {"name": "Alice", "age": 30},
+        {"name": "Bob", "age": 25},
+        {"name": "Alice", "age": 40},
+    ]
+    assert data.delete_many(name="Eve") == []
+    assert len(data.delete_many()) == 3
+    assert len(data) == 0
+
+
+def test_delete_keeps_equal_items_not_matched():
+    shared = {"name": "Alice", "age": 30}
+    data = DictContainer([shared, {"name": "Bob", "age": 25}, shared])
+    data.create_index("name")
+    data.delete(age=25)
+    assert data.data == [shared, shared]
+    assert data.count(name="Alice") == 2
+
+
+def test_pop_where(list_of_dict):
+    data = DictContainer(list_of_dict, deepcopy=True)
+    data.create_index("name")
+    removed = data.pop_where(lambda e: e["age"] == 35)
+    assert [e["name"] for e in removed] == ["Charlie", "Foo"]
+    assert [e["name"] for e in data] == ["Alice", "Bob", "Alice"]
+    assert data.first(name="Alice", age=40) == {"name": "Alice", "age": 40}
+
+    removed = data.pop_where(data.compile_query(name="Alice"))
+    assert len(removed) == 2
+    assert list(data) == [{"name": "Bob", "age": 25}]
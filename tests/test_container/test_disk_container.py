@@ -0,0 +1,107 @@
+import io
+import os
+
+import pytest
+from koalak.containers import DictContainer, DiskContainer
+
+
+@pytest.fixture
+def records():
+    return [
+        {"ip": "10.0.0.1", "port": 22, "banner": "ssh\nOpenSSH"},
+        {"ip": "10.0.0.2", "port": 80, "banner": None},
+        {"ip": "10.0.0.1", "port": 443, "banner": "nginx"},
+    ]
+
+
+def test_disk_container_query_api(tmp_path, records):
+    path = tmp_path / "hosts.jsonl"
+    with DiskContainer(path, records) as hosts:
+        assert len(hosts) == 3
+        assert hosts[0] == records[0]
+        assert hosts[-1] == records[-1]
+        assert list(hosts) == records
+        assert hosts.first(port=80)["ip"] == "10.0.0.2"
+        assert hosts.count(ip="10.0.0.1") == 2
+        assert hosts.count() == 3
+        assert [e["port"] for e in hosts.search(port__gt=30)] == [80, 443]
+        assert set(hosts.groupby("ip")) == {"10.0.0.1", "10.0.0.2"}
+        assert hosts.groupby("ip").agg(n="count")["10.0.0.1"] == {"n": 2}
+
+
+def test_disk_container_reopen_and_append(tmp_path, records):
+    path = tmp_path / "hosts.jsonl"
+    with DiskContainer(path, records[:2]):
+        pass
+    with DiskContainer(path) as hosts:
+        assert list(hosts) == records[:2]
+        hosts.add(records[2])
+        # the new record is readable before the file is flushed
+        assert hosts[2] == records[2]
+    with DiskContainer(path) as hosts:
+        assert list(hosts) == records
+
+
+def test_disk_container_rebuilds_outdated_offsets(tmp_path, records):
+    path = tmp_path / "hosts.jsonl"
+    with DiskContainer(path, records):
+        pass
+    os.remove(str(path) + ".idx")
+    with DiskContainer(path) as hosts:
+        assert list(hosts) == records
+
+
+def test_disk_container_indexes(tmp_path, records):
+    with DiskContainer(tmp_path / "hosts.jsonl", records) as hosts:
+        hosts.create_index("port", kind="sorted")
+        hosts.add({"ip": "10.0.0.3", "port": 8080, "banner": None})
+        assert [e["ip"] for e in hosts.search(port__ge=443)] == [
+            "10.0.0.1",
+            "10.0.0.3",
+        ]
+        assert hosts.max("port")["port"] == 8080
+
+
+def test_disk_container_is_append_only(tmp_path, records):
+    with DiskContainer(tmp_path / "hosts.jsonl", records) as hosts:
+        with pytest.raises(io.UnsupportedOperation):
+            hosts.delete(port=22)
+        with pytest.raises(io.UnsupportedOperation):
+            hosts.update({"port": 22}, {"port": 2222})
+        with pytest.raises(io.UnsupportedOperation):
+            hosts.sort("port")
+
+
+def test_disk_container_results_in_memory(tmp_path, records):
+    with DiskContainer(tmp_path / "hosts.jsonl", records) as hosts:
+        unique = hosts.unique("ip")
+        assert type(unique) is DictContainer
+        assert [e["port"] for e in unique] == [22, 80]
+
+        owners = [{"ip": "10.0.0.1", "owner": "alice"}]
+        joined = hosts.join(owners, on="ip")
+        assert type(joined) is DictContainer
+        assert [(e["port"], e["owner"]) for e in joined] == [
+            (22, "alice"),
+            (443, "alice"),
+        ]
+
+        looked_up = hosts.lookup(owners, "ip", "ip", as_="owners")
+        assert [len(e["owners"]) for e in looked_up] == [1, 0, 1]
+        # the records on disk are unchanged
+        assert "owners" not in hosts[0]
+        looked_up.add({"ip": "10.0.0.3"})
+        assert len(hosts) == 3
+
+
+def test_disk_container_snapshots_unsupported(tmp_path, records):
+    path = tmp_path / "hosts.jsonl"
+    with DiskContainer(path, records) as hosts:
+        with pytest.raises(io.UnsupportedOperation):
+            hosts.save(tmp_path / "hosts.snapshot")
+    DictContainer(records).save(tmp_path / "hosts.snapshot")
+    with pytest.raises(io.UnsupportedOperation):
+        DiskContainer.load(tmp_path / "hosts.snapshot")
+    # the file is the persistent form of the container
+    with DiskContainer(path) as hosts:
+        assert list(hosts) == records
@@ -0,0 +1,84 @@
+import pytest
+from koalak import containers
+from koalak.containers import DictContainer, functions
+from koalak.utils import dict_flat
+
+from .utils import Person, people_data, people_dict_data
+
+
+def test_helpers_never_build_a_container(monkeypatch, people_dict_data):
+    def fail(*args, **kwargs):
+        raise AssertionError("a container was built")
+
+    monkeypatch.setattr(functions, "_get_appropriate_container", fail)
+    data = iter(people_dict_data)
+    assert containers.first(data, age__gt=26)["name"] == "Alice"
+    assert containers.count(iter(people_dict_data), money=50) == 2
+    assert containers.sum(iter(people_dict_data), "age", money=50) == 55
+    assert containers.min(iter(people_dict_data), "age")["name"] == "Bob"
+    assert containers.max(iter(people_dict_data), ["money", "age"])["name"] == (
+        "Charlie"
+    )
+    assert [e["name"] for e in containers.search(people_dict_data, tags="smart")] == [
+        "Alice",
+        "Bob",
+    ]
+    assert containers.mean(iter(people_dict_data), "age", money=50) == 27.5
+    assert containers.median(iter(people_dict_data), "age") == 30
+    assert functions.count_values(iter(people_dict_data), "money") == {50: 2, 500: 1}
+    assert [e["name"] for e in containers.unique(iter(people_dict_data), "money")] == [
+        "Alice",
+        "Charlie",
+    ]
+
+
+def test_helpers_on_objects(people_data):
+    assert containers.first(people_data, name="Bob").age == 25
+    assert containers.sum(people_data, "money") == 600
+    assert containers.max(people_data, "age").name == "Charlie"
+    assert containers.count(people_data) == 3
+    assert containers.count(iter(people_data), age__lt=35) == 2
+
+
+def test_helpers_on_empty_iterables():
+    assert containers.count(iter([])) == 0
+    assert containers.sum([], "age") == 0
+    assert list(containers.search(iter([]), age=1)) == []
+    with pytest.raises(ValueError):
+        containers.first([])
+    with pytest.raises(ValueError):
+        containers.min(iter([]), "age")
+
+
+def test_helpers_with_paths():
+    rows = [
+        {"host": {"ip": "a", "port": 22}, "tags": ["ssh"]},
+        {"host": {"ip": "b", "port": 80}, "tags": ["web"]},
+        {"host": {"ip": "a", "port": 443}, "tags": ["web", "tls"]},
+    ]
+    assert containers.sum(iter(rows), "host.port", **{"host.ip": "a"}) == 465
+    assert containers.max(iter(rows), ["host.ip", "host.port"])["tags"] == ["web"]
+    assert containers.min(rows, "tags[0]")["host"]["port"] == 22
+    flat_rows = [dict_flat(row) for row in rows]
+    assert containers.sum(iter(flat_rows), "host.port", **{"host.ip": "b"}) == 80
+
+
+def test_helpers_use_container_methods(people_dict_data):
+    container = DictContainer(people_dict_data)
+    container.create_index("age", kind="sorted")
+    assert containers.count(container, age__ge=30) == 2
+    assert containers.max(container, "age")["name"] == "Charlie"
+
+
+def test_reduce(people_dict_data):
+    result = containers.reduce(
+        iter(people_dict_data),
+        n="count",
+        total=("money", "sum"),
+        oldest=("age", "max"),
+        first=("name", "first"),
+    )
+    assert result == {"n": 3, "total": 600, "oldest": 35, "first": "Alice"}
+    assert containers.reduce([], n="count") == {"n": 0}
+    with pytest.raises(ValueError):
+        containers.reduce(people_dict_data, total="sum")
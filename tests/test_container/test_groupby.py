@@ -1,5 +1,5 @@
 import pytest
-from koalak.containers import Container, DictContainer
+from koalak.containers import ColumnarContainer, Container, DictContainer
 
 from .utils import Person
 
@@ -84,3 +84,62 @@ def test_dict_container_groupby():
     member = group[0]
     assert member["name"] == "Charlie"
     assert member["age"] == 35
+
+
+@pytest.fixture
+def files():
+    return [
+        {"status": "open", "size": 10, "score": 3},
+        {"status": "closed", "size": 5, "score": 8},
+        {"status": "open", "size": 20, "score": 1},
+        {"status": "filtered", "size": 1, "score": 9},
+        {"status": "open", "size": 7, "score": 5},
+    ]
+
+
+EXPECTED_AGG = {
+    "open": {"n": 3, "total": 37, "top": 5, "low": 1, "avg": 37 / 3, "first": 10},
+    "closed": {"n": 1, "total": 5, "top": 8, "low": 8, "avg": 5.0, "first": 5},
+    "filtered": {"n": 1, "total": 1, "top": 9, "low": 9, "avg": 1.0, "first": 1},
+}
+
+
+@pytest.mark.parametrize("container_cls", [DictContainer, ColumnarContainer])
+def test_groupby_agg(files, container_cls):
+    container = container_cls(files)
+    result = container.groupby("status").agg(
+        n="count",
+        total=("size", "sum"),
+        top=("score", "max"),
+        low=("score", "min"),
+        avg=("size", "mean"),
+        first=("size", "first"),
+    )
+    assert result == EXPECTED_AGG
+    assert list(result) == ["open", "closed", "filtered"]
+
+
+def test_groupby_agg_objects():
+    container = Container(
+        [Person("Alice", 30, 10), Person("Bob", 25, 5), Person("John", 25, 20)]
+    )
+    result = container.groupby("age").agg(n="count", money=("money", "sum"))
+    assert result == {30: {"n": 1, "money": 10}, 25: {"n": 2, "money": 25}}
+
+
+def test_groupby_agg_does_not_build_groups(files):
+    groupby = DictContainer(files).groupby("status")
+    groupby.agg(n="count")
+    assert groupby._groups is None
+    assert len(groupby) == 3
+    assert groupby._groups is not None
+
+
+def test_groupby_agg_invalid_spec(files):
+    container = DictContainer(files)
+    with pytest.raises(ValueError):
+        container.groupby("status").agg(x=("size", "unknown"))
+    with pytest.raises(ValueError):
+        container.groupby("status").agg(x="sum")
+    with pytest.raises(TypeError):
+        container.groupby("status").agg(x=["size", "sum"])
@@ -0,0 +1,221 @@
+from random import Random
+
+import pytest
+from koalak.containers import Container, DictContainer
+from koalak.containers.indexes import DeletionLog
+
+from .utils import Person
+
+
+@pytest.fixture
+def people():
+    return [
+        {"name": "Alice", "age": 30, "tags": ["friendly", "smart"]},
+        {"name": "Bob", "age": 25, "tags": ["kind", "smart"]},
+        {"name": "Charlie", "age": 35, "tags": ["friendly"]},
+        {"name": "Alice", "age": 40, "tags": []},
+    ]
+
+
+def test_create_index_search_default(people):
+    data = DictContainer(people)
+    data.create_index("name")
+    assert data.has_index("name")
+    assert list(data.search(name="Alice")) == [people[0], people[3]]
+    assert list(data.search(name=["Bob", "Charlie"])) == [people[1], people[2]]
+    assert list(data.search(name="Eve")) == []
+
+
+def test_index_on_list_values(people):
+    data = DictContainer(people)
+    data.create_index("tags")
+    assert list(data.search(tags="smart")) == [people[0], people[1]]
+    assert list(data.search(tags="friendly", name="Charlie")) == [people[2]]
+
+
+def test_index_eq_and_in(people):
+    data = DictContainer(people)
+    data.create_index("age")
+    assert list(data.search(age__eq=25)) == [people[1]]
+    assert list(data.search(age__in=[30, 40])) == [people[0], people[3]]
+
+
+def test_index_same_results_as_scan(people):
+    indexed = DictContainer(people)
+    indexed.create_index("name")
+    indexed.create_index("age")
+    scan = DictContainer(people)
+    for criteria in [
+        {"name": "Alice"},
+        {"name": "Alice", "age": 40},
+        {"name__not": "Alice"},
+        {"age__in": [25, 35]},
+        {"name": "Bob", "age": 30},
+    ]:
+        assert list(indexed.search(**criteria)) == list(scan.search(**criteria))
+        assert indexed.count(**criteria) == scan.count(**criteria)
+
+
+def test_index_maintained_on_add_extend(people):
+    data = DictContainer(people)
+    data.create_index("name")
+    data.add({"name": "Eve", "age": 20, "tags": []})
+    data.extend([{"name": "Eve", "age": 21, "tags": []}])
+    assert [e["age"] for e in data.search(name="Eve")] == [20, 21]
+    assert data.first(name="Eve")["age"] == 20
+
+
+def test_index_maintained_on_update(people):
+    data = DictContainer(people, deepcopy=True)
+    data.create_index("name")
+    data.update({"name": "Bob"}, {"name": "Robert"})
+    assert list(data.search(name="Bob")) == []
+    assert data.first(name="Robert")["age"] == 25
+
+    data.update_first({"name": "Alice"}, {"name": "Alicia"})
+    assert data.count(name="Alice") == 1
+    assert data.first(name="Alicia")["age"] == 30
+
+
+def test_index_maintained_on_delete(people):
+    data = DictContainer(people, deepcopy=True)
+    data.create_index("name")
+    data.delete_first(name="Alice")
+    assert [e["age"] for e in data.search(name="Alice")] == [40]
+    assert data.first(name="Charlie")["age"] == 35
+
+    data.sort("age")
+    assert data.first(name="Charlie")["age"] == 35
+    data.clear()
+    assert list(data.search(name="Charlie")) == []
+
+
+def test_index_on_objects():
+    data = Container([Person("alice", 30), Person("bob", 25), Person("alice", 35)])
+    data.create_index("name")
+    assert [p.age for p in data.search(name="alice")] == [30, 35]
+    assert data.filter(name="bob")[0].age == 25
+
+
+def test_reindex_after_external_modification(people):
+    data = DictContainer(people, deepcopy=True)
+    data.create_index("name")
+    data[0]["name"] = "Alicia"
+    data.reindex()
+    assert data.first(name="Alicia")["age"] == 30
+
+
+def test_create_index_errors(people):
+    data = DictContainer(people)
+    with pytest.raises(TypeError):
+        data.create_index(["name", "age"])
+    with pytest.raises(ValueError):
+        data.create_index("name", kind="unknown")
+    data.create_index("name")
+    data.drop_index("name")
+    assert not data.has_index("name")
+
+
+@pytest.fixture
+def scores():
+    return [
+        {"name": "a", "score": 12},
+        {"name": "b", "score": 50},
+        {"name": "c", "score": 5},
+        {"name": "d", "score": 50},
+        {"name": "e", "score": 31},
+        {"name": "f", "score": 10},
+    ]
+
+
+def test_sorted_index_range_queries(scores):
+    indexed = DictContainer(scores)
+    indexed.create_index("score", kind="sorted")
+    scan = DictContainer(scores)
+    for criteria in [
+        {"score__gt": 10, "score__le": 50},
+        {"score__ge": 10, "score__lt": 50},
+        {"score__lt": 5},
+        {"score__gt": 100},
+        {"score__gt": 10, "name": ["a", "e"]},
+        {"score": 50},
+        {"score__in": [5, 31]},
+        {"score__ne": 50},
+    ]:
+        assert list(indexed.search(**criteria)) == list(scan.search(**criteria))
+
+
+def test_sorted_index_maintained(scores):
+    data = DictContainer(scores, deepcopy=True)
+    data.create_index("score", kind="sorted")
+    data.add({"name": "g", "score": 20})
+    data.update({"name": "c"}, {"score": 100})
+    assert [e["name"] for e in data.search(score__gt=10, score__le=50)] == [
+        "a",
+        "b",
+        "d",
+        "e",
+        "g",
+    ]
+    assert data.max("score")["name"] == "c"
+    assert data.min("score")["name"] == "f"
+
+
+def test_sorted_index_min_max_sort(scores):
+    indexed = DictContainer(scores, deepcopy=True)
+    indexed.create_index("score", kind="sorted")
+    scan = DictContainer(scores, deepcopy=True)
+
+    assert indexed.min("score") is scan.min("score")
+    assert indexed.max("score") is scan.max("score")
+
+    for reverse in [False, True]:
+        indexed.sort("score", reverse=reverse)
+        scan.sort("score", reverse=reverse)
+        assert list(indexed) == list(scan)
+        assert list(indexed.search(score__ge=31)) == list(scan.search(score__ge=31))
+
+
+def test_sorted_index_with_none_values(scores):
+    data = DictContainer(scores + [{"name": "z", "score": None}])
+    data.create_index("score", kind="sorted")
+    assert [e["name"] for e in data.search(score__in=[5, 10])] == ["c", "f"]
+
+
+@pytest.mark.parametrize("max_log_size", [2, 4096])
+def test_indexes_maintained_on_deletes_without_reindexing(monkeypatch, max_log_size):
+    monkeypatch.setattr(DeletionLog, "max_size", max_log_size)
+    rows = [{"host": f"h{i % 7}", "n": i % 11, "i": i} for i in range(200)]
+    indexed = DictContainer(rows, deepcopy=True)
+    indexed.create_index("host")
+    indexed.create_index("n", kind="sorted")
+    scan = DictContainer(rows, deepcopy=True)
+
+    calls = []
+    for index in indexed._indexes.values():
+        accessor = index._accessor
+        index._accessor = lambda item, accessor=accessor: calls.append(1) or accessor(
+            item
+        )
+
+    random = Random(0)
+    for _ in range(40):
+        n, host = random.randrange(11), f"h{random.randrange(7)}"
+        for data in (indexed, scan):
+            data.delete_first(n=n)
+            data.delete_many(host=host, n=n)
+            data.add({"host": "h0", "n": n, "i": -1})
+        assert list(indexed.search(host="h3")) == list(scan.search(host="h3"))
+        assert list(indexed.search(n__gt=5, n__lt=9)) == list(
+            scan.search(n__gt=5, n__lt=9)
+        )
+        assert indexed.max("n") is scan.max("n")
+        assert indexed.top(3, "n") == scan.top(3, "n")
+    indexed.update({"n": 3}, {"host": "h9"})
+    scan.update({"n": 3}, {"host": "h9"})
+    assert list(indexed.search(host="h9")) == list(scan.search(host="h9"))
+
+    # Deleting an item only reads the values of the deleted items
+    calls.clear()
+    indexed.delete_first(host="h1")
+    assert len(calls) == 2
@@ -0,0 +1,98 @@
+import pytest
+from koalak.containers import Container, DictContainer
+
+from .utils import Person
+
+
+@pytest.fixture
+def findings():
+    return [
+        {"ip": "10.0.0.1", "port": 22},
+        {"ip": "10.0.0.2", "port": 80},
+        {"ip": "10.0.0.1", "port": 443},
+        {"ip": "10.0.0.9", "port": 21},
+    ]
+
+
+@pytest.fixture
+def assets():
+    return [
+        {"ip": "10.0.0.1", "owner": "alice"},
+        {"ip": "10.0.0.2", "owner": "bob"},
+        {"ip": "10.0.0.3", "owner": "carol"},
+    ]
+
+
+EXPECTED_INNER = [
+    {"ip": "10.0.0.1", "port": 22, "owner": "alice"},
+    {"ip": "10.0.0.2", "port": 80, "owner": "bob"},
+    {"ip": "10.0.0.1", "port": 443, "owner": "alice"},
+]
+
+
+def test_join_inner(findings, assets):
+    result = DictContainer(findings).join(DictContainer(assets), on="ip")
+    assert isinstance(result, DictContainer)
+    assert list(result) == EXPECTED_INNER
+
+
+def test_join_left(findings, assets):
+    result = DictContainer(findings).join(assets, on="ip", how="left")
+    assert list(result) == EXPECTED_INNER + [{"ip": "10.0.0.9", "port": 21}]
+
+
+@pytest.mark.parametrize("n_assets", [1, 3, 50])
+def test_join_same_result_whatever_the_smaller_side(findings, assets, n_assets):
+    # duplicated keys on the right side, with both sides being the smaller one
+    many_assets = (assets * n_assets)[:n_assets]
+    expected = [
+        {**finding, **asset}
+        for finding in findings
+        for asset in many_assets
+        if finding["ip"] == asset["ip"]
+    ]
+    result = DictContainer(findings).join(DictContainer(many_assets), on="ip")
+    assert list(result) == expected
+    # with an iterator as other side
+    result = DictContainer(findings).join(iter(many_assets), on="ip")
+    assert list(result) == expected
+
+
+def test_join_objects_with_different_keys():
+    people = Container([Person("alice", 30), Person("bob", 25)])
+    ages = [{"value": 25, "label": "young"}, {"value": 30, "label": "old"}]
+    result = people.join(ages, on="age", right_on=lambda e: e["value"])
+    assert [(p.name, e["label"]) for p, e in result] == [
+        ("alice", "old"),
+        ("bob", "young"),
+    ]
+
+
+def test_join_tuple_key():
+    left = DictContainer([{"a": 1, "b": 2, "x": "l1"}, {"a": 1, "b": 3, "x": "l2"}])
+    right = DictContainer([{"a": 1, "b": 3, "y": "r1"}])
+    assert list(left.join(right, on=["a", "b"])) == [
+        {"a": 1, "b": 3, "x": "l2", "y": "r1"}
+    ]
+
+
+def test_join_invalid_how(findings, assets):
+    with pytest.raises(ValueError):
+        DictContainer(findings).join(assets, on="ip", how="outer")
+
+
+def test_lookup(findings, assets):
+    data = DictContainer(assets)
+    result = data.lookup(findings, "ip", "ip", as_="findings")
+    assert [len(e["findings"]) for e in result] == [2, 1, 0]
+    assert result[0]["findings"] == [findings[0], findings[2]]
+    # the original items are not modified
+    assert "findings" not in data[0]
+
+
+def test_lookup_objects(findings):
+    people = Container([Person("alice", 30), Person("bob", 25)])
+    orders = [{"owner": "bob", "id": 1}, {"owner": "bob", "id": 2}]
+    result = people.lookup(orders, "name", "owner", as_="tags")
+    assert [p.tags for p in result] == [[], orders]
+    assert people[1].tags is None
@@ -0,0 +1,73 @@
+import pytest
+from koalak.containers import Container, DictContainer
+
+from .utils import Person
+
+
+@pytest.fixture
+def hosts():
+    return DictContainer(
+        [
+            {"ip": "10.0.0.1", "os": "linux", "size": 10},
+            {"ip": "10.0.0.2", "os": "windows", "size": 5},
+            {"ip": "10.0.0.3", "os": "linux", "size": 7},
+        ]
+    )
+
+
+def test_materialized_count_values(hosts):
+    hosts.materialize("by_os", "count", by="os")
+    assert hosts.materialized("by_os") == {"linux": 2, "windows": 1}
+
+    hosts.add({"ip": "10.0.0.4", "os": "bsd", "size": 1})
+    hosts.extend([{"ip": "10.0.0.5", "os": "linux", "size": 2}])
+    assert hosts.materialized("by_os") == hosts.count_values("os")
+
+    hosts.delete(os="windows")
+    assert hosts.materialized("by_os") == {"linux": 3, "bsd": 1}
+    hosts.delete_first(ip="10.0.0.1")
+    assert hosts.materialized("by_os") == hosts.count_values("os")
+
+
+def test_materialized_sum_is_incremental(hosts):
+    hosts.materialize("total", ("size", "sum"))
+    materialized = hosts._materialized["total"]
+    hosts.add({"ip": "10.0.0.4", "os": "bsd", "size": 100})
+    hosts.delete(ip="10.0.0.2")
+    assert not materialized.stale
+    assert hosts.materialized("total") == 117
+
+
+def test_materialized_update_invalidates(hosts):
+    hosts.materialize("max_size", ("size", "max"), by="os")
+    hosts.materialize("n", "count")
+
+    hosts.update({"ip": "10.0.0.1"}, {"size": 1})
+    assert hosts._materialized["max_size"].stale
+    # count does not depend on size
+    assert not hosts._materialized["n"].stale
+    assert hosts.materialized("max_size") == {"linux": 7, "windows": 5}
+
+    hosts.delete(os="linux")
+    assert hosts.materialized("max_size") == {"windows": 5}
+    assert hosts.materialized("n") == 1
+
+
+def test_materialized_clear_and_sort(hosts):
+    hosts.materialize("first_ip", ("ip", "first"))
+    hosts.sort("size")
+    assert hosts.materialized("first_ip") == "10.0.0.2"
+    hosts.clear()
+    assert hosts.materialized("first_ip") is None
+
+
+def test_materialized_objects_and_errors():
+    people = Container([Person("a", 30), Person("b", 40)])
+    people.materialize("mean_age", ("age", "mean"))
+    people.add(Person("c", 50))
+    assert people.materialized("mean_age") == 40
+    people.drop_materialized("mean_age")
+    with pytest.raises(KeyError):
+        people.materialized("mean_age")
+    with pytest.raises(ValueError):
+        people.materialize("bad", ("age", "unknown"))
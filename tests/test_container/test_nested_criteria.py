@@ -0,0 +1,115 @@
+import pytest
+from koalak import containers
+from koalak.containers import ColumnarContainer, Container, DictContainer
+from koalak.containers.compiled_query import CompiledQuery
+from koalak.utils import dict_flat
+
+from .utils import Person
+
+
+@pytest.fixture
+def scans():
+    return [
+        {"host": {"ip": "10.0.0.1", "os": {"name": "linux"}}, "ports": [22, 80]},
+        {"host": {"ip": "10.0.0.2", "os": {"name": "windows"}}, "ports": [3389]},
+        {"host": {"ip": "10.0.0.3", "os": {"name": "linux"}}, "ports": [8080, 8443]},
+        {"host": {"ip": "10.0.0.4", "os": {"name": "bsd"}}, "ports": []},
+    ]
+
+
+def _ips(items):
+    return [item["host"]["ip"] for item in items]
+
+
+def test_dotted_path_criteria(scans):
+    container = DictContainer(scans)
+    assert _ips(container.search(**{"host.ip__in": ["10.0.0.1", "10.0.0.4"]})) == [
+        "10.0.0.1",
+        "10.0.0.4",
+    ]
+    assert _ips(container.search({"host.os.name": "linux"})) == [
+        "10.0.0.1",
+        "10.0.0.3",
+    ]
+    # like top level fields, missing values raise an error
+    with pytest.raises(IndexError):
+        container.count({"ports[0]__ge": 1000})
+    assert DictContainer(scans[:3]).count({"ports[0]__ge": 1000}) == 2
+
+
+def test_array_element_operators(scans):
+    container = DictContainer(scans)
+    assert _ips(container.search(ports__any__gt=1024)) == ["10.0.0.2", "10.0.0.3"]
+    # all() is True for the empty list
+    assert _ips(container.search(ports__all__gt=1024)) == [
+        "10.0.0.2",
+        "10.0.0.3",
+        "10.0.0.4",
+    ]
+    assert _ips(container.search(ports__any__in=[22, 3389])) == [
+        "10.0.0.1",
+        "10.0.0.2",
+    ]
+    assert _ips(container.search(ports__any=80)) == ["10.0.0.1"]
+    assert _ips(container.search(ports__all__nin=[22, 80])) == [
+        "10.0.0.2",
+        "10.0.0.3",
+        "10.0.0.4",
+    ]
+
+
+def test_nested_criteria_with_indexes(scans):
+    container = DictContainer(scans)
+    container.create_index("host.os.name")
+    container.create_index("ports")
+    assert container.count({"host.os.name": "linux", "ports__any__lt": 100}) == 1
+    container.update(
+        {"host.ip": "10.0.0.4"}, {"host": {"ip": "10.0.0.4", "os": {"name": "?"}}}
+    )
+    assert container.count({"host.os.name": "bsd"}) == 0
+
+
+def test_nested_criteria_objects_and_functions(scans):
+    alice = Person("alice", 30, tags=["admin", "dev"])
+    alice.manager = Person("bob", 50)
+    people = Container([alice, Person("carol", 20, tags=[])])
+    people[1].manager = Person("dave", 25)
+    assert people.first({"manager.age__gt": 40}).name == "alice"
+    assert people.count(tags__any="dev") == 1
+    assert len(list(containers.search(scans, **{"host.os.name__ne": "linux"}))) == 2
+
+
+def test_criteria_on_flattened_keys(scans):
+    flat_scans = [dict_flat(scan) for scan in scans]
+    container = DictContainer(flat_scans)
+    assert _flat_ips(container.search(**{"host.os.name": "linux"})) == [
+        "10.0.0.1",
+        "10.0.0.3",
+    ]
+    assert container.count(**{"host.ip__in": ["10.0.0.2", "10.0.0.9"]}) == 1
+    assert container.count(ports__any__gt=8000) == 1
+    compiled = CompiledQuery({"host.ip": "10.0.0.4"}, dict.__getitem__)
+    assert _flat_ips(filter(compiled, flat_scans)) == ["10.0.0.4"]
+    assert _flat_ips(containers.search(flat_scans, **{"host.ip__ne": "10.0.0.1"})) == [
+        "10.0.0.2",
+        "10.0.0.3",
+        "10.0.0.4",
+    ]
+
+
+def _flat_ips(items):
+    return [item["host.ip"] for item in items]
+
+
+def test_quantified_columnar():
+    columnar = ColumnarContainer([{"ports": [22, 80]}, {"ports": [443]}, {"ports": []}])
+    assert columnar.count(ports__any__ge=443) == 1
+
+
+def test_compiled_query_plan():
+    query = CompiledQuery({"ports__any__gt": 1, "name": "a"}, dict.__getitem__)
+    assert query.criteria == [("name", ["a"], "default"), ("ports", 1, "any__gt")]
+    with pytest.raises(ValueError):
+        CompiledQuery({"ports__any__unknown": 1})
+    with pytest.raises(ValueError):
+        CompiledQuery({"ports__gt__lt": 1})
@@ -0,0 +1,136 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from koalak.containers import ColumnarContainer, Container, DictContainer, parallel
+from koalak.containers.aggregations import VarianceAccumulator
+from koalak.containers.parallel import chunk_bounds
+
+from .utils import Person
+
+
+def _records(n=1000):
+    return [
+        {
+            "name": f"host{i}",
+            "port": i % 7,
+            "size": i,
+            "os": "linux" if i % 3 else "win",
+        }
+        for i in range(n)
+    ]
+
+
+def _parallel_container(data, cls=DictContainer):
+    container = cls(data, executor="process", workers=3)
+    container.parallel_min_items = 0
+    return container
+
+
+def test_chunk_bounds():
+    assert chunk_bounds(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert chunk_bounds(2, 4) == [(0, 1), (1, 2)]
+    assert chunk_bounds(0, 4) == []
+
+
+def test_invalid_executor():
+    with pytest.raises(ValueError):
+        Container(executor="threads")
+    with pytest.raises(ValueError):
+        Container(executor="process", workers=0)
+
+
+def test_parallel_results_match_serial():
+    serial = DictContainer(_records())
+    container = _parallel_container(_records())
+
+    criteria = {"port__gt": 3, "os": "linux"}
+    assert list(container.search(criteria)) == list(serial.search(criteria))
+    assert container.count(port=2) == serial.count(port=2)
+    assert container.sum("size", os="win") == serial.sum("size", os="win")
+    assert container.count_values("port") == serial.count_values("port")
+    assert container.mean("size", port=1) == pytest.approx(serial.mean("size", port=1))
+    assert container.var("size") == pytest.approx(serial.var("size"))
+    assert container.median("size") == serial.median("size")
+
+    aggregations = dict(
+        n="count", total=("size", "sum"), first=("name", "first"), last=("name", "last")
+    )
+    expected = serial.groupby("os").agg(**aggregations)
+    result = container.groupby("os").agg(**aggregations)
+    assert result == expected
+    assert list(result) == list(expected)
+
+
+def test_parallel_objects():
+    people = [Person(f"p{i}", i % 50, i) for i in range(300)]
+    container = _parallel_container(people, cls=Container)
+    assert [p.name for p in container.search(age=10)] == [
+        p.name for p in people if p.age == 10
+    ]
+
+
+def test_unpicklable_key_stays_serial():
+    container = _parallel_container(_records())
+    assert container.sum(lambda record: record["size"]) == sum(range(1000))
+
+
+def test_indexed_search_stays_serial():
+    container = _parallel_container(_records())
+    container.create_index("port")
+    assert not container._scan_in_processes({"port": 1})
+    assert container.count(port=1) == 143
+
+
+def test_parallel_columnar():
+    serial = ColumnarContainer(_records())
+    columnar = ColumnarContainer(_records(), executor="process", workers=4)
+    columnar.parallel_min_items = 0
+
+    assert columnar.count(port__ge=5, os="win") == serial.count(port__ge=5, os="win")
+    assert list(columnar.search(size__lt=30, port=1)) == list(
+        serial.search(size__lt=30, port=1)
+    )
+    assert columnar.sum("size", os="linux") == serial.sum("size", os="linux")
+
+
+def test_variance_merge():
+    values = [1.5, 2, 7, 3, 9, 10, 4]
+    whole = VarianceAccumulator(ddof=1)
+    left, right = VarianceAccumulator(ddof=1), VarianceAccumulator(ddof=1)
+    for value in values:
+        whole.add(value)
+    for value in values[:3]:
+        left.add(value)
+    for value in values[3:]:
+        right.add(value)
+    left.merge(right)
+    assert left.result() == pytest.approx(whole.result())
+
+
+def test_search_stays_lazy_and_serial(monkeypatch):
+    container = _parallel_container(_records())
+    assert container._scan_in_processes({"port": 1})
+
+    def map_chunks(*args, **kwargs):
+        raise AssertionError("search must not scan in processes")
+
+    monkeypatch.setattr(parallel, "map_chunks", map_chunks)
+    assert container.first(port=1)["name"] == "host1"
+    assert len(list(container.search(port=1))) == 143
+    container.delete_first(port=1)
+    assert len(list(container.search(port=1))) == 142
+
+
+def _sum_chunk(data, start, stop):
+    return sum(data[start:stop])
+
+
+def test_map_chunks_from_threads():
+    sources = [list(range(i * 100)) for i in range(1, 5)]
+
+    def total(source):
+        return sum(parallel.map_chunks(_sum_chunk, source, len(source), 2))
+
+    with ThreadPoolExecutor(len(sources)) as pool:
+        totals = list(pool.map(total, sources))
+    assert totals == [sum(source) for source in sources]
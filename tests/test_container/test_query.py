@@ -0,0 +1,86 @@
+import pytest
+from koalak.containers import Container, DictContainer
+
+from .utils import Person
+
+
+@pytest.fixture
+def records():
+    return [
+        {"name": "Alice", "age": 30, "city": "Paris"},
+        {"name": "Bob", "age": 25, "city": "Lyon"},
+        {"name": "Charlie", "age": 35, "city": "Paris"},
+        {"name": "David", "age": 30, "city": "Nice"},
+        {"name": "Eve", "age": 40, "city": "Lyon"},
+        {"name": "Foo", "age": 35, "city": "Paris"},
+    ]
+
+
+def names(items):
+    return [e["name"] for e in items]
+
+
+def test_query_where(records):
+    data = DictContainer(records)
+    assert names(data.query()) == names(records)
+    assert names(data.query().where(city="Paris")) == ["Alice", "Charlie", "Foo"]
+    assert names(data.query().where(city="Paris").where(age__gt=30)) == [
+        "Charlie",
+        "Foo",
+    ]
+    assert names(data.query().where({"age": 30})) == ["Alice", "David"]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize("limit", [None, 0, 1, 3, 10])
+@pytest.mark.parametrize("offset", [0, 2])
+def test_query_order_by_limit_offset(records, reverse, limit, offset):
+    data = DictContainer(records)
+    query = data.query().order_by("age", reverse=reverse).offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    expected = sorted(records, key=lambda e: e["age"], reverse=reverse)
+    stop = None if limit is None else offset + limit
+    assert list(query) == expected[offset:stop]
+
+    # same result when the order is read from a sorted index
+    data.create_index("age", kind="sorted")
+    assert list(query) == expected[offset:stop]
+
+
+def test_query_distinct_select(records):
+    data = DictContainer(records)
+    query = data.query().distinct("city").select(["name", "city"])
+    assert list(query) == [
+        {"name": "Alice", "city": "Paris"},
+        {"name": "Bob", "city": "Lyon"},
+        {"name": "David", "city": "Nice"},
+    ]
+
+
+def test_query_is_lazy_and_reusable(records):
+    data = DictContainer(records)
+    base = data.query().where(city="Paris")
+    page1 = base.order_by("name").limit(2)
+    page2 = base.order_by("name").offset(2).limit(2)
+    data.add({"name": "Alan", "age": 20, "city": "Paris"})
+    assert names(page1) == ["Alan", "Alice"]
+    assert names(page2) == ["Charlie", "Foo"]
+    assert base.count() == 4
+    assert base.first()["name"] == "Alice"
+
+
+def test_query_on_objects():
+    data = Container([Person("a", 30), Person("b", 25), Person("c", 35)])
+    query = data.query().where(age__ge=30).order_by("age", reverse=True)
+    assert [p.name for p in query] == ["c", "a"]
+    assert list(query.select("name")) == [{"name": "c"}, {"name": "a"}]
+    assert len(query.to_container()) == 2
+
+
+def test_query_errors(records):
+    data = DictContainer(records)
+    with pytest.raises(ValueError):
+        data.query().limit(-1)
+    with pytest.raises(ValueError):
+        data.query().where(city="Nowhere").first()
@@ -0,0 +1,120 @@
+import datetime
+import json
+import typing
+
+import pytest
+from koalak import containers
+from koalak.containers import DictContainer
+from koalak.descriptions import EntityDescription
+
+
+@pytest.fixture
+def schema():
+    schema = EntityDescription("host")
+    schema.add_field("ip", type=str, indexed=True)
+    schema.add_field("port", type=int)
+    schema.add_field("score", type=float)
+    schema.add_field("alive", type=bool)
+    schema.add_field("seen", type=datetime.date)
+    schema.add_field("tags", type=typing.List[str])
+    return schema
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "hosts.csv"
+    path.write_text(
+        "ip,port,score,alive,seen,tags\n"
+        "10.0.0.1,22,1.5,true,2024-01-02,ssh\n"
+        '10.0.0.2,80,,false,2024-01-03,"web,http"\n'
+        "10.0.0.1,443,9,yes,2024-01-04,\n"
+    )
+    return path
+
+
+EXPECTED = [
+    {
+        "ip": "10.0.0.1",
+        "port": 22,
+        "score": 1.5,
+        "alive": True,
+        "seen": datetime.date(2024, 1, 2),
+        "tags": ["ssh"],
+    },
+    {
+        "ip": "10.0.0.2",
+        "port": 80,
+        "score": None,
+        "alive": False,
+        "seen": datetime.date(2024, 1, 3),
+        "tags": ["web", "http"],
+    },
+    {
+        "ip": "10.0.0.1",
+        "port": 443,
+        "score": 9.0,
+        "alive": True,
+        "seen": datetime.date(2024, 1, 4),
+        "tags": [],
+    },
+]
+
+
+def test_from_csv_without_schema_keeps_strings(csv_path):
+    hosts = DictContainer.from_csv(csv_path)
+    assert hosts.first()["port"] == "22"
+    assert len(hosts) == 3
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_from_csv_with_schema(csv_path, schema, stream):
+    hosts = DictContainer.from_csv(
+        csv_path, schema=schema, stream=stream, chunk_size=2, indexes={"port": "sorted"}
+    )
+    assert list(hosts) == EXPECTED
+    # "ip" is indexed by the schema
+    assert hosts.has_index("ip")
+    assert hosts.has_index("port")
+    assert hosts.count(port__gt=50) == 2
+
+
+def test_from_jsonl(tmp_path, schema):
+    path = tmp_path / "hosts.jsonl"
+    with open(path, "w") as file:
+        for record in EXPECTED:
+            record = dict(record, seen=record["seen"].isoformat())
+            file.write(json.dumps(record) + "\n")
+        file.write("\n")
+    hosts = DictContainer.from_jsonl(path, schema=schema, stream=True)
+    assert list(hosts) == EXPECTED
+
+
+def test_iter_csv_with_functions(csv_path, schema):
+    rows = DictContainer.iter_csv(csv_path, schema)
+    assert containers.sum(rows, "port", ip="10.0.0.1") == 465
+    first = containers.first(DictContainer.iter_csv(csv_path, schema), port=80)
+    assert first["tags"] == ["web", "http"]
+
+
+def test_invalid_bool(tmp_path, schema):
+    path = tmp_path / "hosts.csv"
+    path.write_text("ip,alive\n10.0.0.1,maybe\n")
+    with pytest.raises(ValueError):
+        DictContainer.from_csv(path, schema=schema)
+
+
+def test_optional_fields(csv_path):
+    schema = EntityDescription("host")
+    schema.add_field("port", type=typing.Optional[int])
+    schema.add_field("score", type=float | None)
+    schema.add_field("alive", type=typing.Union[None, bool])
+    schema.add_field("seen", type=typing.Optional[datetime.date])
+    schema.add_field("tags", type=typing.Optional[typing.List[str]])
+    hosts = DictContainer.from_csv(csv_path, schema=schema)
+    assert [
+        {key: host[key] for key in ["port", "score", "alive", "seen", "tags"]}
+        for host in hosts
+    ] == [
+        {key: record[key] for key in ["port", "score", "alive", "seen", "tags"]}
+        for record in EXPECTED
+    ]
@@ -0,0 +1,119 @@
+import io
+
+import pytest
+from koalak.containers import ColumnarContainer, Container, DictContainer, DiskContainer
+
+from .utils import Person
+
+
+@pytest.fixture
+def hosts():
+    return [
+        {"ip": f"10.0.0.{i}", "port": [22, 80, 443][i % 3], "score": i / 2}
+        for i in range(50)
+    ]
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_save_load_container_with_indexes(tmp_path, hosts, mmap):
+    path = tmp_path / "hosts.snapshot"
+    container = DictContainer(hosts, name="hosts")
+    container.create_index("port")
+    container.create_index("score", kind="sorted")
+    container.create_text_index(["ip"])
+    container.materialize("by_port", "count", by="port")
+    container.save(path)
+
+    loaded = DictContainer.load(path, mmap=mmap)
+    assert type(loaded) is DictContainer
+    assert loaded.name == "hosts"
+    assert list(loaded) == hosts
+    assert loaded.has_index("port") and loaded.has_index("score")
+    assert loaded.count(port=22) == 17
+    assert loaded.max("score") == hosts[-1]
+    assert [e["ip"] for e in loaded.search(search="0.0.4")] == [
+        f"10.0.0.{i}" for i in range(4, 50) if "0.0.4" in f"10.0.0.{i}"
+    ]
+    assert loaded.materialized("by_port") == {22: 17, 80: 17, 443: 16}
+
+    # indexes are kept up to date after loading
+    loaded.add({"ip": "10.0.0.99", "port": 8080, "score": 100.0})
+    assert loaded.first(port=8080)["ip"] == "10.0.0.99"
+
+
+def test_load_checks_class(tmp_path):
+    path = tmp_path / "people.snapshot"
+    Container([Person("alice", 30)]).save(path)
+    assert Container.load(path).first(name="alice").age == 30
+    with pytest.raises(TypeError):
+        DictContainer.load(path)
+
+
+def test_load_invalid_file(tmp_path):
+    path = tmp_path / "invalid"
+    path.write_bytes(b"not a snapshot")
+    with pytest.raises(ValueError):
+        Container.load(path)
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_save_load_columnar(tmp_path, hosts, mmap):
+    path = tmp_path / "hosts.columns"
+    columnar = ColumnarContainer(hosts, name="hosts")
+    columnar.save(path)
+
+    loaded = ColumnarContainer.load(path, mmap=mmap)
+    assert list(loaded) == hosts
+    # numeric and string columns are views of the file, not copies
+    assert isinstance(loaded._columns["score"].raw, memoryview)
+    assert isinstance(loaded._columns["ip"].raw, memoryview)
+    assert loaded.count(port__gt=30) == 33
+    assert loaded.max("score") == hosts[-1]
+    assert loaded.sum("score") == sum(e["score"] for e in hosts)
+
+    # columns become writable arrays on the first modification
+    loaded.add({"ip": "10.0.0.99", "port": 22, "score": 1.5})
+    assert loaded[-1] == {"ip": "10.0.0.99", "port": 22, "score": 1.5}
+    assert loaded.count(port=22) == 18
+
+
+def _container_subclasses(cls=Container):
+    yield cls
+    for subclass in cls.__subclasses__():
+        if subclass.__module__.startswith("koalak.containers"):
+            yield from _container_subclasses(subclass)
+
+
+# How to build a container of each class shipped with koalak.containers
+CONTAINER_FACTORIES = {
+    Container: lambda tmp_path, hosts: Container([Person("alice", 30)]),
+    DictContainer: lambda tmp_path, hosts: DictContainer(hosts),
+    DiskContainer: lambda tmp_path, hosts: DiskContainer(tmp_path / "h.jsonl", hosts),
+}
+
+
+def test_snapshots_of_every_container_class(tmp_path, hosts):
+    assert set(_container_subclasses()) == set(CONTAINER_FACTORIES)
+    for container_cls, factory in CONTAINER_FACTORIES.items():
+        container = factory(tmp_path, hosts)
+        path = tmp_path / f"{container_cls.__name__}.snapshot"
+        if container_cls is DiskContainer:
+            with pytest.raises(io.UnsupportedOperation):
+                container.save(path)
+            with pytest.raises(io.UnsupportedOperation):
+                container_cls.load(path)
+            container.close()
+            continue
+        container.save(path)
+        loaded = container_cls.load(path)
+        assert type(loaded) is container_cls
+        assert len(loaded) == len(container)
+
+
+def test_save_rejects_data_that_is_not_a_list(tmp_path, hosts):
+    class FileContainer(DictContainer):
+        def _materialize_data(self):
+            pass
+
+    with pytest.raises(io.UnsupportedOperation):
+        FileContainer(iter(hosts), copy=False).save(tmp_path / "hosts.snapshot")
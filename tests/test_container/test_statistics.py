@@ -0,0 +1,110 @@
+import random
+import statistics
+
+import pytest
+from koalak import containers
+from koalak.containers import Container, DictContainer, functions
+from koalak.containers.sketches import P2Quantile
+
+from .utils import Person
+
+
+@pytest.fixture
+def latencies():
+    return [
+        {"endpoint": "/a", "latency": 12},
+        {"endpoint": "/b", "latency": 7},
+        {"endpoint": "/a", "latency": 30},
+        {"endpoint": "/a", "latency": 3},
+        {"endpoint": "/b", "latency": 18},
+    ]
+
+
+def test_mean_var_std(latencies):
+    data = DictContainer(latencies)
+    values = [e["latency"] for e in latencies]
+    assert data.mean("latency") == statistics.mean(values)
+    assert data.var("latency") == pytest.approx(statistics.pvariance(values))
+    assert data.var("latency", ddof=1) == pytest.approx(statistics.variance(values))
+    assert data.std("latency") == pytest.approx(statistics.pstdev(values))
+    assert data.mean("latency", endpoint="/a") == 15
+    assert data.mean("latency", {"endpoint": "/b"}) == 12.5
+
+
+def test_median_quantile(latencies):
+    data = DictContainer(latencies)
+    assert data.median("latency") == 12
+    assert data.median("latency", endpoint="/b") == 12.5
+    assert data.quantile("latency", 0) == 3
+    assert data.quantile("latency", 1) == 30
+    assert data.quantile("latency", 0.25) == 7
+    assert data.quantile("latency", 0.9) == pytest.approx(25.2)
+
+
+def test_statistics_errors(latencies):
+    data = DictContainer(latencies)
+    with pytest.raises(ValueError):
+        data.mean("latency", endpoint="/c")
+    with pytest.raises(ValueError):
+        data.var("latency", endpoint="/c")
+    with pytest.raises(ValueError):
+        data.median("latency", endpoint="/c")
+    with pytest.raises(ValueError):
+        data.quantile("latency", 1.5)
+
+
+def test_statistics_on_objects():
+    data = Container([Person("a", 10), Person("b", 20), Person("c", 60)])
+    assert data.mean("age") == 30
+    assert data.median("age") == 20
+
+
+def test_statistics_functions_on_generators(latencies):
+    assert containers.mean(iter(latencies), "latency") == 14
+    assert containers.median((e for e in latencies), "latency") == 12
+    assert containers.var(iter(latencies), "latency") == pytest.approx(89.2)
+    assert containers.std(iter(latencies), "latency") == pytest.approx(89.2**0.5)
+    assert containers.quantile(iter(latencies), "latency", 0.5, approximate=True) == 12
+
+
+@pytest.mark.parametrize("empty", [list, lambda: iter([]), lambda: (e for e in [])])
+def test_statistics_functions_on_empty_iterables(empty):
+    for function in [containers.mean, containers.var, containers.median]:
+        with pytest.raises(ValueError, match="Not enough values"):
+            function(empty(), "latency")
+    with pytest.raises(ValueError, match="Not enough values"):
+        containers.quantile(empty(), "latency", 0.9, approximate=True)
+    with pytest.raises(ValueError, match="Not enough values"):
+        containers.std(empty(), "latency", ddof=1)
+    with pytest.raises(ValueError, match="Not enough values"):
+        DictContainer(empty()).mean("latency")
+    assert functions.count_values(empty(), "latency") == {}
+    assert list(containers.unique(empty(), "latency")) == []
+
+
+def test_statistics_functions_with_criteria(latencies):
+    assert containers.mean(iter(latencies), "latency", endpoint="/a") == 15
+    assert containers.median(iter(latencies), "latency", endpoint="/b") == 12.5
+    with pytest.raises(ValueError):
+        containers.var(iter(latencies[:1]), "latency", ddof=1)
+
+
+def test_p2_quantile_approximation():
+    rng = random.Random(42)
+    values = [rng.gauss(100, 15) for _ in range(20000)]
+    exact = statistics.quantiles(values, n=100, method="inclusive")
+    for q, expected in [(0.5, exact[49]), (0.9, exact[89]), (0.99, exact[98])]:
+        sketch = P2Quantile(q)
+        for value in values:
+            sketch.add(value)
+        assert sketch.result() == pytest.approx(expected, rel=0.02)
+
+
+def test_groupby_agg_statistics(latencies):
+    result = (
+        DictContainer(latencies)
+        .groupby("endpoint")
+        .agg(median=("latency", "median"), std=("latency", "std"))
+    )
+    assert result["/a"]["median"] == 12
+    assert result["/b"]["std"] == pytest.approx(5.5)
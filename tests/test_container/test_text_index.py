@@ -0,0 +1,117 @@
+import pytest
+from koalak.containers import Container, DictContainer
+from koalak.containers.indexes import DeletionLog
+
+from .utils import Person
+
+
+@pytest.fixture
+def hosts():
+    return [
+        {"hostname": "web-server-01", "os": "Linux", "ip": "10.0.0.1"},
+        {"hostname": "db-server", "os": "Linux", "ip": "10.0.0.2"},
+        {"hostname": "DC01", "os": "Windows Server", "ip": "10.0.1.1"},
+        {"hostname": "printer", "os": None, "ip": "10.0.2.8"},
+    ]
+
+
+@pytest.mark.parametrize(
+    "search, searchable_fields",
+    [
+        ("server", None),
+        ("SERVER", None),
+        ("10.0.0", None),
+        ("dc", None),
+        ("none", None),
+        ("zzz", None),
+        ("server", ["hostname"]),
+        ("linux", ["hostname", "os"]),
+    ],
+)
+def test_text_index_same_results_as_scan(hosts, search, searchable_fields):
+    indexed = DictContainer(hosts)
+    indexed.create_text_index(searchable_fields)
+    scan = DictContainer(hosts)
+    expected = list(scan.search(search=search, searchable_fields=searchable_fields))
+    result = list(indexed.search(search=search, searchable_fields=searchable_fields))
+    assert result == expected
+
+
+def test_text_index_with_criteria(hosts):
+    data = DictContainer(hosts)
+    data.create_text_index()
+    data.create_index("os")
+    assert [e["hostname"] for e in data.search(search="server", os="Linux")] == [
+        "web-server-01",
+        "db-server",
+    ]
+
+
+def test_text_index_maintained(hosts):
+    data = DictContainer(hosts, deepcopy=True)
+    data.create_text_index()
+    data.add({"hostname": "backup-server", "os": "Linux", "ip": "10.0.3.1"})
+    data.update({"hostname": "db-server"}, {"hostname": "database"})
+    assert [e["hostname"] for e in data.search(search="server")] == [
+        "web-server-01",
+        "DC01",
+        "backup-server",
+    ]
+    data.delete_first(hostname="web-server-01")
+    assert [e["hostname"] for e in data.search(search="server")] == [
+        "DC01",
+        "backup-server",
+    ]
+
+
+def test_text_index_on_objects():
+    data = Container([Person("alice", 30), Person("bob", 25), Person("alicia", 35)])
+    data.create_text_index()
+    assert [p.name for p in data.search(search="ALIC")] == ["alice", "alicia"]
+    assert [p.name for p in data.search(search="35")] == ["alicia"]
+
+
+@pytest.mark.parametrize(
+    "items",
+    [
+        [{"a": "foo"}, {"a": "bar", "b": "needle"}],
+        [{"a": "foo", "b": "needle"}, {"a": "bar"}],
+        [{"a": "needle", "b": "x"}, {"a": "foo"}, {"a": "needle"}],
+    ],
+)
+def test_text_index_same_fields_as_scan(items):
+    indexed = DictContainer(items)
+    indexed.create_text_index()
+
+    def search(container):
+        try:
+            return list(container.search(search="needle"))
+        except KeyError as error:
+            return error
+
+    scan = DictContainer(items)
+    assert repr(search(indexed)) == repr(search(scan))
+    # the first item defines the searched fields, also when it changes
+    indexed.delete_first(a=items[0]["a"])
+    scan.delete_first(a=items[0]["a"])
+    assert repr(search(indexed)) == repr(search(scan))
+
+
+@pytest.mark.parametrize("max_log_size", [0, 4096])
+def test_text_index_delete_does_not_reindex(hosts, monkeypatch, max_log_size):
+    monkeypatch.setattr(DeletionLog, "max_size", max_log_size)
+    data = DictContainer(hosts)
+    data.create_text_index()
+    calls = []
+    original_get = data.get
+
+    def get(item, key):
+        calls.append(key)
+        return original_get(item, key)
+
+    monkeypatch.setattr(data._text_index, "get", get)
+    data.delete_first(hostname="web-server-01")
+    data.delete_many(os="Linux")
+    assert calls == []
+    assert [e["hostname"] for e in data.search(search="server")] == ["DC01"]
+    assert [e["hostname"] for e in data.search(search="10.0.2")] == ["printer"]
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+from koalak import containers
+from koalak.containers import Container, DictContainer
+
+from .utils import Person
+
+
+@pytest.fixture
+def scores():
+    rng = random.Random(7)
+    return [{"name": f"player{i}", "score": rng.randint(0, 20)} for i in range(200)]
+
+
+@pytest.mark.parametrize("reverse", [True, False])
+@pytest.mark.parametrize("indexed", [True, False])
+def test_top_matches_sorted(scores, reverse, indexed):
+    container = DictContainer(scores)
+    if indexed:
+        container.create_index("score", kind="sorted")
+    expected = sorted(scores, key=lambda e: e["score"], reverse=reverse)[:10]
+    assert container.top(10, "score", reverse=reverse) == expected
+
+
+def test_top_edge_cases(scores):
+    container = DictContainer(scores)
+    assert container.top(0, "score") == []
+    assert len(container.top(1000, "score")) == 200
+    assert Container([3, 1, 2]).top(2) == [3, 2]
+
+
+def test_top_objects():
+    people = Container([Person("a", 30), Person("b", 50), Person("c", 40)])
+    assert [p.name for p in people.top(2, "age")] == ["b", "c"]
+    assert [p.name for p in people.top(1, "age", reverse=False)] == ["a"]
+
+
+def test_functions_nlargest_nsmallest(scores):
+    generator = (e for e in scores)
+    expected = sorted(scores, key=lambda e: e["score"], reverse=True)[:5]
+    assert containers.nlargest(generator, 5, "score") == expected
+    expected = sorted(scores, key=lambda e: e["score"])[:5]
+    assert containers.nsmallest(scores, 5, "score") == expected
+    assert containers.nsmallest([5, 1, 3], 2) == [1, 3]
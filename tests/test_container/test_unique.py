@@ -0,0 +1,85 @@
+import attrs
+import pytest
+from koalak.containers import Container, DictContainer, unique
+from koalak.containers.sketches import BloomFilter
+from koalak.containers.utils import canonical_hashable
+
+from .utils import Person, people_data, people_dict_data
+
+
+@attrs.define
+class Host:
+    ip: str
+    ports: list
+
+
+def test_unique_nested_dicts():
+    data = DictContainer(
+        [
+            {"ip": "10.0.0.1", "ports": [22, 80], "meta": {"os": "linux"}},
+            {"meta": {"os": "linux"}, "ports": [22, 80], "ip": "10.0.0.1"},
+            {"ip": "10.0.0.1", "ports": [80, 22], "meta": {"os": "linux"}},
+        ]
+    )
+    result = data.unique()
+    assert len(result) == 2
+    assert result[0] is data[0]
+    assert result[1] is data[2]
+
+
+def test_unique_with_key(people_dict_data):
+    data = DictContainer(people_dict_data)
+    assert [e["name"] for e in data.unique("money")] == ["Alice", "Charlie"]
+    assert [e["name"] for e in data.unique(["money", "tags"])] == [
+        "Alice",
+        "Bob",
+        "Charlie",
+    ]
+
+
+def test_unique_attrs_instances():
+    data = Container([Host("a", [1]), Host("a", [1]), Host("b", [1])])
+    assert [host.ip for host in data.unique()] == ["a", "b"]
+
+
+def test_unique_plain_objects_by_identity(people_data):
+    data = Container(people_data + people_data[:1])
+    assert len(data.unique()) == 3
+    assert [p.name for p in data.unique("tags")] == ["Alice", "Bob", "Charlie"]
+
+
+def test_unique_approximate():
+    data = DictContainer([{"n": i % 100} for i in range(1000)])
+    result = data.unique("n", approximate=True)
+    # a Bloom filter never keeps a duplicate, it can only drop distinct values
+    assert len(result) <= 100
+    assert len(result) >= 90
+    assert len({e["n"] for e in result}) == len(result)
+
+
+def test_functions_unique_is_lazy():
+    def generate():
+        yield {"a": [1]}
+        yield {"a": [1]}
+        raise AssertionError("consumed too far")
+
+    assert next(unique(generate())) == {"a": [1]}
+
+
+def test_canonical_hashable():
+    assert canonical_hashable({"a": {"b": [1]}}) == canonical_hashable(
+        {"a": {"b": [1]}}
+    )
+    assert canonical_hashable([1, 2]) != canonical_hashable((1, 2))
+    assert canonical_hashable({1, 2}) == canonical_hashable(frozenset({2, 1}))
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(100)
+    assert not bloom.add("a")
+    assert bloom.add("a")
+    assert "a" in bloom
+    with pytest.raises(ValueError):
+        BloomFilter(0)
+    with pytest.raises(ValueError):
+        BloomFilter(10, error_rate=1)
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from koalak.plugin_manager import Metadata, Plugin, PluginManager
+
+
+def _build_plugins():
+    class BasePlugin(Plugin):
+        pass
+
+    plugins = PluginManager(base_plugin=BasePlugin)
+
+    class AsyncPlugin(BasePlugin):
+        name = "async"
+        metadata = Metadata(order=1)
+
+        async def scan(self, target):
+            await asyncio.sleep(0.05)
+            return f"async {target}"
+
+    class SyncPlugin(BasePlugin):
+        name = "sync"
+        metadata = Metadata(order=2)
+
+        def scan(self, target):
+            return f"sync {target}"
+
+    class SlowPlugin(BasePlugin):
+        name = "slow"
+        metadata = Metadata(order=3)
+
+        async def scan(self, target):
+            await asyncio.sleep(10)
+
+    class FailingPlugin(BasePlugin):
+        name = "failing"
+        metadata = Metadata(order=4)
+
+        def scan(self, target):
+            raise ValueError(target)
+
+    return plugins
+
+
+def _collect(async_iterator):
+    async def collect():
+        return [result async for result in async_iterator]
+
+    return asyncio.run(collect())
+
+
+def test_arun_results():
+    plugins = _build_plugins()
+    start = time.perf_counter()
+    results = _collect(plugins.arun("scan", "host", timeout=0.5))
+    assert time.perf_counter() - start < 5
+    results = {result.name: result for result in results}
+    assert results["async"].value == "async host"
+    assert results["sync"].get() == "sync host"
+    assert results["slow"].timed_out
+    assert isinstance(results["failing"].error, ValueError)
+    # results are yielded as soon as plugins finish
+    assert list(results)[-1] == "slow"
+
+
+def test_arun_concurrency():
+    class BasePlugin(Plugin):
+        pass
+
+    plugins = PluginManager(base_plugin=BasePlugin)
+    running = []
+
+    for i in range(20):
+
+        class CountingPlugin(BasePlugin):
+            name = f"counting_{i}"
+
+            async def scan(self):
+                running.append(1)
+                assert len(running) <= 5
+                await asyncio.sleep(0.01)
+                running.pop()
+                return True
+
+    results = _collect(plugins.arun("scan", concurrency=5))
+    assert len(results) == 20 and all(result.value for result in results)
+
+
+def test_arun_cancellation():
+    plugins = _build_plugins()
+
+    async def first_result():
+        async_iterator = plugins.arun("scan", "host")
+        result = await async_iterator.__anext__()
+        # closing the iterator cancels the running plugins
+        await async_iterator.aclose()
+        return result, asyncio.all_tasks()
+
+    result, tasks = asyncio.run(first_result())
+    assert result.name == "sync"
+    assert len(tasks) == 1
@@ -0,0 +1,103 @@
+import pytest
+from koalak.plugin_manager import Metadata, Plugin, PluginManager
+from koalak.plugin_manager.scheduler import find_cycle, topological_waves
+
+
+def test_topological_waves():
+    graph = {"a": [], "b": ["a"], "c": [], "d": ["b", "c"], "e": ["a"]}
+    assert topological_waves(graph) == [["a", "c"], ["b", "e"], ["d"]]
+    # dependencies of the selected plugins are included
+    assert topological_waves(graph, ["d"]) == [["a", "c"], ["b"], ["d"]]
+    assert find_cycle(graph) is None
+
+    graph["a"] = ["d"]
+    assert find_cycle(graph) in (["a", "d", "b", "a"], ["d", "b", "a", "d"])
+    with pytest.raises(ValueError):
+        topological_waves(graph)
+
+
+def _build_plugins():
+    class BasePlugin(Plugin):
+        pass
+
+    plugins = PluginManager(base_plugin=BasePlugin)
+
+    class ResolvePlugin(BasePlugin):
+        name = "resolve"
+
+        def scan(self, target):
+            return f"ip({target})"
+
+    class PortsPlugin(BasePlugin):
+        name = "ports"
+        metadata = Metadata(plugin_dependencies=["resolve"])
+
+        def scan(self, target, dependencies_results):
+            return [dependencies_results["resolve"], 80]
+
+    class BannerPlugin(BasePlugin):
+        name = "banner"
+        metadata = Metadata(plugin_dependencies=["ports", "resolve"])
+
+        def scan(self, target, dependencies_results):
+            return sorted(dependencies_results)
+
+    class WhoisPlugin(BasePlugin):
+        name = "whois"
+
+        def scan(self, target):
+            raise ValueError(target)
+
+    class AbuseContactPlugin(BasePlugin):
+        name = "abuse_contact"
+        metadata = Metadata(plugin_dependencies=["whois"])
+
+        def scan(self, target, dependencies_results):
+            return "contact"
+
+    return plugins
+
+
+@pytest.mark.parametrize("executor", ["serial", "thread"])
+def test_run_in_waves(executor):
+    plugins = _build_plugins()
+    run = plugins.runner(executor=executor).scan("host")
+    assert [[plugin.name for plugin in wave] for wave in run.waves()] == [
+        ["resolve", "whois"],
+        ["ports", "abuse_contact"],
+        ["banner"],
+    ]
+
+    results = {result.name: result for result in run.run_in_waves()}
+    assert results["ports"].value == ["ip(host)", 80]
+    assert results["banner"].value == ["ports", "resolve"]
+    assert isinstance(results["whois"].error, ValueError)
+    assert isinstance(results["abuse_contact"].error, RuntimeError)
+
+    # selecting a plugin runs its dependencies
+    results = plugins.runner(name="banner").scan("host").run_in_waves()
+    assert [result.name for result in results] == ["resolve", "ports", "banner"]
+
+
+def test_init_checks_dependencies():
+    plugins = _build_plugins()
+    plugins.init()
+
+    class BasePlugin(Plugin):
+        pass
+
+    plugins = PluginManager(base_plugin=BasePlugin)
+
+    class APlugin(BasePlugin):
+        name = "a"
+        metadata = Metadata(plugin_dependencies=["b"])
+
+    with pytest.raises(ValueError, match="unknown plugin"):
+        plugins.check_dependencies()
+
+    class BPlugin(BasePlugin):
+        name = "b"
+        metadata = Metadata(plugin_dependencies=["a"])
+
+    with pytest.raises(ValueError, match="a -> b -> a"):
+        plugins.init()
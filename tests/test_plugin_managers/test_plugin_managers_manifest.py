@@ -0,0 +1,158 @@
+import json
+import os
+
+import pytest
+from koalak.plugin_manager import Plugin, PluginManager, abstract
+from koalak.plugin_manager.manifest import PluginProxy
+from koalak.utils import tmp_module
+
+PLUGINS_FILE = """from {module_name} import BasePlugin, executions
+from koalak.plugin_manager import Metadata
+
+executions.append(1)
+
+class APlugin(BasePlugin):
+    name = "A"
+    metadata = Metadata(category="web", order=2)
+
+    def run(self):
+        return "A"
+
+class BPlugin(BasePlugin):
+    name = "B"
+    metadata = Metadata(category="network", order=1)
+
+    def run(self):
+        return "B"
+"""
+
+
+def test_lazy_home_plugins(tmp_path):
+    class BasePlugin(Plugin):
+        pass
+
+    executions = []
+    context = {"BasePlugin": BasePlugin, "executions": executions}
+    with tmp_module(context=context) as module:
+        home_plugins_path = tmp_path / "home" / "plugins"
+        home_plugins_path.mkdir(parents=True)
+        plugins_file = home_plugins_path / "plugins.py"
+        plugins_file.write_text(PLUGINS_FILE.format(module_name=module.__name__))
+        manifest_path = tmp_path / "manifest.json"
+
+        def new_plugin_manager():
+            plugins = PluginManager(
+                base_plugin=BasePlugin,
+                home_path=tmp_path / "home",
+                manifest_path=manifest_path,
+            )
+            plugins.init()
+            return plugins
+
+        # First run: plugins are loaded and the manifest is written
+        plugins = new_plugin_manager()
+        assert executions == [1]
+        manifest = json.loads(manifest_path.read_text())
+        assert [e["name"] for e in manifest["plugins"]] == ["B", "A"]
+        assert manifest["plugins"][0]["source"] == {"path": str(plugins_file)}
+
+        # Next runs: plugins are listed without executing the file
+        plugins = new_plugin_manager()
+        assert executions == [1]
+        assert isinstance(plugins._plugins["A"], PluginProxy)
+        assert len(plugins) == 2
+        assert [e.name for e in plugins] == ["B", "A"]
+        assert [e.name for e in plugins.iter(category="web")] == ["A"]
+
+        # Accessing a plugin imports it
+        a_plugin = plugins["A"]
+        assert executions == [1, 1]
+        assert a_plugin.__name__ == "APlugin" and a_plugin().run() == "A"
+        assert not isinstance(plugins._plugins["B"], PluginProxy)
+        assert plugins.runner(category="web").run().run()[0].value == "A"
+
+        # Using a proxy also imports it
+        plugins = new_plugin_manager()
+        assert [e.run() for e in plugins.instances()] == ["B", "A"]
+        assert executions == [1, 1, 1]
+
+        # The manifest is rebuilt when a plugin file changes
+        stat = plugins_file.stat()
+        os.utime(plugins_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        new_plugin_manager()
+        assert executions == [1, 1, 1, 1]
+        new_plugin_manager()
+        assert executions == [1, 1, 1, 1]
+
+
+def test_lazy_module_plugins(tmp_path, monkeypatch):
+    class BasePlugin(Plugin):
+        pass
+
+    with tmp_module(context={"BasePlugin": BasePlugin, "executions": []}) as module:
+        (tmp_path / "koalak_lazy_plugins.py").write_text(
+            PLUGINS_FILE.format(module_name=module.__name__)
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+
+        plugins = PluginManager(base_plugin=BasePlugin)
+        import koalak_lazy_plugins  # noqa: F401
+
+        plugins.init()
+        plugins.write_manifest(tmp_path / "manifest.json")
+
+        plugins = PluginManager(
+            base_plugin=BasePlugin, manifest_path=tmp_path / "manifest.json"
+        )
+        plugins.init()
+        assert isinstance(plugins._plugins["B"], PluginProxy)
+        assert plugins["B"] is koalak_lazy_plugins.BPlugin
+        assert plugins["B"] in plugins
+
+
+INVALID_PLUGIN_FILE = """from {module_name} import BasePlugin
+
+class CPlugin(BasePlugin):
+    name = "C"
+"""
+
+
+def test_manifest_records_checked_plugins(tmp_path):
+    class BasePlugin(Plugin):
+        @abstract
+        def run(self):
+            pass
+
+    with tmp_module(context={"BasePlugin": BasePlugin}) as module:
+        home_plugins_path = tmp_path / "home" / "plugins"
+        home_plugins_path.mkdir(parents=True)
+        (home_plugins_path / "plugins.py").write_text(
+            INVALID_PLUGIN_FILE.format(module_name=module.__name__)
+        )
+        manifest_path = tmp_path / "manifest.json"
+
+        def new_plugin_manager(auto_check):
+            plugins = PluginManager(
+                base_plugin=BasePlugin,
+                home_path=tmp_path / "home",
+                manifest_path=manifest_path,
+                auto_check=auto_check,
+            )
+            plugins.init()
+            return plugins
+
+        # The manifest is written without checking the plugin
+        plugins = new_plugin_manager(auto_check=False)
+        manifest = json.loads(manifest_path.read_text())
+        assert manifest["plugins"][0]["checked"] is False
+        # "checked" records the checks that ran, not the current setting
+        plugins.auto_check = True
+        plugins.write_manifest()
+        manifest = json.loads(manifest_path.read_text())
+        assert manifest["plugins"][0]["checked"] is False
+
+        # A manager checking its plugins checks it when it is loaded
+        plugins = new_plugin_manager(auto_check=True)
+        assert isinstance(plugins._plugins["C"], PluginProxy)
+        with pytest.raises(Exception, match="run"):
+            plugins["C"]
@@ -1,17 +1,53 @@
+import time
+
 import pytest
-from koalak.plugin_manager import PluginManager, abstract
+from koalak.plugin_manager import Metadata, Plugin, PluginManager, abstract
 
 
-@pytest.mark.skip
-def test_plugin_manager_run_simple():
-    plugins = koalak.mkpluginmanager()
+def _build_plugins():
+    class BasePlugin(Plugin):
+        def __init__(self, offset=0):
+            self.offset = offset
+
+        @abstract
+        def compute(self, x):
+            pass
+
+    plugins = PluginManager(base_plugin=BasePlugin)
+
+    class DoublePlugin(BasePlugin):
+        name = "double"
+        metadata = Metadata(category="math", order=1)
+
+        def compute(self, x):
+            return x * 2 + self.offset
+
+    class SlowPlugin(BasePlugin):
+        name = "slow"
+        metadata = Metadata(order=2)
+
+        def compute(self, x):
+            time.sleep(0.3)
+            return x
+
+    class FailingPlugin(BasePlugin):
+        name = "failing"
+        metadata = Metadata(category="math", order=3)
+
+        def compute(self, x):
+            raise ValueError(x)
 
-    @plugins._register_base_plugin
-    class BasePlugin:
-        @koalak.abstract
+    return plugins
+
+
+def test_plugin_manager_run_simple():
+    class BasePlugin(Plugin):
+        @abstract
         def append(self, l):
             pass
 
+    plugins = PluginManager(base_plugin=BasePlugin)
+
     class AppendOnePlugin(BasePlugin):
         name = "append_one"
 
@@ -25,4 +61,50 @@ def test_plugin_manager_run_simple():
             return l.append(2)
 
     l_argument = []
-    plugins.runner.append(l_argument).run()
+    results = plugins.runner.append(l_argument).run()
+    assert sorted(l_argument) == [1, 2]
+    assert [result.name for result in results] == ["append_one", "append_two"]
+    assert all(result.ok for result in results)
+
+
+@pytest.mark.parametrize("executor", ["serial", "thread", "process"])
+def test_runner_results(executor):
+    plugins = _build_plugins()
+    results = plugins.runner(executor=executor, init_args=(1,)).compute(5).run()
+    assert [result.name for result in results] == ["double", "slow", "failing"]
+    assert results[0].get() == 11
+    assert results[1].value == 5
+    assert isinstance(results[2].error, ValueError)
+    with pytest.raises(ValueError):
+        results[2].get()
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_runner_streams_results_and_timeouts(executor):
+    plugins = _build_plugins()
+    names = [
+        result.name
+        for result in plugins.runner(executor=executor, workers=3).compute(1)
+    ]
+    # the slow plugin finishes last
+    assert names[-1] == "slow"
+
+    results = (
+        plugins.runner(executor=executor, workers=3, timeout=0.1)
+        .call("compute", 1)
+        .run()
+    )
+    assert results[1].timed_out and not results[1].ok
+    assert results[0].value == 2
+
+
+def test_runner_filters_and_options():
+    plugins = _build_plugins()
+    runner = plugins.runner(category="math", workers=1)
+    assert [result.name for result in runner.compute(1)] == ["double", "failing"]
+    with pytest.raises(ValueError):
+        plugins.runner(executor="unknown")
+    with pytest.raises(ValueError):
+        plugins.runner(executor="serial", timeout=1)
+    with pytest.raises(AttributeError):
+        plugins.runner.unknown_method()
@@ -1,4 +1,9 @@
+import importlib.metadata
+
+from koalak.plugin_manager import packages_distributions_utils
 from koalak.plugin_manager.packages_distributions_utils import (
+    MetadataCache,
+    cached_entry_points,
     module_to_package_distribution_name,
 )
 
@@ -10,3 +15,46 @@ def test_module_to_package_distribution_name():
     )
     assert module_to_package_distribution_name("koalak.plugin_manager") == "koalak"
     assert module_to_package_distribution_name("yaml") == "PyYAML"
+
+
+def test_metadata_cache(tmp_path, monkeypatch):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    cache = MetadataCache(tmp_path)
+    assert cache.get("key", compute) == {"value": 1}
+    assert cache.get("key", compute) == {"value": 1}
+    assert cache.path.exists()
+
+    # Another process reads the value from the disk
+    assert MetadataCache(tmp_path).get("key", compute) == {"value": 1}
+    assert calls == [1]
+
+    # Installing a distribution changes sys.path mtimes and clears the cache
+    site_packages = tmp_path / "site-packages"
+    site_packages.mkdir()
+    monkeypatch.syspath_prepend(str(site_packages))
+    assert cache.get("key", compute) == {"value": 2}
+    (site_packages / "new_distribution-1.0.dist-info").mkdir()
+    assert MetadataCache(tmp_path).get("key", compute) == {"value": 3}
+
+    # The cache can be disabled
+    assert MetadataCache(None).get("key", compute) == {"value": 4}
+    assert MetadataCache(None).path is None
+
+
+def test_cached_entry_points(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        packages_distributions_utils, "metadata_cache", MetadataCache(tmp_path)
+    )
+    expected = importlib.metadata.entry_points(group="console_scripts")
+    assert cached_entry_points("console_scripts") == list(expected)
+    # the second call does not scan the distributions
+    monkeypatch.setattr(importlib.metadata, "entry_points", None)
+    assert cached_entry_points("console_scripts") == list(expected)
+    if expected:
+        name = list(expected)[0].name
+        assert [e.name for e in cached_entry_points("console_scripts", name)] == [name]